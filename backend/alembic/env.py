@@ -0,0 +1,64 @@
+"""
+Alembic environment
+
+Migrations run against settings.DATABASE_URL. Every model module is
+imported so autogenerate sees the full schema.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.core.database import Base
+import app.core.partitioning  # noqa: F401  (partitioned primary keys on PostgreSQL)
+import app.models.analysis  # noqa: F401
+import app.models.collaboration  # noqa: F401
+import app.models.consultation  # noqa: F401
+import app.models.medical  # noqa: F401
+import app.models.notification  # noqa: F401
+import app.models.report  # noqa: F401
+import app.models.scheduler  # noqa: F401
+import app.models.user  # noqa: F401
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit the SQL instead of running it (`alembic upgrade head --sql`)"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,234 @@
+"""baseline schema
+
+Schema of the application before Alembic, as Base.metadata.create_all
+created it. Databases created that way already match it: mark them with
+
+    alembic stamp 0001
+
+then `alembic upgrade head` applies the later revisions.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ENUM_TYPES = ("userrole", "imagetype", "analysisstatus", "sharepermission")
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('role', sa.Enum('ADMIN', 'DOCTOR', 'RADIOLOGIST', 'NURSE', name='userrole'), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('specialty', sa.String(), nullable=True),
+    sa.Column('institution', sa.String(), nullable=True),
+    sa.Column('rpps_number', sa.String(), nullable=True),
+    sa.Column('totp_secret', sa.String(), nullable=True),
+    sa.Column('is_2fa_enabled', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('changes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('link', sa.String(length=500), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notifications_id'), 'notifications', ['id'], unique=False)
+
+    op.create_table('patients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('first_name', sa.String(), nullable=False),
+    sa.Column('last_name', sa.String(), nullable=False),
+    sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('medical_history', sa.String(), nullable=True),
+    sa.Column('allergies', sa.String(), nullable=True),
+    sa.Column('current_medications', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_patients_id'), 'patients', ['id'], unique=False)
+    op.create_index(op.f('ix_patients_patient_id'), 'patients', ['patient_id'], unique=True)
+
+    op.create_table('consultations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('consultation_date', sa.DateTime(), nullable=True),
+    sa.Column('chief_complaint', sa.String(), nullable=False),
+    sa.Column('symptoms', sa.JSON(), nullable=True),
+    sa.Column('vital_signs', sa.JSON(), nullable=True),
+    sa.Column('diagnosis', sa.Text(), nullable=True),
+    sa.Column('ai_diagnosis', sa.JSON(), nullable=True),
+    sa.Column('treatment_plan', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_consultations_id'), 'consultations', ['id'], unique=False)
+
+    op.create_table('medical_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('condition', sa.String(), nullable=False),
+    sa.Column('diagnosed_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_medical_history_id'), 'medical_history', ['id'], unique=False)
+
+    op.create_table('medical_images',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('original_filename', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=True),
+    sa.Column('mime_type', sa.String(), nullable=True),
+    sa.Column('image_type', sa.Enum('XRAY', 'CT', 'MRI', 'RETINAL', 'ULTRASOUND', 'OTHER', name='imagetype'), nullable=False),
+    sa.Column('modality', sa.String(), nullable=True),
+    sa.Column('body_part', sa.String(), nullable=True),
+    sa.Column('analysis_status', sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', name='analysisstatus'), nullable=True),
+    sa.Column('analysis_result', sa.String(), nullable=True),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('analyzed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_medical_images_id'), 'medical_images', ['id'], unique=False)
+
+    op.create_table('analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('image_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('findings', sa.JSON(), nullable=True),
+    sa.Column('recommendations', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['image_id'], ['medical_images.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analyses_id'), 'analyses', ['id'], unique=False)
+
+    op.create_table('comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('consultation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_comments_id'), 'comments', ['id'], unique=False)
+
+    op.create_table('consultation_shares',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('consultation_id', sa.Integer(), nullable=False),
+    sa.Column('shared_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('shared_with_user_id', sa.Integer(), nullable=False),
+    sa.Column('permission', sa.Enum('READ', 'WRITE', name='sharepermission'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['shared_by_user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['shared_with_user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_consultation_shares_id'), 'consultation_shares', ['id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_consultation_shares_id'), table_name='consultation_shares')
+
+    op.drop_table('consultation_shares')
+    op.drop_index(op.f('ix_comments_id'), table_name='comments')
+
+    op.drop_table('comments')
+    op.drop_index(op.f('ix_analyses_id'), table_name='analyses')
+
+    op.drop_table('analyses')
+    op.drop_index(op.f('ix_medical_images_id'), table_name='medical_images')
+
+    op.drop_table('medical_images')
+    op.drop_index(op.f('ix_medical_history_id'), table_name='medical_history')
+
+    op.drop_table('medical_history')
+    op.drop_index(op.f('ix_consultations_id'), table_name='consultations')
+
+    op.drop_table('consultations')
+    op.drop_index(op.f('ix_patients_patient_id'), table_name='patients')
+    op.drop_index(op.f('ix_patients_id'), table_name='patients')
+
+    op.drop_table('patients')
+    op.drop_index(op.f('ix_notifications_id'), table_name='notifications')
+
+    op.drop_table('notifications')
+    op.drop_index(op.f('ix_audit_logs_id'), table_name='audit_logs')
+
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+
+    op.drop_table('users')
+
+    if op.get_context().dialect.name == "postgresql":
+        for name in ENUM_TYPES:
+            op.execute(f"DROP TYPE IF EXISTS {name}")
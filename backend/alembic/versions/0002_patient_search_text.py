@@ -0,0 +1,73 @@
+"""patient search text
+
+Normalized search document on patients with a trigram index (pg_trgm on
+PostgreSQL). Existing rows are filled in when the upgrade runs against the
+database; with --sql they are left empty until each patient is next saved.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.core.text import normalize_text
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+BATCH = 1000
+
+
+def _backfill_search_text():
+    bind = op.get_bind()
+    patients = sa.table(
+        'patients',
+        sa.column('id', sa.Integer()),
+        sa.column('patient_id', sa.String()),
+        sa.column('first_name', sa.String()),
+        sa.column('last_name', sa.String()),
+        sa.column('search_text', sa.String()),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(patients.c.id, patients.c.first_name, patients.c.last_name, patients.c.patient_id)
+            .where(patients.c.id > last_id)
+            .order_by(patients.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            patients.update().where(patients.c.id == sa.bindparam('row_id')),
+            [
+                {
+                    'row_id': row.id,
+                    'search_text': normalize_text(f"{row.first_name or ''} {row.last_name or ''} {row.patient_id or ''}"),
+                }
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    if op.get_context().dialect.name == "postgresql":
+        # gin_trgm_ops index on patients.search_text
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('patients', sa.Column('search_text', sa.String(), nullable=True))
+    if not context.is_offline_mode():
+        _backfill_search_text()
+    op.create_index('ix_patients_search_text_trgm', 'patients', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_patients_search_text_trgm', table_name='patients', postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    op.drop_column('patients', 'search_text')
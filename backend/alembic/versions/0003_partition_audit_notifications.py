@@ -0,0 +1,129 @@
+"""partition audit logs and notifications
+
+Composite indexes for the audit log and notification queries. On
+PostgreSQL both tables become PARTITION BY RANGE (created_at): each is
+rebuilt as a partitioned table and its rows copied over, with a default
+partition and monthly partitions from its oldest row up to
+PARTITION_MONTHS_AHEAD months ahead (only the default and upcoming ones
+with --sql). The copy locks the tables: run it in a maintenance window on
+large databases.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from datetime import date
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.core.partitioning import ensure_default_partition, ensure_monthly_partitions, month_start
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _audit_log_columns():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('changes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+def _notification_columns():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('link', sa.String(length=500), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+TABLES = {
+    'audit_logs': _audit_log_columns,
+    'notifications': _notification_columns,
+}
+
+
+def _create_partitions(table_name, source):
+    """Default partition, then monthly ones covering the rows of `source`"""
+    ensure_default_partition(op, table_name)
+    today = date.today()
+    oldest = None
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text(f'SELECT min(created_at) FROM "{source}"')).scalar()
+    start = month_start(oldest.date()) if oldest is not None else month_start(today)
+    months = (today.year - start.year) * 12 + today.month - start.month
+    ensure_monthly_partitions(op, table_name, months + settings.PARTITION_MONTHS_AHEAD, today=start)
+
+
+def _rebuild(table_name, partitioned):
+    """
+    Recreate `table_name` (partitioned or not) and move its rows over
+
+    The old table, its primary key, id index and sequence are renamed out
+    of the way first so the new ones get the usual names.
+    """
+    old = f"{table_name}_old"
+    op.execute(f'ALTER TABLE "{table_name}" RENAME TO "{old}"')
+    op.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{table_name}_pkey" TO "{old}_pkey"')
+    op.execute(f'ALTER INDEX IF EXISTS "ix_{table_name}_id" RENAME TO "ix_{old}_id"')
+    op.execute(f'ALTER SEQUENCE IF EXISTS "{table_name}_id_seq" RENAME TO "{old}_id_seq"')
+
+    columns = TABLES[table_name]()
+    if partitioned:
+        op.create_table(
+            table_name, *columns,
+            info={'partition_key': 'created_at'},
+            postgresql_partition_by='RANGE (created_at)'
+        )
+        _create_partitions(table_name, old)
+    else:
+        op.create_table(table_name, *columns)
+    op.create_index(f'ix_{table_name}_id', table_name, ['id'], unique=False)
+
+    names = ", ".join(f'"{c.name}"' for c in columns if isinstance(c, sa.Column))
+    op.execute(f'INSERT INTO "{table_name}" ({names}) SELECT {names} FROM "{old}"')
+    op.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+        f'COALESCE((SELECT max(id) FROM "{table_name}"), 0) + 1, false)'
+    )
+    op.drop_table(old)
+
+
+def upgrade():
+    if op.get_context().dialect.name == "postgresql":
+        for table_name in TABLES:
+            _rebuild(table_name, partitioned=True)
+
+    op.create_index('ix_audit_logs_entity_created', 'audit_logs', ['entity_type', 'entity_id', 'created_at'], unique=False)
+    op.create_index('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
+    op.drop_index('ix_audit_logs_user_created', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_entity_created', table_name='audit_logs')
+
+    if op.get_context().dialect.name == "postgresql":
+        for table_name in TABLES:
+            _rebuild(table_name, partitioned=False)
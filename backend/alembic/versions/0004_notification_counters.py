@@ -0,0 +1,44 @@
+"""notification counters
+
+Materialized per-user unread counts, seeded from the existing
+notifications.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    counters = op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    notifications = sa.table(
+        'notifications',
+        sa.column('user_id', sa.Integer()),
+        sa.column('is_read', sa.Boolean()),
+    )
+    op.execute(counters.insert().from_select(
+        ['user_id', 'unread_count', 'updated_at'],
+        sa.select(notifications.c.user_id, sa.func.count(), sa.func.current_timestamp())
+        .where(notifications.c.is_read == sa.false())
+        .group_by(notifications.c.user_id)
+    ))
+
+
+def downgrade():
+    op.drop_table('notification_counters')
@@ -0,0 +1,38 @@
+"""notification coalescing
+
+Event count and last update time on notifications, so bursts of events
+merge into one unread row, and the indexes used to find that row and to
+build digests. Existing rows count one event, updated when created.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('notifications', sa.Column('count', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('notifications', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE notifications SET updated_at = created_at")
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index('ix_notifications_unread_coalesce', 'notifications', ['user_id', 'type', 'link'], unique=False, postgresql_where=sa.text('NOT is_read'))
+    op.create_index('ix_notifications_unread_updated', 'notifications', ['updated_at'], unique=False, postgresql_where=sa.text('NOT is_read'))
+
+
+def downgrade():
+    op.drop_index('ix_notifications_unread_updated', table_name='notifications', postgresql_where=sa.text('NOT is_read'))
+    op.drop_index('ix_notifications_unread_coalesce', table_name='notifications', postgresql_where=sa.text('NOT is_read'))
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('count')
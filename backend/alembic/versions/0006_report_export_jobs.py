@@ -0,0 +1,41 @@
+"""report export jobs
+
+Background exports of many consultation reports into one ZIP.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:25:16.197534
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_export_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('filters', sa.JSON(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('object_name', sa.String(length=500), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_export_jobs_user_created', 'report_export_jobs', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_export_jobs_user_created', table_name='report_export_jobs')
+    op.drop_table('report_export_jobs')
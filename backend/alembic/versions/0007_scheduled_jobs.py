@@ -0,0 +1,32 @@
+"""scheduled jobs
+
+Last run of each periodic job, so that with several workers a job runs
+once per interval, and last successful run (the notification digest
+resumes from it).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:20:41.583902
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduled_jobs',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(), nullable=False),
+    sa.Column('last_success_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduled_jobs')
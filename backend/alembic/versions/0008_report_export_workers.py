@@ -0,0 +1,29 @@
+"""report export workers
+
+Host and PID of the worker running each export job, so that a worker
+starting on the same host can fail the jobs of a process that died.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:02:37.418265
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('report_export_jobs', sa.Column('worker_host', sa.String(length=255), nullable=True))
+    op.add_column('report_export_jobs', sa.Column('worker_pid', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('report_export_jobs') as batch_op:
+        batch_op.drop_column('worker_pid')
+        batch_op.drop_column('worker_host')
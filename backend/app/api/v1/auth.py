@@ -2,20 +2,21 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Optional
 from app.core.database import get_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    password_hasher,
     create_access_token,
-    create_refresh_token,
-    decode_token
+    create_refresh_token
 )
-from app.models.user import User
+from app.core.tokens import revocation_list, validate_token
+from app.models.user import User, UserRole
 from app.schemas.user import (
     UserCreate,
     UserResponse,
     Token,
     LoginRequest,
+    LogoutRequest,
     RefreshTokenRequest
 )
 
@@ -33,19 +34,23 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_token(token)
-    if payload is None:
+    user = get_user_from_token(token, db)
+    if user is None:
         raise credentials_exception
     
+    return user
+
+def get_user_from_token(token: str, db: Session, token_type: str = "access") -> Optional[User]:
+    """Resolve the user of an access token (or stream ticket), None if invalid or revoked"""
+    payload = validate_token(token, token_type)
+    if payload is None:
+        return None
+    
     email: str = payload.get("sub")
     if email is None:
-        raise credentials_exception
+        return None
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
+    return db.query(User).filter(User.email == email).first()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -67,7 +72,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         # Create new user
         db_user = User(
             email=user_data.email,
-            hashed_password=get_password_hash(user_data.password),
+            hashed_password=await password_hasher.hash(user_data.password),
             full_name=user_data.full_name,
             role=user_data.role,
             phone=user_data.phone,
@@ -100,7 +105,10 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """Login user and return JWT tokens"""
     # Find user
     user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -113,8 +121,10 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
-    # Update last login
+    # Update last login, upgrading the hash if the Argon2 parameters changed
     user.last_login = datetime.utcnow()
+    if new_hash:
+        user.hashed_password = new_hash
     db.commit()
     
     # Create tokens
@@ -130,7 +140,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 @router.post("/refresh", response_model=Token)
 async def refresh_token(refresh_data: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Refresh access token using refresh token"""
-    payload = decode_token(refresh_data.refresh_token)
+    payload = validate_token(refresh_data.refresh_token, token_type="refresh")
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -145,6 +155,10 @@ async def refresh_token(refresh_data: RefreshTokenRequest, db: Session = Depends
             detail="User not found or inactive"
         )
     
+    # Rotate: the presented refresh token cannot be used again
+    if payload.get("jti"):
+        revocation_list.revoke(payload["jti"], payload["exp"])
+    
     # Create new tokens
     access_token = create_access_token(data={"sub": user.email, "user_id": user.id})
     new_refresh_token = create_refresh_token(data={"sub": user.email, "user_id": user.id})
@@ -155,6 +169,44 @@ async def refresh_token(refresh_data: RefreshTokenRequest, db: Session = Depends
         "token_type": "bearer"
     }
 
+@router.post("/logout")
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme)
+):
+    """Revoke the current access token and, if given, its refresh token"""
+    payload = validate_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if payload.get("jti"):
+        revocation_list.revoke(payload["jti"], payload["exp"])
+    if logout_data and logout_data.refresh_token:
+        refresh_payload = validate_token(logout_data.refresh_token, token_type="refresh")
+        if refresh_payload and refresh_payload.get("jti") and refresh_payload.get("user_id") == payload.get("user_id"):
+            revocation_list.revoke(refresh_payload["jti"], refresh_payload["exp"])
+    
+    return {"message": "Logged out successfully"}
+
+@router.post("/revoke/{user_id}")
+async def revoke_user_tokens(
+    user_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Revoke every token issued so far to a user (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    revocation_list.revoke_user(user_id)
+    return {"message": f"Tokens of user {user_id} revoked"}
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
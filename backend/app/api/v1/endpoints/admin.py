@@ -0,0 +1,49 @@
+"""
+Administration endpoints (admin only)
+"""
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import profile_worker
+from app.models.user import User, UserRole
+from app.api.v1.auth import get_current_user
+
+router = APIRouter()
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000),
+    include_idle: bool = False,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Sample the worker serving this call for `seconds` and return its
+    collapsed stacks (flamegraph.pl, speedscope, inferno). Under gunicorn
+    only one worker is profiled: the X-Profile-Worker header gives its pid.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler disabled")
+    try:
+        profiler = await profile_worker(seconds, interval_ms / 1000, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{profiler.headers()['X-Profile-Worker']}.collapsed"
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={**profiler.headers(), "Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
+import time
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.metrics import ANALYSIS_JOB_SECONDS, ANALYSIS_JOBS_QUEUED
 from app.api.v1.auth import get_current_user
 from app.models.user import User
 from app.models.medical import MedicalImage
@@ -36,6 +38,8 @@ class AnalysisCreate(BaseModel):
 # Background task for analysis
 async def perform_analysis(analysis_id: int, image_type: str, body_part: str, db: Session):
     """Background task to perform AI analysis"""
+    started = time.perf_counter()
+    outcome = "failed"
     try:
         # Update status to processing
         analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
@@ -61,6 +65,7 @@ async def perform_analysis(analysis_id: int, image_type: str, body_part: str, db
                 image.analysis_status = "completed"
                 image.analyzed_at = datetime.utcnow()
                 db.commit()
+        outcome = "completed"
                 
     except Exception as e:
         # Mark as failed
@@ -68,6 +73,9 @@ async def perform_analysis(analysis_id: int, image_type: str, body_part: str, db
             analysis.status = "failed"
             analysis.recommendations = f"Erreur d'analyse: {str(e)}"
             db.commit()
+    finally:
+        ANALYSIS_JOBS_QUEUED.dec()
+        ANALYSIS_JOB_SECONDS.labels(outcome).observe(time.perf_counter() - started)
 
 
 @router.post("/start/{image_id}", response_model=AnalysisResponse)
@@ -114,6 +122,7 @@ async def start_analysis(
         image.body_part,
         db
     )
+    ANALYSIS_JOBS_QUEUED.inc()
     
     return analysis
 
@@ -121,7 +130,7 @@ async def start_analysis(
 @router.get("/{analysis_id}", response_model=AnalysisResponse)
 def get_analysis(
     analysis_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get analysis by ID"""
@@ -140,7 +149,7 @@ def get_analysis(
 @router.get("/image/{image_id}", response_model=List[AnalysisResponse])
 def get_image_analyses(
     image_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all analyses for an image"""
@@ -3,19 +3,39 @@ Collaboration API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.models.user import User
 from app.models.collaboration import SharePermission
 from app.api.v1.auth import get_current_user
 from app.services.collaboration_service import collaboration_service
+from app.services.archive_service import archive_service
 
 router = APIRouter()
 
 
+def _display_name(user: User | None, default: str | None = "Unknown") -> str | None:
+    """Return the user's full name, falling back to email"""
+    if not user:
+        return default
+    return user.full_name or user.email
+
+
+def _user_summary(user: User | None) -> dict | None:
+    """Serialize the public fields of a user"""
+    if not user:
+        return None
+    return {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name
+    }
+
+
 # Schemas
 
 class ShareRequest(BaseModel):
@@ -107,15 +127,11 @@ async def share_consultation(
         permission=share_request.permission
     )
     
-    # Get shared user name
-    from app.models.user import User as UserModel
-    shared_user = db.query(UserModel).filter(UserModel.id == share.shared_with_user_id).first()
-    
     return ShareResponse(
         id=share.id,
         consultation_id=share.consultation_id,
         shared_with_user_id=share.shared_with_user_id,
-        shared_with_name=shared_user.full_name or shared_user.email if shared_user else "Unknown",
+        shared_with_name=_display_name(share.shared_with),
         permission=share.permission,
         created_at=share.created_at
     )
@@ -125,7 +141,7 @@ async def share_consultation(
 async def get_consultation_shares(
     consultation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all shares for a consultation"""
     # Check access
@@ -139,18 +155,16 @@ async def get_consultation_shares(
             detail="You don't have access to this consultation"
         )
     
+    # Recipients are eager-loaded by the service, no per-row user lookup
     shares = collaboration_service.get_consultation_shares(db, consultation_id)
     
-    # Enrich with user names
-    from app.models.user import User as UserModel
     result = []
     for share in shares:
-        shared_user = db.query(UserModel).filter(UserModel.id == share.shared_with_user_id).first()
         result.append(ShareResponse(
             id=share.id,
             consultation_id=share.consultation_id,
             shared_with_user_id=share.shared_with_user_id,
-            shared_with_name=shared_user.full_name or shared_user.email if shared_user else "Unknown",
+            shared_with_name=_display_name(share.shared_with),
             permission=share.permission,
             created_at=share.created_at
         ))
@@ -192,23 +206,14 @@ async def revoke_share(
 @router.get("/shared-with-me")
 async def get_shared_consultations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all consultations shared with the current user"""
-    from app.models.collaboration import ConsultationShare
-    from app.models.user import User as UserModel
-    
-    # Get all shares where current user is the recipient
-    shares = db.query(ConsultationShare).filter(
-        ConsultationShare.shared_with_user_id == current_user.id
-    ).all()
+    # Get all shares where current user is the recipient (users eager-loaded)
+    shares = collaboration_service.get_shares_for_user(db, current_user.id)
     
-    # Enrich with user information
     result = []
     for share in shares:
-        shared_by_user = db.query(UserModel).filter(UserModel.id == share.shared_by_user_id).first()
-        shared_with_user = db.query(UserModel).filter(UserModel.id == share.shared_with_user_id).first()
-        
         result.append({
             "id": share.id,
             "consultation_id": share.consultation_id,
@@ -216,16 +221,8 @@ async def get_shared_consultations(
             "shared_with_id": share.shared_with_user_id,
             "permission": share.permission.value,
             "created_at": share.created_at.isoformat(),
-            "shared_by": {
-                "id": shared_by_user.id,
-                "email": shared_by_user.email,
-                "full_name": shared_by_user.full_name
-            } if shared_by_user else None,
-            "shared_with": {
-                "id": shared_with_user.id,
-                "email": shared_with_user.email,
-                "full_name": shared_with_user.full_name
-            } if shared_with_user else None
+            "shared_by": _user_summary(share.shared_by),
+            "shared_with": _user_summary(share.shared_with)
         })
     
     return result
@@ -275,7 +272,7 @@ async def add_comment(
 async def get_comments(
     consultation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all comments for a consultation"""
     # Check access
@@ -289,18 +286,16 @@ async def get_comments(
             detail="You don't have access to this consultation"
         )
     
+    # Authors are eager-loaded by the service, no per-row user lookup
     comments = collaboration_service.get_comments(db, consultation_id)
     
-    # Enrich with user names
-    from app.models.user import User as UserModel
     result = []
     for comment in comments:
-        user = db.query(UserModel).filter(UserModel.id == comment.user_id).first()
         result.append(CommentResponse(
             id=comment.id,
             consultation_id=comment.consultation_id,
             user_id=comment.user_id,
-            user_name=user.full_name or user.email if user else "Unknown",
+            user_name=_display_name(comment.user),
             content=comment.content,
             created_at=comment.created_at,
             updated_at=comment.updated_at
@@ -333,16 +328,21 @@ async def delete_comment(
 async def get_audit_logs(
     entity_type: str | None = None,
     entity_id: int | None = None,
+    since: datetime | None = None,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get audit logs (admin or own actions)
     
+    Recent actions may be missing for a few seconds: entries are written
+    in batches and read from a replica.
+    
     Args:
         entity_type: Filter by entity type
         entity_id: Filter by entity ID
+        since: Only logs created at or after this time
         limit: Maximum number of logs
         current_user: Current authenticated user
         db: Database session
@@ -358,6 +358,7 @@ async def get_audit_logs(
             entity_type=entity_type,
             entity_id=entity_id,
             user_id=current_user.id,
+            since=since,
             limit=limit
         )
     else:
@@ -365,23 +366,81 @@ async def get_audit_logs(
             db=db,
             entity_type=entity_type,
             entity_id=entity_id,
+            since=since,
             limit=limit
         )
     
-    # Enrich with user names
-    from app.models.user import User as UserModel
+    # Users are eager-loaded by the service, no per-row user lookup
     result = []
     for log in logs:
-        user = db.query(UserModel).filter(UserModel.id == log.user_id).first() if log.user_id else None
         result.append(AuditLogResponse(
             id=log.id,
             entity_type=log.entity_type,
             entity_id=log.entity_id,
             user_id=log.user_id,
-            user_name=user.full_name or user.email if user else None,
+            user_name=_display_name(log.user, default=None),
             action=log.action,
             changes=log.changes,
             created_at=log.created_at
         ))
     
     return result
+
+
+@router.get("/audit-logs/archive", response_model=List[AuditLogResponse])
+async def get_archived_audit_logs(
+    year: int,
+    month: int,
+    entity_type: str | None = None,
+    entity_id: int | None = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get audit logs from an archived month (admin or own actions)
+    
+    Args:
+        year: Archive year
+        month: Archive month (1-12)
+        entity_type: Filter by entity type
+        entity_id: Filter by entity ID
+        limit: Maximum number of logs
+        current_user: Current authenticated user
+        
+    Returns:
+        List of archived audit logs
+    """
+    if not 1 <= month <= 12:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Month must be between 1 and 12"
+        )
+    
+    from app.models.user import UserRole
+    filters = {"entity_type": entity_type, "entity_id": entity_id}
+    if current_user.role != UserRole.ADMIN:
+        filters["user_id"] = current_user.id
+    
+    try:
+        rows = await run_in_threadpool(
+            archive_service.query_archive, "audit_logs", year, month, filters=filters, limit=limit
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archive not found"
+        )
+    
+    return [
+        AuditLogResponse(
+            id=row["id"],
+            entity_type=row["entity_type"],
+            entity_id=row["entity_id"],
+            user_id=row["user_id"],
+            user_name=None,
+            action=row["action"],
+            changes=row["changes"],
+            created_at=row["created_at"]
+        )
+        for row in rows
+    ]
@@ -4,7 +4,7 @@ from typing import List
 from datetime import datetime, date
 from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.api.v1.auth import get_current_user
 from app.models.user import User
 from app.models.medical import Patient
@@ -109,7 +109,7 @@ def create_consultation(
 @router.get("/consultations/patient/{patient_id}", response_model=List[ConsultationResponse])
 def get_patient_consultations(
     patient_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all consultations for a patient"""
@@ -124,7 +124,7 @@ def get_patient_consultations(
 @router.get("/consultations/{consultation_id}", response_model=ConsultationResponse)
 def get_consultation(
     consultation_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get consultation by ID"""
@@ -202,7 +202,7 @@ def create_medical_history(
 @router.get("/medical-history/patient/{patient_id}", response_model=List[MedicalHistoryResponse])
 def get_patient_medical_history(
     patient_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get medical history for a patient"""
@@ -1,19 +1,73 @@
 """
 Notification API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db, get_read_db
+from app.core.security import create_stream_ticket
 from app.models.user import User
-from app.api.v1.auth import get_current_user
+from app.models.notification import Notification
+from app.api.v1.auth import get_current_user, get_user_from_token
 from app.services.notification_service import notification_service
+from app.services.notification_stream import (
+    RESYNC,
+    event_id,
+    format_sse,
+    notification_broker,
+    parse_event_id,
+    serialize_notification,
+)
 
 router = APIRouter()
 
+# Replay also covers rows stamped just before the last event the client
+# got but committed after it (the client merges duplicates by id)
+REPLAY_OVERLAP = timedelta(seconds=5)
+
+
+def _stream_user(db: Session, authorization: str, ticket: str | None) -> User | None:
+    """User of a stream request: bearer access token, else stream ticket"""
+    if authorization.lower().startswith("bearer "):
+        return get_user_from_token(authorization[7:], db)
+    return get_user_from_token(ticket, db, token_type="stream") if ticket else None
+
+
+def _stream_backlog(db: Session, user_id: int, last_event_id: str | None) -> List[dict]:
+    """Events replayed when a stream opens, ending with the unread count"""
+    backlog = []
+    if last_event_id is not None:
+        since = parse_event_id(last_event_id)
+        missed = []
+        if since is not None:
+            missed = db.query(Notification).filter(
+                Notification.user_id == user_id,
+                Notification.updated_at > since - REPLAY_OVERLAP
+            ).order_by(
+                Notification.updated_at.asc(), Notification.id.asc()
+            ).limit(settings.NOTIFICATION_REPLAY_LIMIT + 1).all()
+        if since is None or len(missed) > settings.NOTIFICATION_REPLAY_LIMIT:
+            backlog = [{"event": "resync", "data": {}}]
+        else:
+            backlog = [
+                {
+                    "event": "notification" if n.created_at > since else "notification_update",
+                    "id": event_id(n),
+                    "data": serialize_notification(n)
+                }
+                for n in missed
+            ]
+    unread = notification_service.get_unread_count(db=db, user_id=user_id)
+    backlog.append({"event": "unread_count", "data": {"count": unread}})
+    return backlog
+
 
 # Schemas
 class NotificationResponse(BaseModel):
@@ -23,7 +77,9 @@ class NotificationResponse(BaseModel):
     message: str
     link: str | None
     is_read: bool
+    count: int = 1
     created_at: datetime
+    updated_at: datetime | None = None
     
     class Config:
         from_attributes = True
@@ -33,12 +89,17 @@ class UnreadCountResponse(BaseModel):
     count: int
 
 
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
+
+
 @router.get("/", response_model=List[NotificationResponse])
 async def get_notifications(
     unread_only: bool = False,
     limit: int = 50,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get notifications for current user
@@ -65,7 +126,7 @@ async def get_notifications(
 @router.get("/unread-count", response_model=UnreadCountResponse)
 async def get_unread_count(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get count of unread notifications
@@ -85,6 +146,111 @@ async def get_unread_count(
     return {"count": count}
 
 
+@router.post("/stream-ticket", response_model=StreamTicketResponse)
+async def create_notification_stream_ticket(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Issue a short-lived ticket that opens the notification stream
+    
+    EventSource cannot send headers and query strings end up in access
+    logs, so the browser passes this ticket instead of its access token.
+    
+    Args:
+        current_user: Current authenticated user
+        
+    Returns:
+        Ticket and its lifetime in seconds
+    """
+    ticket = create_stream_ticket(data={"sub": current_user.email, "user_id": current_user.id})
+    return {"ticket": ticket, "expires_in": settings.NOTIFICATION_STREAM_TICKET_SECONDS}
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    ticket: str | None = None,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+    resume_from: str | None = Query(None, alias="last_event_id")
+):
+    """
+    Server-Sent Events stream of new notifications and unread-count deltas
+    
+    Browsers authenticate with `?ticket=` (see /stream-ticket), other
+    clients may send their bearer token. On reconnect the browser sends
+    Last-Event-ID (or `?last_event_id=` when it opens a new stream with a
+    fresh ticket) and the notifications created or updated since are
+    replayed from the database.
+    
+    Events:
+        notification: a new notification (event id = updated_at and id)
+        notification_update: a notification that absorbed another event
+        unread_count: {"count": n} on connect, then {"delta": +/-n}
+        resync: too much (or an unknown position) to replay, reload the list
+    
+    The database is only used while the stream opens: the session is
+    closed before streaming, so a connection is not held for its lifetime.
+    """
+    db = SessionLocal()
+    try:
+        user = await run_in_threadpool(
+            _stream_user, db, request.headers.get("authorization", ""), ticket
+        )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user_id = user.id
+        
+        # Subscribe before reading the backlog so nothing falls in between
+        queue = notification_broker.subscribe(user_id)
+        try:
+            backlog = await run_in_threadpool(_stream_backlog, db, user_id, last_event_id or resume_from)
+        except BaseException:
+            notification_broker.unsubscribe(user_id, queue)
+            raise
+    finally:
+        await run_in_threadpool(db.close)
+    replayed = {event["id"] for event in backlog if event.get("id") is not None}
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield format_sse(event)
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.NOTIFICATION_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                
+                if event is RESYNC:
+                    break
+                # Already sent by the replay
+                if event.get("id") in replayed:
+                    continue
+                yield format_sse(event)
+        finally:
+            notification_broker.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.patch("/{notification_id}/read")
 async def mark_notification_as_read(
     notification_id: int,
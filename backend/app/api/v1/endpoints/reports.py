@@ -2,23 +2,60 @@
 Endpoints pour la génération de rapports PDF
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
+from typing import List
+from pydantic import BaseModel
+from datetime import date, datetime
 
-from app.core.database import get_db
-from app.models.user import User
+from app.core.database import get_db, get_read_db
+from app.models.user import User, UserRole
 from app.api.v1.auth import get_current_user
-from app.services.pdf_service import pdf_service
+from app.services.report_cache_service import report_cache_service
+from app.services.report_export_service import report_export_service
 
 router = APIRouter()
 
 
+# Schemas
+class ReportExportRequest(BaseModel):
+    doctor_id: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    patient_ids: List[int] | None = None
+
+
+class ReportExportResponse(BaseModel):
+    id: str
+    status: str
+    total: int
+    completed: int
+    progress: float
+    size: int | None = None
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+def _export_response(job) -> ReportExportResponse:
+    return ReportExportResponse(
+        id=job.id,
+        status=job.status,
+        total=job.total,
+        completed=job.completed,
+        progress=round(job.completed / job.total, 3) if job.total else 0.0,
+        size=job.size,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+
 @router.get("/consultation/{consultation_id}/pdf")
 async def download_consultation_report(
     consultation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Télécharger le rapport PDF d'une consultation
@@ -32,21 +69,23 @@ async def download_consultation_report(
         PDF file stream
     """
     try:
-        # Générer le PDF
-        pdf_buffer = pdf_service.generate_consultation_report(db, consultation_id)
+        # Générer le PDF (ou le reprendre du cache s'il est à jour)
+        pdf = await report_cache_service.get_consultation_report(db, consultation_id)
         
         # Nom du fichier
         filename = f"Rapport_Consultation_{consultation_id}_{datetime.now().strftime('%Y%m%d')}.pdf"
         
         # Retourner le PDF
-        return StreamingResponse(
-            pdf_buffer,
+        return Response(
+            content=pdf,
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,7 +102,7 @@ async def download_consultation_report(
 async def download_patient_report(
     patient_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Télécharger le rapport PDF complet d'un patient (historique)
@@ -77,21 +116,23 @@ async def download_patient_report(
         PDF file stream
     """
     try:
-        # Générer le PDF
-        pdf_buffer = pdf_service.generate_patient_report(db, patient_id)
+        # Générer le PDF (ou le reprendre du cache s'il est à jour)
+        chunks = await report_cache_service.open_patient_report(db, patient_id)
         
         # Nom du fichier
         filename = f"Dossier_Patient_{patient_id}_{datetime.now().strftime('%Y%m%d')}.pdf"
         
         # Retourner le PDF
         return StreamingResponse(
-            pdf_buffer,
+            chunks,
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -102,3 +143,111 @@ async def download_patient_report(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la génération du rapport: {str(e)}"
         )
+
+
+@router.post("/exports", response_model=ReportExportResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_export(
+    request: ReportExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Lancer l'export groupé des rapports de consultation (archive ZIP)
+    
+    Les médecins n'exportent que leurs propres consultations ; un
+    administrateur peut choisir le médecin ou tout exporter.
+    
+    Args:
+        request: Filtres (médecin, période, patients)
+        current_user: Utilisateur authentifié
+        db: Session de base de données
+        
+    Returns:
+        La tâche d'export et sa progression
+    """
+    doctor_id = request.doctor_id
+    if current_user.role != UserRole.ADMIN:
+        if doctor_id is not None and doctor_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous ne pouvez exporter que vos propres consultations"
+            )
+        doctor_id = current_user.id
+    if request.date_from and request.date_to and request.date_from > request.date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de début doit précéder la date de fin"
+        )
+    
+    filters = {
+        "doctor_id": doctor_id,
+        "date_from": request.date_from.isoformat() if request.date_from else None,
+        "date_to": request.date_to.isoformat() if request.date_to else None,
+        "patient_ids": request.patient_ids,
+    }
+    try:
+        job = report_export_service.create_job(db, current_user.id, filters)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return _export_response(job)
+
+
+@router.get("/exports/{job_id}", response_model=ReportExportResponse)
+async def get_report_export(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Suivre la progression d'un export groupé
+    """
+    job = report_export_service.get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export non trouvé"
+        )
+    return _export_response(job)
+
+
+@router.get("/exports/{job_id}/download")
+async def download_report_export(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Télécharger l'archive ZIP d'un export terminé
+    """
+    job = report_export_service.get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export non trouvé"
+        )
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export non terminé ({job.completed}/{job.total})"
+        )
+    
+    try:
+        chunks = report_export_service.open_download(job)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Archive indisponible: {str(e)}"
+        )
+    
+    filename = f"Rapports_{job.created_at.strftime('%Y%m%d')}_{job.id[:8]}.zip"
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={
+            "Content-Length": str(job.size),
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
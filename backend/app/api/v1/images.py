@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.models.user import User
 from app.models.medical import MedicalImage, ImageType, AnalysisStatus
 from app.schemas.medical import MedicalImageResponse, MedicalImageCreate
@@ -105,7 +105,7 @@ async def list_medical_images(
     limit: int = 100,
     image_type: Optional[ImageType] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """List user's medical images"""
     query = db.query(MedicalImage).filter(MedicalImage.user_id == current_user.id)
@@ -120,7 +120,7 @@ async def list_medical_images(
 async def get_medical_image(
     image_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific medical image"""
     image = db.query(MedicalImage).filter(
@@ -137,7 +137,7 @@ async def get_medical_image(
 async def download_medical_image(
     image_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get download URL for medical image"""
     image = db.query(MedicalImage).filter(
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.models.user import User
 from app.models.medical import Patient
-from app.schemas.medical import PatientCreate, PatientUpdate, PatientResponse
+from app.schemas.medical import PatientCreate, PatientUpdate, PatientResponse, PatientSuggestion
 from app.api.v1.auth import get_current_user
+from app.services.patient_search_service import patient_search_service
 
 router = APIRouter()
 
@@ -62,27 +63,30 @@ async def list_patients(
     limit: int = 100,
     search: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """List all patients with optional search"""
-    query = db.query(Patient)
-    
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Patient.first_name.ilike(search_filter)) |
-            (Patient.last_name.ilike(search_filter)) |
-            (Patient.patient_id.ilike(search_filter))
-        )
+    """List all patients with optional search (accent-insensitive, ranked)"""
+    if search and search.strip():
+        return patient_search_service.search(db, search, skip=skip, limit=limit)
     
-    patients = query.order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
+    patients = db.query(Patient).order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
     return patients
 
+@router.get("/typeahead", response_model=List[PatientSuggestion])
+async def typeahead_patients(
+    q: str,
+    limit: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Prefix suggestions for the patient search box"""
+    return patient_search_service.typeahead(db, q, limit=min(limit, 50))
+
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get patient details"""
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
@@ -145,7 +149,7 @@ async def delete_patient(
 async def get_patient_images(
     patient_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all images for a patient"""
     from app.models.medical import MedicalImage
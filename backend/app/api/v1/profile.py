@@ -4,7 +4,7 @@ from app.core.database import get_db
 from app.models.user import User
 from app.schemas.user import UserUpdate, UserResponse
 from app.api.v1.auth import get_current_user
-from app.core.security import get_password_hash, verify_password
+from app.core.security import password_hasher
 
 router = APIRouter()
 
@@ -28,7 +28,7 @@ async def update_profile(
         
         # Handle password update separately
         if 'password' in update_data:
-            current_user.hashed_password = get_password_hash(update_data['password'])
+            current_user.hashed_password = await password_hasher.hash(update_data['password'])
             del update_data['password']
         
         # Update other fields
@@ -42,6 +42,8 @@ async def update_profile(
         print(f"[PROFILE] Profile updated successfully for: {current_user.email}")
         return current_user
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[PROFILE ERROR] {type(e).__name__}: {str(e)}")
         db.rollback()
@@ -60,14 +62,14 @@ async def change_password(
     """Change user password"""
     try:
         # Verify current password
-        if not verify_password(current_password, current_user.hashed_password):
+        if not await password_hasher.verify(current_password, current_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        current_user.hashed_password = get_password_hash(new_password)
+        current_user.hashed_password = await password_hasher.hash(new_password)
         db.commit()
         
         return {"message": "Password changed successfully"}
@@ -1,16 +1,190 @@
-from sqlalchemy import create_engine
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import HTTPConnection
 from app.core.config import settings
+from app.core.redis_client import get_redis
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_flush_write(session, flush_context):
+    """Remember that this session wrote rows (inserts/updates/deletes)"""
+    session.info["has_writes"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flag_bulk_write(orm_execute_state):
+    """Remember bulk query.update()/query.delete() writes, which skip the flush"""
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+def dialect_insert(session, table):
+    """INSERT construct with on_conflict_do_update() for the session's dialect"""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+class ReplicaRouter:
+    """
+    Routes read-only sessions to read replicas
+
+    Replicas are picked round-robin and skipped while their replication lag
+    exceeds `max_lag_seconds` (or the lag check fails). Callers that wrote
+    recently stay on the primary for `sticky_seconds` so they read their
+    own writes: the caller's hashed key is stored in Redis with that TTL,
+    so the next request may land on any worker. Without Redis the keys are
+    kept in a bounded in-process map. With no replicas configured every
+    read goes to the primary.
+    """
+
+    STICKY_PREFIX = "db:sticky:"
+    MAX_LOCAL_STICKY = 10000
+
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag_seconds: float,
+        lag_check_interval: float,
+        sticky_seconds: float
+    ):
+        self.engines = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.replicas = [
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+            for replica_engine in self.engines
+        ]
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.sticky_seconds = sticky_seconds
+        self._lag_cache: Dict[int, Tuple[float, Optional[float]]] = {}
+        # Fallback when Redis is unavailable, in expiry order
+        self._sticky_until: "OrderedDict[str, float]" = OrderedDict()
+        self._sticky_lock = threading.Lock()
+        self._round_robin = itertools.count()
+
+    def _replica_lag(self, index: int) -> Optional[float]:
+        """Replication lag in seconds (cached), None if the replica is unreachable"""
+        now = time.monotonic()
+        cached = self._lag_cache.get(index)
+        if cached and now - cached[0] < self.lag_check_interval:
+            return cached[1]
+
+        try:
+            with self.engines[index].connect() as conn:
+                lag = float(conn.execute(self.LAG_QUERY).scalar() or 0)
+        except Exception as e:
+            print(f"[DB] Replica {index} lag check failed: {e}")
+            lag = None
+
+        self._lag_cache[index] = (now, lag)
+        return lag
+
+    def mark_write(self, key: str):
+        """Pin `key` to the primary for the read-your-writes window"""
+        if not self.replicas or not key:
+            return
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(self.STICKY_PREFIX + key, 1, px=int(self.sticky_seconds * 1000))
+                return
+            except redis.RedisError as e:
+                print(f"[DB] Could not store read-your-writes key in Redis: {e}")
+
+        now = time.monotonic()
+        with self._sticky_lock:
+            self._sticky_until.pop(key, None)
+            self._sticky_until[key] = now + self.sticky_seconds
+            while self._sticky_until:
+                oldest, until = next(iter(self._sticky_until.items()))
+                if until > now and len(self._sticky_until) <= self.MAX_LOCAL_STICKY:
+                    break
+                del self._sticky_until[oldest]
+
+    def is_sticky(self, key: str) -> bool:
+        if not key:
+            return False
+        with self._sticky_lock:
+            if self._sticky_until.get(key, 0) > time.monotonic():
+                return True
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(self.STICKY_PREFIX + key))
+        except redis.RedisError as e:
+            print(f"[DB] Could not read read-your-writes key from Redis: {e}")
+            return False
+
+    def choose(self, key: str = "") -> sessionmaker:
+        """Return the session factory to use for a read"""
+        if not self.replicas or self.is_sticky(key):
+            return SessionLocal
+
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            lag = self._replica_lag(index)
+            if lag is not None and lag <= self.max_lag_seconds:
+                return self.replicas[index]
+
+        # Every replica is lagging or down
+        return SessionLocal
+
+
+replica_router = ReplicaRouter(
+    urls=settings.DATABASE_REPLICA_URLS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    lag_check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS
+)
+
+
+def _sticky_key(connection: HTTPConnection) -> str:
+    """Identify the caller for read-your-writes (hash of the bearer token, else of the client IP)"""
+    caller = connection.headers.get("authorization")
+    if not caller and connection.client:
+        caller = connection.client.host
+    if not caller:
+        return ""
+    return hashlib.sha256(caller.encode()).hexdigest()
+
+
+def get_db(connection: HTTPConnection):
     """Dependency to get database session"""
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        if db.info.get("has_writes"):
+            replica_router.mark_write(_sticky_key(connection))
+        db.close()
+
+
+def get_read_db(connection: HTTPConnection):
+    """Dependency to get a read-only session (replica when one is healthy)"""
+    db = replica_router.choose(_sticky_key(connection))()
     try:
         yield db
     finally:
@@ -0,0 +1,144 @@
+"""
+Cross-process event bus
+
+With several gunicorn workers an event produced in one worker must reach
+clients connected to another. RedisEventBus relays events over Redis
+pub/sub; each process runs a single listener thread and dispatches to its
+local handlers. InMemoryEventBus is the single-process bus.
+
+When Redis is configured the Redis bus is used even if Redis is down: it
+then delivers locally only (degraded, logged and exported as
+meda_event_bus_degraded) and relays again once its listener reconnects.
+"""
+import fnmatch
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+from app.core.metrics import EVENT_BUS_DEGRADED
+from app.core.redis_client import get_redis
+
+Handler = Callable[[str, Dict[str, Any]], None]
+
+
+class InMemoryEventBus:
+    """Delivers events to handlers in the same process"""
+
+    def __init__(self):
+        self._handlers: List[Tuple[str, Handler]] = []
+
+    def subscribe(self, pattern: str, handler: Handler):
+        """Call `handler(channel, message)` for channels matching the glob `pattern`"""
+        self._handlers.append((pattern, handler))
+
+    def _dispatch(self, channel: str, message: Dict[str, Any]):
+        for pattern, handler in list(self._handlers):
+            if fnmatch.fnmatchcase(channel, pattern):
+                try:
+                    handler(channel, message)
+                except Exception as e:
+                    print(f"[EVENT BUS ERROR] Handler for {channel}: {e}")
+
+    def publish(self, channel: str, message: Dict[str, Any]):
+        self._dispatch(channel, message)
+
+
+class RedisEventBus(InMemoryEventBus):
+    """Relays events between processes through Redis pub/sub"""
+
+    def __init__(self, prefix: str = "meda:"):
+        super().__init__()
+        self.prefix = prefix
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._subscribed = threading.Event()
+        self._degraded = False
+
+    @property
+    def degraded(self) -> bool:
+        """True while events published here only reach this process"""
+        return self._degraded
+
+    def _set_subscribed(self, subscribed: bool, error: Optional[Exception] = None):
+        if subscribed:
+            self._subscribed.set()
+        else:
+            self._subscribed.clear()
+        if self._degraded == (not subscribed):
+            return
+        self._degraded = not subscribed
+        EVENT_BUS_DEGRADED.set(1 if self._degraded else 0)
+        if self._degraded:
+            print(f"[EVENT BUS] DEGRADED: Redis unreachable, events only reach this worker's clients: {error}")
+        else:
+            print("[EVENT BUS] Subscribed to Redis, relaying events across workers")
+
+    def subscribe(self, pattern: str, handler: Handler):
+        super().subscribe(pattern, handler)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="event-bus", daemon=True)
+                self._listener.start()
+
+    def publish(self, channel: str, message: Dict[str, Any]):
+        # With local handlers, go through Redis only while the listener would
+        # bring the event back: local clients stay served while Redis is down
+        client = get_redis()
+        if client is not None and (self._subscribed.is_set() or not self._handlers):
+            try:
+                client.publish(self.prefix + channel, json.dumps(message, default=str))
+                return
+            except redis.RedisError as e:
+                print(f"[EVENT BUS] Redis publish failed, delivering locally: {e}")
+        self._dispatch(channel, message)
+
+    def _listen(self):
+        """One pattern subscription per process, reconnecting with backoff"""
+        backoff = 1.0
+        while True:
+            try:
+                # Blocking reads must not time out, so use a dedicated connection
+                pubsub = redis.Redis.from_url(settings.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                self._set_subscribed(True)
+                backoff = 1.0
+                for raw in pubsub.listen():
+                    try:
+                        channel = raw["channel"].decode()[len(self.prefix):]
+                        message = json.loads(raw["data"])
+                    except Exception as e:
+                        # One bad message must not stop the relay for the worker
+                        print(f"[EVENT BUS ERROR] Dropped malformed message on {raw.get('channel')!r}: {e}")
+                        continue
+                    self._dispatch(channel, message)
+            except redis.RedisError as e:
+                self._set_subscribed(False, e)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+_bus: Optional[InMemoryEventBus] = None
+
+
+def get_event_bus() -> InMemoryEventBus:
+    """
+    Return the process-wide bus
+
+    EVENT_BUS_BACKEND: "redis", "memory", or "auto" (Redis when REDIS_URL
+    is set). The Redis bus copes with Redis being down, at startup or
+    later, so the choice is never cached on a failed connection.
+    """
+    global _bus
+    if _bus is None:
+        backend = settings.EVENT_BUS_BACKEND
+        if backend in ("auto", "redis") and settings.REDIS_URL:
+            _bus = RedisEventBus()
+        else:
+            if backend == "redis":
+                print("[EVENT BUS] Redis requested but REDIS_URL is empty, using in-memory bus")
+            _bus = InMemoryEventBus()
+    return _bus
@@ -0,0 +1,89 @@
+"""
+Import-time profile of the application
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+reports the slowest imports, so cold-start regressions (a module that
+connects to a service, a heavy library pulled in at import) are easy to
+spot:
+
+    python -m app.core.import_profile
+    python -m app.core.import_profile --module app.api.v1.endpoints.reports --top 15
+"""
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_imports(module: str = "app.main") -> List[ImportRecord]:
+    """
+    Import `module` in a new interpreter and return one record per import
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    records = []
+    errors = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), len(indent) // 2))
+        elif not line.startswith("import time:"):
+            errors.append(line)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(errors[-20:]))
+    return records
+
+
+def report(records: List[ImportRecord], top: int = 25) -> str:
+    """Text report: total, time per top-level package, slowest modules"""
+    total = sum(r.cumulative_us for r in records if r.depth == 0)
+    by_package: Dict[str, int] = {}
+    for record in records:
+        package = record.module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + record.self_us
+
+    lines = [f"Total import time: {total / 1000:.0f} ms ({len(records)} modules)", ""]
+    lines.append("By top-level package (self time):")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {us / 1000:8.1f} ms  {package}")
+    lines.append("")
+    lines.append("Slowest application modules (cumulative):")
+    app_modules = [r for r in records if r.module.startswith("app.")]
+    for record in sorted(app_modules, key=lambda r: -r.cumulative_us)[:top]:
+        lines.append(f"  {record.cumulative_us / 1000:8.1f} ms  {record.module}")
+    lines.append("")
+    lines.append("Slowest modules (self time):")
+    for record in sorted(records, key=lambda r: -r.self_us)[:top]:
+        lines.append(f"  {record.self_us / 1000:8.1f} ms  {record.module}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the application")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="Entries per section")
+    args = parser.parse_args()
+    print(report(profile_imports(args.module), args.top))
+
+
+if __name__ == "__main__":
+    main()
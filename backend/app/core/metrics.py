@@ -0,0 +1,192 @@
+"""
+Prometheus metrics
+
+Metric objects live at module level; updating one is a few memory writes.
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory (see
+gunicorn.conf.py): each worker then writes its samples to mmap files
+there and /metrics aggregates all workers, whichever one serves the
+scrape. Without it, /metrics reports the serving process only.
+
+MetricsMiddleware records request latency per route template (never the
+raw path, to keep label cardinality bounded) and status. SQL metrics are
+fed by app/core/query_trace.py.
+"""
+import os
+import time
+from functools import wraps
+from typing import Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# HTTP
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "meda_http_request_duration_seconds",
+    "Request latency until the last response byte",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "meda_http_requests_in_progress",
+    "Requests being served",
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "meda_http_request_db_queries",
+    "SQL queries issued per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "meda_http_request_db_seconds",
+    "Time spent in SQL queries per request",
+    ["method", "route"],
+)
+
+# Database
+
+DB_QUERY_SECONDS = Histogram(
+    "meda_db_query_duration_seconds",
+    "SQL statement execution time",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Storage
+
+STORAGE_OPERATION_SECONDS = Histogram(
+    "meda_storage_operation_duration_seconds",
+    "Object storage call latency",
+    ["operation", "outcome"],
+)
+
+# Background work
+
+ANALYSIS_JOBS_QUEUED = Gauge(
+    "meda_analysis_jobs_queued",
+    "Image analyses scheduled or running",
+    multiprocess_mode="livesum",
+)
+ANALYSIS_JOB_SECONDS = Histogram(
+    "meda_analysis_job_duration_seconds",
+    "Image analysis run time",
+    ["status"],
+    buckets=(0.5, 1, 2, 3, 4, 5, 7.5, 10, 20, 60),
+)
+PDF_RENDERS_PENDING = Gauge(
+    "meda_pdf_renders_pending",
+    "PDF renders running or queued in the render pool",
+    multiprocess_mode="livesum",
+)
+PDF_RENDER_SECONDS = Histogram(
+    "meda_pdf_render_duration_seconds",
+    "PDF render time, from submission to result",
+    ["function", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+PDF_RENDERS_REJECTED = Counter(
+    "meda_pdf_renders_rejected",
+    "PDF renders refused because the pool was saturated",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "meda_password_hash_duration_seconds",
+    "Argon2 hash or verify time (excluding queueing)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASHES_REJECTED = Counter(
+    "meda_password_hashes_rejected",
+    "Hash requests refused because the hasher was saturated",
+)
+SCHEDULED_JOB_SECONDS = Histogram(
+    "meda_scheduled_job_duration_seconds",
+    "Periodic maintenance job run time",
+    ["job", "outcome"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+NOTIFICATIONS_PRUNED = Counter(
+    "meda_notifications_pruned",
+    "Notifications deleted by retention",
+    ["reason"],
+)
+EVENT_BUS_DEGRADED = Gauge(
+    "meda_event_bus_degraded",
+    "Workers whose event bus only reaches local clients (Redis unreachable)",
+    multiprocess_mode="livesum",
+)
+AUDIT_ENTRIES_DEAD_LETTERED = Counter(
+    "meda_audit_entries_dead_lettered",
+    "Audit entries given up on and written to the dead-letter file",
+    ["reason"],
+)
+
+
+def observe_storage(operation: str) -> Callable:
+    """Decorator timing an object storage call"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                STORAGE_OPERATION_SECONDS.labels(operation, outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route ("/api/v1/patients/{patient_id}")"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope), str(status_code)).observe(elapsed)
+
+
+def render_latest() -> bytes:
+    """Exposition text for /metrics, aggregated across workers in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        from prometheus_client import REGISTRY
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,116 @@
+"""
+Monthly range partitioning helpers (PostgreSQL)
+
+Tables opt in with:
+
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (created_at)", "info": {"partition_key": "created_at"}},
+    )
+
+PostgreSQL requires the partition key in the primary key, so the DDL for
+those tables gets PRIMARY KEY (id, created_at) while the ORM keeps `id` as
+the identity. Other dialects (SQLite) create a plain table.
+"""
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import PrimaryKeyConstraint, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    partition_key = constraint.table.info.get("partition_key") if constraint.table is not None else None
+    if not partition_key or partition_key in constraint.columns.keys():
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+
+    quote = compiler.preparer.quote
+    columns = [quote(column.name) for column in constraint.columns] + [quote(partition_key)]
+    return f"PRIMARY KEY ({', '.join(columns)})"
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` after `day`'s month"""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, start: date) -> str:
+    return f"{table_name}_y{start.year:04d}m{start.month:02d}"
+
+
+def parse_partition_name(table_name: str, name: str) -> Optional[date]:
+    """Month start encoded in a partition name, None for the default partition"""
+    prefix = f"{table_name}_y"
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix):].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def ensure_default_partition(conn: Connection, table_name: str):
+    """Catch-all partition so inserts never fail for a missing month"""
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{table_name}_default" PARTITION OF "{table_name}" DEFAULT'
+    ))
+
+
+def ensure_monthly_partitions(
+    conn: Connection,
+    table_name: str,
+    months_ahead: int = 3,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Create the partitions for the current month and the next `months_ahead`
+
+    Returns:
+        Names of the partitions that exist afterwards
+    """
+    start = month_start(today or date.today())
+    names = []
+    for offset in range(months_ahead + 1):
+        lower = add_months(start, offset)
+        upper = add_months(lower, 1)
+        name = partition_name(table_name, lower)
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        names.append(name)
+    return names
+
+
+def list_monthly_partitions(conn: Connection, table_name: str) -> List[Tuple[str, date]]:
+    """Monthly partitions attached to `table_name`, oldest first"""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table_name"
+    ), {"table_name": table_name}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        start = parse_partition_name(table_name, name)
+        if start is not None:
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def register_monthly_partitioning(table, months_ahead: int = 3):
+    """Create the default and upcoming partitions right after the table"""
+    @event.listens_for(table, "after_create")
+    def _create_partitions(target, connection, **kw):
+        if connection.dialect.name != "postgresql":
+            return
+        ensure_default_partition(connection, target.name)
+        ensure_monthly_partitions(connection, target.name, months_ahead)
@@ -0,0 +1,15 @@
+"""
+Process helpers for state owned by one worker (write-ahead files, jobs)
+"""
+import os
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this PID exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,272 @@
+"""
+Sampling profiler for live workers
+
+A background thread reads the stack of every other thread with
+sys._current_frames() every PROFILER_INTERVAL_MS and counts identical
+stacks. The profiled code is not instrumented; the cost is one stack walk
+per thread per sample, only while a profile is running. Nothing runs (no
+thread, no hook) when idle.
+
+Output is the collapsed-stack format of flamegraph.pl, speedscope and
+inferno, one line per distinct stack, root first:
+
+    MainThread;run (uvicorn/server.py:61);...;_analyze_symptoms (app/services/comprehensive_diagnosis.py:84) 42
+
+Two entry points, both admin only:
+- POST /api/v1/admin/profile?seconds=N samples the whole worker that
+  serves the call (one gunicorn worker, not the fleet);
+- a request sent with the PROFILER_HEADER header is profiled alone and
+  answered with its collapsed stacks instead of its normal body
+  (ProfilingMiddleware).
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+MAX_DEPTH = 128
+
+# Leaf frames of threads parked in a wait (idle thread pools, the event
+# loop polling, queue consumers). Left out unless include_idle is set, so
+# the flamegraph shows where CPU goes rather than where threads sleep.
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "readinto"),
+    ("socket.py", "accept"),
+    ("connection.py", "wait"),
+    ("subprocess.py", "_try_wait"),
+}
+
+_label_cache: dict = {}
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages, the stdlib or the working directory"""
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    cwd = os.getcwd() + os.sep
+    if filename.startswith(cwd):
+        return filename[len(cwd):]
+    return os.path.basename(filename)
+
+
+def _label(code) -> str:
+    label = _label_cache.get(code)
+    if label is None:
+        # Function granularity (first line) keeps one box per function
+        label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        label = label.replace(";", ":")
+        _label_cache[code] = label
+    return label
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+def stack_contains(frame: Optional[FrameType], code) -> bool:
+    while frame is not None:
+        if frame.f_code is code:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class SamplingProfiler:
+    """
+    Collects collapsed stacks of the process' threads until stopped
+
+    Args:
+        interval: Seconds between samples
+        include: Optional filter (thread id, leaf frame) -> bool
+        include_idle: Keep threads parked in a wait
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        include: Optional[Callable[[int, FrameType], bool]] = None,
+        include_idle: bool = False
+    ):
+        self.interval = interval
+        self.include = include
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started_at is not None:
+            self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                if self.include is not None and not self.include(thread_id, frame):
+                    continue
+                self.stacks[self._collapse(names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+            del frames
+
+    @staticmethod
+    def _collapse(thread_name: str, frame: Optional[FrameType]) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            labels.append(_label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+        labels.reverse()
+        return ";".join(labels)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def headers(self) -> dict:
+        return {
+            "X-Profile-Samples": str(self.samples),
+            "X-Profile-Duration-Ms": f"{self.duration * 1000:.0f}",
+            "X-Profile-Worker": str(os.getpid()),
+        }
+
+
+_worker_profile_lock = asyncio.Lock()
+
+
+async def profile_worker(seconds: float, interval: float, include_idle: bool = False) -> SamplingProfiler:
+    """
+    Sample every thread of this worker for `seconds`
+
+    Raises:
+        RuntimeError: If a worker profile is already running
+    """
+    if _worker_profile_lock.locked():
+        raise RuntimeError("A profile is already running on this worker")
+    async with _worker_profile_lock:
+        profiler = SamplingProfiler(interval, include_idle=include_idle).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await run_in_threadpool(profiler.stop)
+        return profiler
+
+
+def _request_filter(scope: Scope, task: Optional[asyncio.Task]) -> Callable[[int, FrameType], bool]:
+    """
+    Keep the samples that belong to one request
+
+    On the event loop thread: while the request's task is the one running.
+    In the threadpool: threads running the matched endpoint (sync routes).
+    """
+    loop_thread = threading.get_ident()
+    loop = asyncio.get_running_loop()
+
+    def include(thread_id: int, frame: FrameType) -> bool:
+        if thread_id == loop_thread:
+            return asyncio.current_task(loop) is task
+        code = getattr(scope.get("endpoint"), "__code__", None)
+        return code is not None and stack_contains(frame, code)
+
+    return include
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry PROFILER_HEADER
+
+    Only honoured for admin tokens; otherwise the header is ignored. The
+    check costs one header scan per request; nothing else runs unless the
+    header is present.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = settings.PROFILER_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.PROFILER_ENABLED:
+            return await self.app(scope, receive, send)
+        if not any(name == self.header for name, _ in scope["headers"]):
+            return await self.app(scope, receive, send)
+
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        if not await run_in_threadpool(self._is_admin, authorization):
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def swallow(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = SamplingProfiler(
+            settings.PROFILER_INTERVAL_MS / 1000,
+            include=_request_filter(scope, asyncio.current_task())
+        ).start()
+        try:
+            await self.app(scope, receive, swallow)
+        finally:
+            await run_in_threadpool(profiler.stop)
+
+        body = profiler.collapsed().encode()
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profiled-status", str(status_code).encode()),
+        ] + [(name.lower().encode(), value.encode()) for name, value in profiler.headers().items()]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _is_admin(authorization: str) -> bool:
+        if not authorization.lower().startswith("bearer "):
+            return False
+        from app.api.v1.auth import get_user_from_token
+        from app.core.database import SessionLocal
+        from app.models.user import UserRole
+        db = SessionLocal()
+        try:
+            user = get_user_from_token(authorization[7:], db)
+            return user is not None and user.role == UserRole.ADMIN
+        finally:
+            db.close()
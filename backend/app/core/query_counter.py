@@ -0,0 +1,61 @@
+"""
+Query counting helpers to catch N+1 regressions
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine as default_engine
+
+
+class QueryCounter:
+    """Collects the SQL statements executed on an engine"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(bind: Optional[Engine] = None) -> Iterator[QueryCounter]:
+    """
+    Count the queries executed on an engine inside the block
+
+    Usage:
+        with count_queries() as counter:
+            client.get("/api/v1/collaboration/consultations/1/comments")
+        assert counter.count <= 4
+    """
+    target = bind or default_engine
+    counter = QueryCounter()
+    event.listen(target, "before_cursor_execute", counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", counter._on_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Optional[Engine] = None) -> Iterator[QueryCounter]:
+    """
+    Fail if the block executes more than `limit` queries
+
+    Args:
+        limit: Maximum number of queries allowed
+        bind: Engine to observe (defaults to the application engine)
+    """
+    with count_queries(bind) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(counter.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {counter.count}:\n{executed}"
+        )
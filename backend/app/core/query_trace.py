@@ -0,0 +1,184 @@
+"""
+Per-request SQL tracing and slow-query log
+
+Engine-level cursor events time every statement. While a request is being
+served, QueryTraceMiddleware keeps a QueryTrace for it in a context
+variable: query count, total time and the SQL_TRACE_KEEP_SLOWEST slowest
+statements. Statements are stored without their values: bound parameters
+are reduced to their types and quoted literals to '?', so traces and logs
+never carry patient data.
+
+Statements slower than SQL_SLOW_QUERY_MS are logged as one JSON line each
+(from requests and background jobs alike), and requests issuing more than
+SQL_TRACE_QUERY_COUNT_WARNING queries are logged with their slowest
+statements. In DEBUG, responses carry a Server-Timing header
+(`db;dur=…;desc="N queries", app;dur=…`) that browser devtools display.
+"""
+import heapq
+import itertools
+import json
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_QUERY_SECONDS,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    route_template,
+)
+
+MAX_STATEMENT_LENGTH = 2000
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def redact_statement(statement: str) -> str:
+    """Single-line statement with quoted literals replaced by '?'"""
+    statement = _STRING_LITERAL.sub("'?'", " ".join(statement.split()))
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + "…"
+    return statement
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """Parameter types only ({"id_1": "int"}), or the row count for executemany"""
+    if executemany:
+        return f"{len(parameters)} rows"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class QueryTrace:
+    """SQL statements executed while serving one request"""
+
+    def __init__(self, scope: Optional[Scope] = None, keep: int = 5):
+        self.scope = scope
+        self.keep = keep
+        self.count = 0
+        self.seconds = 0.0
+        self._slowest: List[Tuple[float, int, str, Any]] = []  # min-heap on duration
+        self._sequence = itertools.count()
+
+    def record(self, statement: str, parameters: Any, executemany: bool, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if self.keep <= 0:
+            return
+        if len(self._slowest) >= self.keep:
+            if seconds <= self._slowest[0][0]:
+                return
+            heapq.heappop(self._slowest)
+        heapq.heappush(self._slowest, (
+            seconds,
+            next(self._sequence),
+            redact_statement(statement),
+            redact_parameters(parameters, executemany),
+        ))
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        """Slowest statements, slowest first"""
+        return [
+            {"ms": round(seconds * 1000, 2), "statement": statement, "params": params}
+            for seconds, _, statement, params in sorted(self._slowest, reverse=True)
+        ]
+
+    @property
+    def route(self) -> Optional[str]:
+        return route_template(self.scope) if self.scope is not None else None
+
+
+# Shared by reference with threadpool endpoints (the context is copied, not the object)
+_current_trace: ContextVar[Optional[QueryTrace]] = ContextVar("query_trace", default=None)
+
+
+def current_trace() -> Optional[QueryTrace]:
+    return _current_trace.get()
+
+
+def _log(tag: str, record: Dict[str, Any]):
+    print(f"[{tag}] {json.dumps(record, default=str)}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    DB_QUERY_SECONDS.observe(elapsed)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(statement, parameters, executemany, elapsed)
+
+    if settings.SQL_SLOW_QUERY_MS and elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        _log("SLOW QUERY", {
+            "ms": round(elapsed * 1000, 2),
+            "route": trace.route if trace is not None else None,
+            "method": trace.scope["method"] if trace is not None and trace.scope else None,
+            "statement": redact_statement(statement),
+            "params": redact_parameters(parameters, executemany),
+        })
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_failed(exception_context):
+    connection = exception_context.connection
+    started = connection.info.get("query_started") if connection is not None else None
+    if started:
+        started.pop()
+
+
+class QueryTraceMiddleware:
+    """ASGI middleware tracing the SQL issued by each request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = QueryTrace(scope, settings.SQL_TRACE_KEEP_SLOWEST)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                timing = (
+                    f'db;dur={trace.seconds * 1000:.1f};desc="{trace.count} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            method = scope["method"]
+            route = trace.route
+            if settings.METRICS_ENABLED:
+                HTTP_REQUEST_DB_QUERIES.labels(method, route).observe(trace.count)
+                HTTP_REQUEST_DB_SECONDS.labels(method, route).observe(trace.seconds)
+            if settings.SQL_TRACE_QUERY_COUNT_WARNING and trace.count > settings.SQL_TRACE_QUERY_COUNT_WARNING:
+                _log("SQL TRACE", {
+                    "route": route,
+                    "method": method,
+                    "queries": trace.count,
+                    "db_ms": round(trace.seconds * 1000, 2),
+                    "slowest": trace.slowest(),
+                })
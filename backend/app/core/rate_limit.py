@@ -0,0 +1,239 @@
+"""
+Sliding-window rate limiting for sensitive routes
+
+RateLimitMiddleware matches each request against RATE_LIMITS and rejects
+it with 429 before routing, so throttled logins never reach Argon2.
+Counters live in Redis when reachable (shared by all workers) and in
+process memory otherwise. Redis is reached with the asyncio client, and
+after an error the limiter counts locally until Redis is retried.
+
+The window is the usual two-bucket approximation: the previous fixed
+window's count is weighted by how much of it still overlaps the sliding
+window. It needs two counters per key whatever the traffic.
+"""
+import fnmatch
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.redis_client import get_async_redis, mark_async_redis_failed
+from app.core.tokens import validate_token
+
+# Largest JSON body read to find the account of an anonymous request
+MAX_BODY_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    route: str  # "METHOD /path/pattern"
+    scope: str  # "ip" or "account"
+    limit: int
+    window_seconds: int
+
+    @classmethod
+    def parse(cls, route: str, spec: str) -> "RateLimitRule":
+        """Parse "ip:20/60" (20 requests per 60 s per client IP)"""
+        scope, _, quota = spec.partition(":")
+        limit, _, window = quota.partition("/")
+        if scope not in ("ip", "account"):
+            raise ValueError(f"Unknown rate limit scope in {spec!r}")
+        return cls(route, scope, int(limit), int(window))
+
+
+class SlidingWindowLimiter:
+    """Counts hits per key, in Redis or in memory"""
+
+    MAX_LOCAL_KEYS = 100_000
+
+    def __init__(self):
+        # LRU of key -> [window index, current, previous]
+        self._local: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate(current: int, previous: int, elapsed: float, window: int) -> float:
+        return previous * (1 - elapsed / window) + current
+
+    async def _hit_redis(
+        self,
+        client: redis.asyncio.Redis,
+        checks: List[Tuple[str, int, int]],
+        now: float
+    ) -> List[float]:
+        pipe = client.pipeline(transaction=False)
+        for key, _, window in checks:
+            index = int(now // window)
+            current_key = f"ratelimit:{key}:{index}"
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+            pipe.get(f"ratelimit:{key}:{index - 1}")
+        results = await pipe.execute()
+
+        estimates = []
+        for i, (_, _, window) in enumerate(checks):
+            current, _, previous = results[3 * i:3 * i + 3]
+            estimates.append(self._estimate(int(current), int(previous or 0), now % window, window))
+        return estimates
+
+    def _hit_local(self, checks: List[Tuple[str, int, int]], now: float) -> List[float]:
+        estimates = []
+        with self._lock:
+            for key, _, window in checks:
+                index = int(now // window)
+                entry = self._local.get(key)
+                if entry is None or entry[0] < index - 1:
+                    entry = [index, 0, 0]
+                elif entry[0] == index - 1:
+                    entry = [index, 0, entry[1]]
+                entry[1] += 1
+                self._local[key] = entry
+                self._local.move_to_end(key)
+                estimates.append(self._estimate(entry[1], entry[2], now % window, window))
+            # Evict the least recently hit keys (expired windows go first),
+            # never the whole map: that would reset every live counter
+            while len(self._local) > self.MAX_LOCAL_KEYS:
+                self._local.popitem(last=False)
+        return estimates
+
+    async def hit(self, checks: List[Tuple[str, int, int]]) -> Optional[int]:
+        """
+        Record one hit on each (key, limit, window_seconds)
+
+        Returns:
+            None if every limit holds, else seconds to wait before retrying
+        """
+        now = time.time()
+        client = await get_async_redis() if settings.RATE_LIMIT_BACKEND in ("auto", "redis") else None
+        estimates = None
+        if client is not None:
+            try:
+                estimates = await self._hit_redis(client, checks, now)
+            except redis.RedisError as e:
+                print(f"[RATE LIMIT] Redis unavailable, counting locally: {e}")
+                await mark_async_redis_failed()
+        if estimates is None:
+            estimates = self._hit_local(checks, now)
+
+        retry_after = None
+        for (_, limit, window), estimate in zip(checks, estimates):
+            if estimate > limit:
+                wait = max(1, math.ceil(window - now % window))
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RATE_LIMITS before the request is routed"""
+
+    def __init__(self, app: ASGIApp, limits: Optional[Dict[str, List[str]]] = None):
+        self.app = app
+        self.rules: List[Tuple[str, str, List[RateLimitRule]]] = []
+        for route, specs in (settings.RATE_LIMITS if limits is None else limits).items():
+            method, _, pattern = route.partition(" ")
+            self.rules.append((method.upper(), pattern, [RateLimitRule.parse(route, s) for s in specs]))
+        self.limiter = SlidingWindowLimiter()
+
+    def _match(self, method: str, path: str) -> List[RateLimitRule]:
+        matched = []
+        for rule_method, pattern, rules in self.rules:
+            if rule_method in (method, "*") and fnmatch.fnmatchcase(path, pattern):
+                matched.extend(rules)
+        return matched
+
+    @staticmethod
+    def _client_ip(scope: Scope, headers: Dict[bytes, bytes]) -> str:
+        if settings.RATE_LIMIT_TRUST_FORWARDED and b"x-forwarded-for" in headers:
+            return headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def _token_account(headers: Dict[bytes, bytes]) -> Optional[str]:
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not authorization.lower().startswith("bearer "):
+            return None
+        payload = validate_token(authorization[7:])
+        if not payload or payload.get("user_id") is None:
+            return None
+        return f"user:{payload['user_id']}"
+
+    async def _body_account(
+        self,
+        headers: Dict[bytes, bytes],
+        receive: Receive
+    ) -> Tuple[Optional[str], Receive]:
+        """Read the "email" of a small JSON body, then replay the body downstream"""
+        if not headers.get(b"content-type", b"").startswith(b"application/json"):
+            return None, receive
+        try:
+            if int(headers.get(b"content-length", b"0")) > MAX_BODY_BYTES:
+                return None, receive
+        except ValueError:
+            return None, receive
+
+        messages: List[Message] = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body") or len(body) > MAX_BODY_BYTES:
+                break
+
+        async def replay() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        try:
+            email = json.loads(body).get("email")
+        except (ValueError, AttributeError):
+            email = None
+        account = f"email:{email.strip().lower()}" if isinstance(email, str) and email else None
+        return account, replay
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        rules = self._match(scope["method"], scope["path"])
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        identities = {"ip": f"ip:{self._client_ip(scope, headers)}"}
+        if any(rule.scope == "account" for rule in rules):
+            account = self._token_account(headers)
+            if account is None:
+                account, receive = await self._body_account(headers, receive)
+            if account is not None:
+                identities["account"] = account
+
+        checks = [
+            (f"{rule.route}:{identities[rule.scope]}", rule.limit, rule.window_seconds)
+            for rule in rules
+            if rule.scope in identities
+        ]
+        retry_after = await self.limiter.hit(checks) if checks else None
+        if retry_after is None:
+            return await self.app(scope, receive, send)
+
+        body = json.dumps({"detail": "Trop de requêtes, veuillez réessayer plus tard"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
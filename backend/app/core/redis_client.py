@@ -0,0 +1,104 @@
+"""
+Shared Redis client
+
+Redis is optional: features built on it (event bus, counters, rate limits,
+token revocation) fall back to in-process state when it is unreachable.
+Code running on the event loop uses the asyncio client, so a slow or
+unreachable Redis never blocks other requests.
+"""
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+
+RETRY_SECONDS = 30.0
+
+_client: Optional[redis.Redis] = None
+_last_failure: float = 0.0
+
+_async_client: Optional[Tuple[asyncio.AbstractEventLoop, redis.asyncio.Redis]] = None
+_async_last_failure: float = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Return the process-wide Redis client
+
+    Returns None when REDIS_URL is empty or Redis did not answer a ping;
+    the connection is retried at most every RETRY_SECONDS.
+    """
+    global _client, _last_failure
+
+    if _client is not None:
+        return _client
+    if not settings.REDIS_URL:
+        return None
+    if _last_failure and time.monotonic() - _last_failure < RETRY_SECONDS:
+        return None
+
+    try:
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=1,
+            socket_timeout=2,
+            health_check_interval=30
+        )
+        client.ping()
+    except redis.RedisError as e:
+        print(f"[REDIS] Unavailable at {settings.REDIS_URL}: {e}")
+        _last_failure = time.monotonic()
+        return None
+
+    _client = client
+    return _client
+
+
+async def get_async_redis() -> Optional[redis.asyncio.Redis]:
+    """
+    Return the asyncio Redis client of the running event loop
+
+    Same contract as get_redis(): None when REDIS_URL is empty or Redis
+    did not answer; after a failure (see mark_async_redis_failed) Redis is
+    not tried again for RETRY_SECONDS.
+    """
+    global _async_client, _async_last_failure
+
+    loop = asyncio.get_running_loop()
+    if _async_client is not None and _async_client[0] is loop:
+        return _async_client[1]
+    if not settings.REDIS_URL:
+        return None
+    if _async_last_failure and time.monotonic() - _async_last_failure < RETRY_SECONDS:
+        return None
+
+    client = redis.asyncio.Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=1,
+        socket_timeout=2,
+        health_check_interval=30
+    )
+    try:
+        await client.ping()
+    except redis.RedisError as e:
+        print(f"[REDIS] Unavailable at {settings.REDIS_URL}: {e}")
+        _async_last_failure = time.monotonic()
+        await client.aclose()
+        return None
+
+    _async_client = (loop, client)
+    return client
+
+
+async def mark_async_redis_failed():
+    """Drop the asyncio client after an error; Redis is retried after RETRY_SECONDS"""
+    global _async_client, _async_last_failure
+
+    _async_last_failure = time.monotonic()
+    if _async_client is not None:
+        _, client = _async_client
+        _async_client = None
+        await client.aclose()
@@ -0,0 +1,138 @@
+"""
+Lightweight periodic job scheduler
+
+Jobs are plain synchronous callables run in the threadpool from an
+asyncio task per job. Every gunicorn worker runs the loops; the start of
+each job's last run is stored in scheduled_jobs and a worker skips a job
+that already ran within its interval, so a job runs once per interval
+whichever worker gets there first. On PostgreSQL the check and the run
+happen under an advisory lock, so two workers never run a job at once.
+"""
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import dialect_insert, engine
+from app.core.metrics import SCHEDULED_JOB_SECONDS
+from app.models.scheduler import ScheduledJob
+
+# Clock skew tolerated between workers on different hosts
+CLOCK_TOLERANCE_SECONDS = 1.0
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[], object]
+    run_on_start: bool = True
+
+
+class Scheduler:
+    """Runs registered jobs at a fixed interval inside the app's event loop"""
+
+    def __init__(self):
+        self._jobs: List[PeriodicJob] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def register(
+        self,
+        name: str,
+        interval_seconds: float,
+        func: Callable[[], object],
+        run_on_start: bool = True
+    ):
+        """Register a job; call before start()"""
+        self._jobs.append(PeriodicJob(name, interval_seconds, func, run_on_start))
+
+    def run_once(self, job: PeriodicJob):
+        """Run a job now unless another worker holds its lock or ran it within its interval"""
+        with engine.connect() as conn:
+            if engine.dialect.name != "postgresql":
+                return self._run_if_due(conn, job)
+
+            lock_id = zlib.crc32(job.name.encode())
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar():
+                return None
+            try:
+                return self._run_if_due(conn, job)
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+
+    def _run_if_due(self, conn, job: PeriodicJob):
+        db = Session(bind=conn)
+        try:
+            started_at = datetime.utcnow()
+            last_run_at = db.execute(
+                select(ScheduledJob.last_run_at).where(ScheduledJob.name == job.name)
+            ).scalar()
+            # No transaction left open while the job runs
+            db.commit()
+            if last_run_at is not None:
+                elapsed = (started_at - last_run_at).total_seconds()
+                if elapsed < job.interval_seconds - CLOCK_TOLERANCE_SECONDS:
+                    return None
+
+            ok, result = self._execute(job)
+
+            values = {"name": job.name, "last_run_at": started_at}
+            if ok:
+                values["last_success_at"] = started_at
+            stmt = dialect_insert(db, ScheduledJob.__table__).values(**values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ScheduledJob.name],
+                set_={key: stmt.excluded[key] for key in values if key != "name"}
+            ))
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+    @staticmethod
+    def last_success(name: str) -> Optional[datetime]:
+        """Start of the last run of a job that did not raise, in any worker"""
+        with engine.connect() as conn:
+            return conn.execute(
+                select(ScheduledJob.last_success_at).where(ScheduledJob.name == name)
+            ).scalar()
+
+    @staticmethod
+    def _execute(job: PeriodicJob) -> Tuple[bool, object]:
+        started = time.perf_counter()
+        try:
+            result = job.func()
+            SCHEDULED_JOB_SECONDS.labels(job.name, "ok").observe(time.perf_counter() - started)
+            print(f"[SCHEDULER] {job.name}: {result}")
+            return True, result
+        except Exception as e:
+            SCHEDULED_JOB_SECONDS.labels(job.name, "error").observe(time.perf_counter() - started)
+            print(f"[SCHEDULER ERROR] {job.name}: {type(e).__name__}: {e}")
+            return False, None
+
+    async def _loop(self, job: PeriodicJob):
+        if not job.run_on_start:
+            await asyncio.sleep(job.interval_seconds)
+        while True:
+            await run_in_threadpool(self.run_once, job)
+            await asyncio.sleep(job.interval_seconds)
+
+    async def start(self):
+        for job in self._jobs:
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+# Singleton instance
+scheduler = Scheduler()
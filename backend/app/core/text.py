@@ -0,0 +1,23 @@
+"""
+Text normalization helpers shared by search and rule matching
+"""
+import unicodedata
+from typing import Optional
+
+
+def strip_accents(value: str) -> str:
+    """Remove diacritics (é -> e, ç -> c, œ stays œ)"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """
+    Normalize text for accent- and case-insensitive matching
+
+    Lowercases, strips accents and collapses whitespace so that
+    "  Hélène  DUPRÉ " and "helene dupre" compare equal.
+    """
+    if not value:
+        return ""
+    return " ".join(strip_accents(value).lower().split())
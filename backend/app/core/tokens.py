@@ -0,0 +1,208 @@
+"""
+Access-token validation fast path and revocation
+
+Validated tokens are kept in a small LRU, so repeat requests skip the
+signature check. Revocations (logout, admin cut-off) are stored in Redis
+and mirrored in process memory. They propagate to other workers at once
+over the event bus, and a background thread resyncs the full list from
+Redis every TOKEN_REVOCATION_SYNC_SECONDS to catch anything missed.
+Checking a token only reads process memory: no database or Redis call on
+the request path.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.event_bus import get_event_bus
+from app.core.redis_client import get_redis
+from app.core.security import decode_token
+
+
+class TokenRevocationList:
+    """Revoked token ids and per-user "issued before" cut-offs"""
+
+    REVOKED_KEY = "auth:revoked_jti"  # sorted set: jti scored by token expiry
+    CUTOFF_KEY = "auth:revoked_before"  # hash: user_id -> unix time
+    CHANNEL = "auth:revocations"
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._cutoffs: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._listening = False
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if hasattr(os, "register_at_fork"):
+            # Threads do not survive fork: each worker starts its own
+            os.register_at_fork(after_in_child=self._reset_thread)
+
+    def _reset_thread(self):
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _ensure_listening(self):
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        get_event_bus().subscribe(self.CHANNEL, self._on_bus_event)
+
+    def _on_bus_event(self, channel: str, event: Dict[str, Any]):
+        with self._lock:
+            if event.get("jti"):
+                self._revoked[event["jti"]] = event["exp"]
+            if event.get("user_id") is not None:
+                user_id = int(event["user_id"])
+                self._cutoffs[user_id] = max(self._cutoffs.get(user_id, 0), event["before"])
+
+    def start(self):
+        """Load the list from Redis, then keep it in sync in the background"""
+        if self._thread is None or not self._thread.is_alive():
+            self.sync()
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="token-revocation-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(settings.TOKEN_REVOCATION_SYNC_SECONDS):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"[TOKENS] Revocation sync failed: {e}")
+
+    def shutdown(self):
+        """Stop the background resync"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Whether a token is revoked, from process memory only"""
+        self._ensure_started()
+        jti = payload.get("jti")
+        if jti is not None and jti in self._revoked:
+            return True
+        cutoff = self._cutoffs.get(payload.get("user_id"))
+        return cutoff is not None and payload.get("iat", 0) < cutoff
+
+    def revoke(self, jti: str, expires_at: float):
+        """Revoke one token until it would have expired anyway"""
+        self._ensure_listening()
+        client = get_redis()
+        if client is not None:
+            try:
+                client.zadd(self.REVOKED_KEY, {jti: expires_at})
+            except redis.RedisError as e:
+                print(f"[TOKENS] Could not store revocation in Redis: {e}")
+        with self._lock:
+            self._revoked[jti] = expires_at
+        get_event_bus().publish(self.CHANNEL, {"jti": jti, "exp": expires_at})
+
+    def revoke_user(self, user_id: int, before: Optional[int] = None):
+        """Revoke every token of a user issued before `before` (default: now)"""
+        self._ensure_listening()
+        before = int(before or time.time())
+        client = get_redis()
+        if client is not None:
+            try:
+                client.hset(self.CUTOFF_KEY, str(user_id), before)
+            except redis.RedisError as e:
+                print(f"[TOKENS] Could not store revocation in Redis: {e}")
+        with self._lock:
+            self._cutoffs[user_id] = max(self._cutoffs.get(user_id, 0), before)
+        get_event_bus().publish(self.CHANNEL, {"user_id": user_id, "before": before})
+
+    def sync(self):
+        """Reload the revocation state from Redis, dropping expired entries"""
+        self._ensure_listening()
+        now = time.time()
+        # Cut-offs older than the longest token lifetime no longer match anything
+        oldest_live = now - settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.zremrangebyscore(self.REVOKED_KEY, "-inf", now)
+                pipe.zrange(self.REVOKED_KEY, 0, -1, withscores=True)
+                pipe.hgetall(self.CUTOFF_KEY)
+                _, revoked, cutoffs = pipe.execute()
+                stale = [k for k, v in cutoffs.items() if int(v) < oldest_live]
+                if stale:
+                    client.hdel(self.CUTOFF_KEY, *stale)
+                with self._lock:
+                    self._revoked = {jti.decode(): exp for jti, exp in revoked}
+                    self._cutoffs = {int(k): int(v) for k, v in cutoffs.items() if int(v) >= oldest_live}
+                return
+            except redis.RedisError as e:
+                print(f"[TOKENS] Revocation sync failed, keeping local state: {e}")
+
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._cutoffs = {k: v for k, v in self._cutoffs.items() if v >= oldest_live}
+
+
+class ValidatedTokenCache:
+    """LRU of tokens whose signature has already been checked"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None:
+                self._entries.move_to_end(token)
+            return payload
+
+    def put(self, token: str, payload: Dict[str, Any]):
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+
+revocation_list = TokenRevocationList()
+token_cache = ValidatedTokenCache(settings.TOKEN_CACHE_SIZE)
+
+
+def validate_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
+    """
+    Return the claims of a valid, unrevoked token of the given type
+
+    Args:
+        token: Encoded JWT
+        token_type: Expected "type" claim ("access" or "refresh")
+
+    Returns:
+        Token payload, or None if invalid, expired or revoked
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        token_cache.put(token, payload)
+    elif payload["exp"] <= time.time():
+        token_cache.discard(token)
+        return None
+
+    if payload.get("type") != token_type or revocation_list.is_revoked(payload):
+        return None
+    return payload
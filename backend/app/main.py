@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import ProfilingMiddleware
+from app.core.query_trace import QueryTraceMiddleware
+from app.core.rate_limit import RateLimitMiddleware
 from app.api.v1 import auth, images
 
 # Import all models to ensure they're registered with SQLAlchemy
@@ -9,9 +17,166 @@ from app.models.user import User
 from app.models.medical import MedicalImage, Patient
 from app.models.analysis import Analysis
 from app.models.consultation import Consultation, MedicalHistory
+from app.models.report import ReportExportJob
+
+# Periodic jobs and per-worker startup/shutdown
+
+def run_counter_reconciliation():
+    """Reconcile materialized unread counters with the notifications table"""
+    from app.core.database import SessionLocal
+    from app.services.notification_service import notification_service
+    db = SessionLocal()
+    try:
+        return notification_service.reconcile_unread_counters(db)
+    finally:
+        db.close()
+
+def run_notification_pruning():
+    """Apply notification retention (old read rows, unread cap per user)"""
+    from app.core.database import SessionLocal
+    from app.services.notification_service import notification_service
+    db = SessionLocal()
+    try:
+        return notification_service.prune_notifications(db)
+    finally:
+        db.close()
+
+def run_report_export_cleanup():
+    """Delete bulk report exports past their retention"""
+    from app.core.database import SessionLocal
+    from app.services.report_export_service import report_export_service
+    db = SessionLocal()
+    try:
+        return report_export_service.purge_expired(db)
+    finally:
+        db.close()
+
+def run_notification_digest():
+    """Push notifications deferred to the digest since the previous successful run"""
+    from datetime import datetime, timedelta
+    from app.core.database import SessionLocal
+    from app.core.scheduler import scheduler
+    from app.services.notification_service import notification_service
+    # Kept in the database: any worker may run the next digest
+    since = scheduler.last_success("notification-digest")
+    if since is None:
+        since = datetime.utcnow() - timedelta(seconds=settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS)
+    db = SessionLocal()
+    try:
+        return notification_service.publish_digests(db, since)
+    finally:
+        db.close()
+
+def log_startup_time():
+    """Report how long this worker took to import the app"""
+    print(f"[STARTUP] App imported in {(_app_imported - _import_started) * 1000:.0f} ms")
+
+def recover_audit_log():
+    """Replay audit entries left by workers that died (after fork, once per worker)"""
+    from app.services.audit_service import audit_writer
+    audit_writer.recover()
+
+def fail_orphaned_report_exports():
+    """Fail export jobs left unfinished by workers of this host that died"""
+    from app.core.database import SessionLocal
+    from app.services.report_export_service import report_export_service
+    db = SessionLocal()
+    try:
+        report_export_service.fail_orphaned_jobs(db)
+    finally:
+        db.close()
+
+def start_token_revocation_sync():
+    """Load revoked tokens, then resync them in the background (after fork, once per worker)"""
+    from app.core.tokens import revocation_list
+    revocation_list.start()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+async def start_scheduler():
+    """Register and start periodic maintenance jobs"""
+    from app.core.scheduler import scheduler
+    from app.services.archive_service import archive_service
+    scheduler.register(
+        "partition-maintenance",
+        settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+        archive_service.run_maintenance
+    )
+    scheduler.register(
+        "notification-counter-reconcile",
+        settings.NOTIFICATION_COUNTER_RECONCILE_SECONDS,
+        run_counter_reconciliation,
+        run_on_start=False
+    )
+    scheduler.register(
+        "notification-pruning",
+        settings.NOTIFICATION_PRUNE_INTERVAL_SECONDS,
+        run_notification_pruning,
+        run_on_start=False
+    )
+    scheduler.register(
+        "report-export-cleanup",
+        settings.REPORT_EXPORT_CLEANUP_INTERVAL_SECONDS,
+        run_report_export_cleanup,
+        run_on_start=False
+    )
+    if settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS > 0:
+        scheduler.register(
+            "notification-digest",
+            settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS,
+            run_notification_digest,
+            run_on_start=False
+        )
+    await scheduler.start()
+
+async def stop_scheduler():
+    """Stop periodic jobs"""
+    from app.core.scheduler import scheduler
+    await scheduler.stop()
+
+def flush_audit_log():
+    """Persist queued audit entries before the worker exits"""
+    from app.services.audit_service import audit_writer
+    audit_writer.shutdown()
+
+def stop_token_revocation_sync():
+    """Stop the revoked-token resync thread"""
+    from app.core.tokens import revocation_list
+    revocation_list.shutdown()
+
+def stop_password_hasher():
+    """Release the Argon2 worker threads"""
+    from app.core.security import password_hasher
+    password_hasher.shutdown()
+
+def stop_pdf_render_pool():
+    """Stop PDF render processes"""
+    from app.services.pdf_render_pool import pdf_render_pool
+    pdf_render_pool.shutdown()
+
+def stop_report_exports():
+    """Stop the bulk export thread (its unfinished jobs are failed when a worker starts again)"""
+    from app.services.report_export_service import report_export_service
+    report_export_service.shutdown()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop per-worker services (after fork with gunicorn --preload)"""
+    log_startup_time()
+    recover_audit_log()
+    fail_orphaned_report_exports()
+    start_token_revocation_sync()
+    await start_scheduler()
+    try:
+        yield
+    finally:
+        await stop_scheduler()
+        flush_audit_log()
+        stop_token_revocation_sync()
+        stop_password_hasher()
+        stop_pdf_render_pool()
+        stop_report_exports()
+
+# The schema is managed by Alembic (`alembic upgrade head`), run once per
+# deploy rather than by every worker at import
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -19,8 +184,15 @@ app = FastAPI(
     description="API de diagnostic médical assisté par IA",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Admin requests carrying PROFILER_HEADER get their profile as the response
+app.add_middleware(ProfilingMiddleware)
+
+# Throttle sensitive routes before they are routed (CORS wraps the 429s)
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS - More permissive for development
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +203,12 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# SQL count/time per request, slow-query log, Server-Timing in DEBUG
+app.add_middleware(QueryTraceMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -52,6 +230,14 @@ async def test_database():
     except Exception as e:
         return {"status": "error", "database": "disconnected", "error": str(e)}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str | None = Header(default=None)):
+    """Prometheus metrics (all workers in multiprocess mode)"""
+    from app.core.metrics import CONTENT_TYPE_LATEST, render_latest
+    if settings.METRICS_TOKEN and authorization != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -97,6 +283,13 @@ app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["
 from app.api.v1.endpoints import collaboration
 app.include_router(collaboration.router, prefix="/api/v1/collaboration", tags=["Collaboration"])
 
+# Import admin router
+from app.api.v1.endpoints import admin
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Administration"])
+
+
+_app_imported = time.perf_counter()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,11 +1,12 @@
 """
 Collaboration models for consultation sharing and comments
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from app.core.database import Base
+from app.core.partitioning import register_monthly_partitioning
 
 
 class SharePermission(str, enum.Enum):
@@ -68,5 +69,15 @@ class AuditLog(Base):
     # Relationships
     user = relationship("User")
     
+    __table_args__ = (
+        Index("ix_audit_logs_entity_created", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        # Monthly partitions on PostgreSQL, see app/core/partitioning.py
+        {"postgresql_partition_by": "RANGE (created_at)", "info": {"partition_key": "created_at"}},
+    )
+    
     def __repr__(self):
         return f"<AuditLog {self.id}: {self.action} on {self.entity_type} {self.entity_id}>"
+
+
+register_monthly_partitioning(AuditLog.__table__)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Float, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.core.text import normalize_text
 import enum
 
 class ImageType(str, enum.Enum):
@@ -85,9 +86,41 @@ class Patient(Base):
     consultations = relationship("Consultation", back_populates="patient")
     medical_history_entries = relationship("MedicalHistory", back_populates="patient")
     
+    # Search: normalized "first last patient_id", kept up to date on write
+    search_text = Column(String, nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Trigram GIN index serves LIKE '%term%' on PostgreSQL (plain index elsewhere)
+        Index(
+            "ix_patients_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
+
+    def build_search_text(self) -> str:
+        """Build the normalized search document for this patient"""
+        return normalize_text(f"{self.first_name or ''} {self.last_name or ''} {self.patient_id or ''}")
+
     def __repr__(self):
         return f"<Patient {self.first_name} {self.last_name}>"
+
+
+@event.listens_for(Patient, "before_insert")
+@event.listens_for(Patient, "before_update")
+def _update_patient_search_text(mapper, connection, target):
+    """Keep the search document in sync with the indexed fields"""
+    target.search_text = target.build_search_text()
+
+
+# pg_trgm must exist before the GIN index using gin_trgm_ops is created
+event.listen(
+    Patient.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
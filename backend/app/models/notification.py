@@ -1,10 +1,11 @@
 """
 Notification models for in-app notifications
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.partitioning import register_monthly_partitioning
 
 
 class Notification(Base):
@@ -18,10 +19,40 @@ class Notification(Base):
     message = Column(Text, nullable=False)
     link = Column(String(500), nullable=True)  # URL to navigate to
     is_read = Column(Boolean, default=False, nullable=False)
+    count = Column(Integer, default=1, nullable=False)  # Events coalesced into this row
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Last coalesced event
     
     # Relationships
     user = relationship("User", back_populates="notifications")
     
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+        # Lookup of the unread row a new event can be merged into
+        Index(
+            "ix_notifications_unread_coalesce",
+            "user_id", "type", "link",
+            postgresql_where=text("NOT is_read")
+        ),
+        Index("ix_notifications_unread_updated", "updated_at", postgresql_where=text("NOT is_read")),
+        # Monthly partitions on PostgreSQL, see app/core/partitioning.py
+        {"postgresql_partition_by": "RANGE (created_at)", "info": {"partition_key": "created_at"}},
+    )
+    
     def __repr__(self):
         return f"<Notification {self.id}: {self.title} for user {self.user_id}>"
+
+
+register_monthly_partitioning(Notification.__table__)
+
+
+class NotificationCounter(Base):
+    """Materialized per-user unread count, kept in step with notifications"""
+    __tablename__ = "notification_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<NotificationCounter user {self.user_id}: {self.unread_count} unread>"
@@ -0,0 +1,32 @@
+"""
+Report models for bulk PDF exports
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class ReportExportJob(Base):
+    """A background export of many consultation reports into one ZIP"""
+    __tablename__ = "report_export_jobs"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex, not guessable
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), default="pending", nullable=False)  # pending, running, completed, failed
+    filters = Column(JSON, nullable=False)  # {doctor_id, date_from, date_to, patient_ids}
+    total = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    object_name = Column(String(500), nullable=True)  # ZIP in object storage once completed
+    size = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    worker_host = Column(String(255), nullable=True)  # Worker running the job, to detect orphans
+    worker_pid = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_report_export_jobs_user_created", "user_id", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<ReportExportJob {self.id}: {self.status} {self.completed}/{self.total}>"
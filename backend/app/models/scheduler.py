@@ -0,0 +1,17 @@
+"""
+Scheduler model for periodic maintenance jobs
+"""
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class ScheduledJob(Base):
+    """Last run of a periodic job, shared by every worker"""
+    __tablename__ = "scheduled_jobs"
+    
+    name = Column(String(100), primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)  # Start of the last run, UTC
+    last_success_at = Column(DateTime, nullable=True)  # Start of the last run that did not raise
+    
+    def __repr__(self):
+        return f"<ScheduledJob {self.name}: {self.last_run_at}>"
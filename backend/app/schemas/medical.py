@@ -63,3 +63,12 @@ class PatientResponse(PatientBase):
 
     class Config:
         from_attributes = True
+
+class PatientSuggestion(BaseModel):
+    id: int
+    patient_id: str
+    first_name: str
+    last_name: str
+
+    class Config:
+        from_attributes = True
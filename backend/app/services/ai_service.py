@@ -1,13 +1,20 @@
 import random
 import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import asyncio
 
+from app.core.config import settings
+
 
 class AIService:
     """Mock AI service for medical image analysis"""
     
+    # Simulated inference time, drawn uniformly (seconds); (0, 0) disables it
+    latency: Tuple[float, float] = (settings.AI_MOCK_MIN_LATENCY_SECONDS, settings.AI_MOCK_MAX_LATENCY_SECONDS)
+    # Source of every random draw; seed it (or replace it) for reproducible results
+    rng: random.Random = random.Random()
+    
     @staticmethod
     async def analyze_image(image_type: str, body_part: str = None) -> Dict[str, Any]:
         """
@@ -20,12 +27,14 @@ class AIService:
         Returns:
             Dictionary containing analysis results
         """
-        # Simulate processing time (2-5 seconds)
-        await asyncio.sleep(random.uniform(2, 5))
+        # Simulate processing time
+        low, high = AIService.latency
+        if high > 0:
+            await asyncio.sleep(AIService.rng.uniform(low, high))
         
         # Generate mock results based on image type
         findings = AIService._generate_findings(image_type, body_part)
-        confidence = round(random.uniform(0.75, 0.95), 2)
+        confidence = round(AIService.rng.uniform(0.75, 0.95), 2)
         recommendations = AIService._generate_recommendations(findings)
         
         return {
@@ -87,18 +96,18 @@ class AIService:
                                            type_templates.get("default", []))
         
         # Randomly select 1-3 findings
-        num_findings = random.randint(1, min(3, len(body_templates)))
-        selected_findings = random.sample(body_templates, num_findings)
+        num_findings = AIService.rng.randint(1, min(3, len(body_templates)))
+        selected_findings = AIService.rng.sample(body_templates, num_findings)
         
         return {
             "pathologies": selected_findings,
-            "image_quality": random.choice([
+            "image_quality": AIService.rng.choice([
                 "Excellente qualité d'image",
                 "Bonne exposition, positionnement correct",
                 "Qualité acceptable pour diagnostic",
                 "Images de haute qualité"
             ]),
-            "technical_notes": random.choice([
+            "technical_notes": AIService.rng.choice([
                 "Protocole standard respecté",
                 "Acquisition optimale",
                 "Paramètres techniques appropriés"
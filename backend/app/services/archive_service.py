@@ -0,0 +1,220 @@
+"""
+Partition maintenance and archival for time-partitioned tables
+
+Keeps upcoming monthly partitions of `audit_logs` and `notifications`
+created, exports partitions past their retention window to gzipped NDJSON
+in object storage, then drops them. Archived months stay queryable
+through `query_archive`. Unread notifications dropped with a partition are
+taken off their users' unread counters in the same transaction.
+"""
+import gzip
+import heapq
+import json
+import tempfile
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import bindparam, func, text, update
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.partitioning import (
+    add_months,
+    ensure_monthly_partitions,
+    list_monthly_partitions,
+    month_start,
+)
+from app.models.notification import NotificationCounter
+
+
+# zlib window bits accepting a gzip header
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _gunzip_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Lines of a gzipped text stream, decompressed chunk by chunk"""
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    pending = b""
+    for chunk in chunks:
+        while chunk:
+            if decompressor.eof:
+                # Next member of a multi-member file
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            pending += decompressor.decompress(chunk)
+            chunk = decompressor.unused_data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    pending += decompressor.flush()
+    if pending:
+        yield pending.decode("utf-8")
+
+
+class ArchiveService:
+    """Service for partition rotation and archive access"""
+
+    CONTENT_TYPE = "application/gzip"
+
+    @staticmethod
+    def retention_months() -> Dict[str, int]:
+        """Hot retention per partitioned table"""
+        return {
+            "audit_logs": settings.AUDIT_RETENTION_MONTHS,
+            "notifications": settings.NOTIFICATIONS_RETENTION_MONTHS,
+        }
+
+    @staticmethod
+    def archive_object_name(table_name: str, start: date) -> str:
+        return f"{settings.ARCHIVE_PREFIX}/{table_name}/{start.year:04d}/{start.month:02d}.ndjson.gz"
+
+    @staticmethod
+    def run_maintenance(today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Create upcoming partitions and archive expired ones
+
+        Returns:
+            Summary of partitions created and rows archived per table
+        """
+        if engine.dialect.name != "postgresql":
+            return {"skipped": "partitioning requires PostgreSQL"}
+
+        today = today or date.today()
+        summary: Dict[str, Any] = {}
+        for table_name, retention in ArchiveService.retention_months().items():
+            with engine.begin() as conn:
+                ensure_monthly_partitions(conn, table_name, settings.PARTITION_MONTHS_AHEAD, today)
+
+            cutoff = add_months(month_start(today), -retention)
+            archived = {}
+            with engine.connect() as conn:
+                partitions = list_monthly_partitions(conn, table_name)
+            for name, start in partitions:
+                # A partition covers [start, start + 1 month)
+                if add_months(start, 1) <= cutoff:
+                    archived[name] = ArchiveService.archive_partition(table_name, name, start)
+            summary[table_name] = {"archived": archived}
+        return summary
+
+    @staticmethod
+    def archive_partition(table_name: str, name: str, start: date) -> int:
+        """
+        Export one partition to object storage, then drop it
+
+        Returns:
+            Number of rows archived
+        """
+        from app.services.minio_service import minio_service
+
+        rows = 0
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                with engine.connect() as conn:
+                    result = conn.execution_options(stream_results=True, yield_per=1000).execute(
+                        text(f'SELECT * FROM "{name}" ORDER BY created_at')
+                    )
+                    for row in result.mappings():
+                        gz.write((json.dumps(dict(row), default=str) + "\n").encode("utf-8"))
+                        rows += 1
+
+            size = tmp.tell()
+            tmp.seek(0)
+            minio_service.upload_file(
+                tmp,
+                ArchiveService.archive_object_name(table_name, start),
+                ArchiveService.CONTENT_TYPE,
+                size
+            )
+
+        # Only drop once the export is safely stored
+        unread: Dict[int, int] = {}
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+            if table_name == "notifications":
+                # Detached: no request can mark these rows read any more
+                unread = ArchiveService._release_unread(conn, name)
+            conn.execute(text(f'DROP TABLE "{name}"'))
+
+        if unread:
+            from app.services.notification_stream import notification_broker
+            for user_id, count in unread.items():
+                notification_broker.publish_unread_delta(user_id, -count)
+
+        return rows
+
+    @staticmethod
+    def _release_unread(conn, name: str) -> Dict[int, int]:
+        """
+        Subtract the unread rows of a detached notifications partition from
+        their users' counters
+
+        Returns:
+            Unread rows removed per user
+        """
+        unread = dict(conn.execute(text(
+            f'SELECT user_id, count(*) FROM "{name}" WHERE NOT is_read GROUP BY user_id'
+        )).all())
+        if unread:
+            conn.execute(
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == bindparam("counter_user_id"))
+                .values(
+                    unread_count=NotificationCounter.unread_count - bindparam("unread"),
+                    updated_at=func.now()
+                ),
+                [{"counter_user_id": user_id, "unread": count} for user_id, count in unread.items()]
+            )
+        return unread
+
+    @staticmethod
+    def query_archive(
+        table_name: str,
+        year: int,
+        month: int,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Read rows from an archived month
+
+        The archive is downloaded and decompressed chunk by chunk; only the
+        `limit` newest matching rows are kept in memory. Blocking: call it
+        from the threadpool.
+
+        Args:
+            table_name: Partitioned table name
+            year: Archive year
+            month: Archive month
+            filters: Column equality filters (None values are ignored)
+            limit: Maximum number of rows
+
+        Returns:
+            Matching rows, newest first
+
+        Raises:
+            ValueError: If the archive does not exist
+        """
+        from app.services.minio_service import minio_service
+
+        object_name = ArchiveService.archive_object_name(table_name, date(year, month, 1))
+        try:
+            chunks = minio_service.iter_file(object_name)
+        except Exception as e:
+            raise ValueError(f"Archive {object_name} not found: {e}")
+
+        active = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        def matches() -> Iterator[Dict[str, Any]]:
+            for line in _gunzip_lines(chunks):
+                if not line:
+                    continue
+                row = json.loads(line)
+                if all(row.get(key) == value for key, value in active.items()):
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    yield row
+
+        return heapq.nlargest(limit, matches(), key=lambda row: row["created_at"])
+
+
+# Singleton instance
+archive_service = ArchiveService()
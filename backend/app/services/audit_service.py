@@ -0,0 +1,361 @@
+"""
+Batched audit-log writer
+
+Audit entries are queued in memory and written with bulk INSERTs by a
+background thread, so user actions no longer pay for a dedicated commit.
+When AUDIT_WAL_PATH is set, each process first appends its entries to its
+own write-ahead file (AUDIT_WAL_PATH.<pid>); files left by processes that
+are gone are replayed by the next worker to start, so entries survive a
+crash. Entries the database keeps rejecting go to a dead-letter file.
+"""
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, text
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import AUDIT_ENTRIES_DEAD_LETTERED
+from app.core.process import process_alive
+from app.models.collaboration import AuditLog
+
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def _row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in entry.items() if key != "attempts"}
+
+
+class AuditLogWriter:
+    """Queues audit entries and flushes them in bulk on size or time thresholds"""
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        wal_path: Optional[str] = None,
+        wal_fsync: bool = False,
+        max_retries: int = 3,
+        max_pending: int = 100000,
+        dead_letter_path: Optional[str] = None
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.wal_path = wal_path or None
+        self.wal_fsync = wal_fsync
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.dead_letter_path = dead_letter_path or (f"{self.wal_path}.dead" if self.wal_path else None)
+
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # A forked worker starts empty: the parent keeps its own queue and WAL
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wal = None
+        self._failures = 0
+
+    # WAL
+
+    @property
+    def _wal_file(self) -> str:
+        return f"{self.wal_path}.{self._pid}"
+
+    def _open_wal(self):
+        if self._wal is None:
+            directory = os.path.dirname(self.wal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._wal = open(self._wal_file, "a", encoding="utf-8")
+        return self._wal
+
+    def _append_wal(self, entry: Dict[str, Any]):
+        wal = self._open_wal()
+        wal.write(json.dumps(entry, default=str) + "\n")
+        wal.flush()
+        if self.wal_fsync:
+            os.fsync(wal.fileno())
+
+    def _rewrite_wal(self):
+        """Compact the WAL to the entries still pending (caller holds _lock)"""
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        tmp_path = f"{self._wal_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for entry in self._pending:
+                tmp.write(json.dumps(entry, default=str) + "\n")
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, self._wal_file)
+
+    def _wal_owner(self, name: str) -> Optional[int]:
+        """
+        PID that wrote a file of the WAL directory, None if it is not a WAL
+
+        The single shared file of earlier versions (AUDIT_WAL_PATH itself)
+        has no owner left and is reported as 0.
+        """
+        base = os.path.basename(self.wal_path)
+        if name == base:
+            return 0
+        if not name.startswith(f"{base}."):
+            return None
+        pid, _, suffix = name[len(base) + 1:].partition(".")
+        if not pid.isdigit() or suffix not in ("", "claimed"):
+            return None
+        return int(pid)
+
+    def recover(self) -> int:
+        """
+        Re-queue entries left in WAL files by processes that are gone
+
+        Called by each worker once it runs, never at import: with gunicorn
+        --preload the master would replay the files and every forked worker
+        would insert the same entries again. Files are claimed with an atomic
+        rename, so two workers starting together never replay the same one.
+
+        Returns:
+            Number of entries re-queued
+        """
+        if not self.wal_path:
+            return 0
+        directory = os.path.dirname(self.wal_path) or "."
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return 0
+
+        claimed = f"{self._wal_file}.claimed"
+        recovered = 0
+        for name in names:
+            owner = self._wal_owner(name)
+            if owner is None:
+                continue
+            path = os.path.join(directory, name)
+            if owner == self._pid:
+                # Left by an earlier process that had our PID, unless it is ours
+                if path == self._wal_file and self._wal is not None:
+                    continue
+            elif owner and process_alive(owner):
+                continue
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Claimed by another worker in the meantime
+                continue
+            entries = list(self._read_wal(claimed))
+            with self._lock:
+                for entry in entries:
+                    self._append_wal(entry)
+                    self._pending.append(entry)
+            os.remove(claimed)
+            if entries:
+                print(f"[AUDIT] Replaying {len(entries)} entries from {path}")
+            recovered += len(entries)
+
+        if recovered:
+            self._ensure_started()
+        return recovered
+
+    @staticmethod
+    def _read_wal(path: str) -> Iterable[Dict[str, Any]]:
+        with open(path, encoding="utf-8") as wal:
+            for line in wal:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-write
+                    continue
+                entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                yield entry
+
+    def _dead_letter(self, entries: List[Dict[str, Any]], reason: str, error: Any):
+        """Set entries aside for manual replay; they are never retried"""
+        AUDIT_ENTRIES_DEAD_LETTERED.labels(reason).inc(len(entries))
+        lines = "".join(
+            json.dumps(dict(_row(entry), error=str(error)), default=str) + "\n"
+            for entry in entries
+        )
+        if not self.dead_letter_path:
+            print(f"[AUDIT ERROR] Dropping {len(entries)} entries ({reason}):\n{lines}", end="")
+            return
+        print(f"[AUDIT ERROR] Moving {len(entries)} entries to {self.dead_letter_path} ({reason}): {error}")
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One append per call: lines from several workers do not interleave
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead:
+            dead.write(lines)
+            dead.flush()
+            os.fsync(dead.fileno())
+
+    # Queue
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def enqueue(
+        self,
+        entity_type: str,
+        entity_id: int,
+        user_id: Optional[int],
+        action: str,
+        changes: Optional[str] = None
+    ):
+        """Queue an audit entry; it is persisted by the next flush"""
+        entry = {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user_id": user_id,
+            "action": action,
+            "changes": changes,
+            "created_at": datetime.utcnow()
+        }
+        with self._lock:
+            if self.wal_path:
+                self._append_wal(entry)
+            self._pending.append(entry)
+            pending = len(self._pending)
+
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _insert(self, entries: List[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), [_row(entry) for entry in entries])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _database_reachable() -> bool:
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """
+        Write every pending entry in one bulk INSERT
+
+        If the database is unreachable the entries stay queued (and in the
+        WAL) and the writer backs off; past max_pending the oldest go to the
+        dead-letter file. If it is reachable but rejects the batch, entries
+        are inserted one by one and those failing max_retries flushes in a
+        row go to the dead-letter file, so one bad entry cannot block the
+        queue.
+
+        Returns:
+            Number of entries written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch: List[Dict[str, Any]] = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            retry: List[Dict[str, Any]] = []
+            written = len(batch)
+            try:
+                self._insert(batch)
+            except Exception as e:
+                print(f"[AUDIT ERROR] Failed to flush {len(batch)} entries: {e}")
+                if not self._database_reachable():
+                    self._failures += 1
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                        overflow = len(self._pending) - self.max_pending
+                        if overflow > 0:
+                            dropped = [self._pending.popleft() for _ in range(overflow)]
+                            self._dead_letter(dropped, "queue_full", e)
+                        if overflow > 0 and self.wal_path:
+                            self._rewrite_wal()
+                    return 0
+
+                written = 0
+                for entry in batch:
+                    try:
+                        self._insert([entry])
+                        written += 1
+                    except Exception as entry_error:
+                        entry["attempts"] = entry.get("attempts", 0) + 1
+                        if entry["attempts"] >= self.max_retries:
+                            self._dead_letter([entry], "rejected", entry_error)
+                        else:
+                            retry.append(entry)
+
+            self._failures = 0
+            with self._lock:
+                # Rejected entries are retried first, at the next flush
+                self._pending.extendleft(reversed(retry))
+                if self.wal_path:
+                    self._rewrite_wal()
+            return written
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._failures:
+                # Database down: wait longer each time, even if the queue is full
+                delay = min(self.flush_interval * 2 ** self._failures, MAX_BACKOFF_SECONDS)
+                self._stopped.wait(delay)
+            else:
+                self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Stop the background thread and flush what is left"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        with self._lock:
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+
+
+# Singleton instance
+audit_writer = AuditLogWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    wal_path=settings.AUDIT_WAL_PATH,
+    wal_fsync=settings.AUDIT_WAL_FSYNC,
+    max_retries=settings.AUDIT_MAX_RETRIES,
+    max_pending=settings.AUDIT_MAX_PENDING,
+    dead_letter_path=settings.AUDIT_DEAD_LETTER_PATH
+)
@@ -1,7 +1,7 @@
 """
 Collaboration service for consultation sharing and comments
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 import json
 from datetime import datetime
@@ -10,6 +10,7 @@ from app.models.collaboration import ConsultationShare, Comment, AuditLog, Share
 from app.models.consultation import Consultation
 from app.models.user import User
 from app.services.notification_service import notification_service
+from app.services.audit_service import audit_writer
 
 
 class CollaborationService:
@@ -75,7 +76,6 @@ class CollaborationService:
         
         # Log action
         CollaborationService.log_action(
-            db=db,
             entity_type="consultation",
             entity_id=consultation_id,
             user_id=shared_by_user_id,
@@ -93,11 +93,26 @@ class CollaborationService:
         db: Session,
         consultation_id: int
     ) -> List[ConsultationShare]:
-        """Get all shares for a consultation"""
-        return db.query(ConsultationShare).filter(
+        """Get all shares for a consultation (recipient eager-loaded)"""
+        return db.query(ConsultationShare).options(
+            joinedload(ConsultationShare.shared_with)
+        ).filter(
             ConsultationShare.consultation_id == consultation_id
         ).all()
     
+    @staticmethod
+    def get_shares_for_user(
+        db: Session,
+        user_id: int
+    ) -> List[ConsultationShare]:
+        """Get all shares received by a user (sharer and recipient eager-loaded)"""
+        return db.query(ConsultationShare).options(
+            joinedload(ConsultationShare.shared_by),
+            joinedload(ConsultationShare.shared_with)
+        ).filter(
+            ConsultationShare.shared_with_user_id == user_id
+        ).all()
+    
     @staticmethod
     def revoke_share(
         db: Session,
@@ -200,10 +215,11 @@ class CollaborationService:
         )
         
         db.add(comment)
-        db.commit()
-        db.refresh(comment)
+        db.flush()
         
-        # Notify consultation owner and other collaborators
+        # Notify consultation owner and other collaborators, in the same
+        # transaction and with a single multi-row INSERT
+        notifications = []
         consultation = db.query(Consultation).filter(
             Consultation.id == consultation_id
         ).first()
@@ -212,29 +228,24 @@ class CollaborationService:
             commenter = db.query(User).filter(User.id == user_id).first()
             commenter_name = commenter.full_name or commenter.email if commenter else "Un utilisateur"
             
-            # Notify doctor if not the commenter
-            if consultation.doctor_id != user_id:
-                notification_service.notify_new_comment(
-                    db=db,
-                    recipient_id=consultation.doctor_id,
-                    commenter_name=commenter_name,
-                    consultation_id=consultation_id
+            recipient_ids = [consultation.doctor_id] + [
+                share_user_id for (share_user_id,) in db.query(ConsultationShare.shared_with_user_id).filter(
+                    ConsultationShare.consultation_id == consultation_id
                 )
-            
-            # Notify other collaborators
-            shares = CollaborationService.get_consultation_shares(db, consultation_id)
-            for share in shares:
-                if share.shared_with_user_id != user_id:
-                    notification_service.notify_new_comment(
-                        db=db,
-                        recipient_id=share.shared_with_user_id,
-                        commenter_name=commenter_name,
-                        consultation_id=consultation_id
-                    )
+            ]
+            notifications = notification_service.notify_new_comment_bulk(
+                db=db,
+                recipient_ids=[rid for rid in recipient_ids if rid != user_id],
+                commenter_name=commenter_name,
+                consultation_id=consultation_id
+            )
+        
+        db.commit()
+        db.refresh(comment)
+        notification_service.publish_created(notifications)
         
         # Log action
         CollaborationService.log_action(
-            db=db,
             entity_type="consultation",
             entity_id=consultation_id,
             user_id=user_id,
@@ -249,8 +260,10 @@ class CollaborationService:
         db: Session,
         consultation_id: int
     ) -> List[Comment]:
-        """Get all comments for a consultation"""
-        return db.query(Comment).filter(
+        """Get all comments for a consultation (authors eager-loaded)"""
+        return db.query(Comment).options(
+            joinedload(Comment.user)
+        ).filter(
             Comment.consultation_id == consultation_id
         ).order_by(Comment.created_at.asc()).all()
     
@@ -288,40 +301,32 @@ class CollaborationService:
     
     @staticmethod
     def log_action(
-        db: Session,
         entity_type: str,
         entity_id: int,
         user_id: int,
         action: str,
         changes: Optional[str] = None
-    ) -> AuditLog:
+    ):
         """
         Log an action for audit trail
         
+        The entry is queued and written in bulk by the audit writer,
+        so it does not add a commit to the caller's request.
+        
         Args:
-            db: Database session
             entity_type: Type of entity (consultation, patient, etc.)
             entity_id: Entity ID
             user_id: User performing action
             action: Action performed
             changes: JSON string of changes
-            
-        Returns:
-            Created audit log
         """
-        log = AuditLog(
+        audit_writer.enqueue(
             entity_type=entity_type,
             entity_id=entity_id,
             user_id=user_id,
             action=action,
             changes=changes
         )
-        
-        db.add(log)
-        db.commit()
-        db.refresh(log)
-        
-        return log
     
     @staticmethod
     def get_audit_logs(
@@ -329,22 +334,28 @@ class CollaborationService:
         entity_type: Optional[str] = None,
         entity_id: Optional[int] = None,
         user_id: Optional[int] = None,
+        since: Optional[datetime] = None,
         limit: int = 100
     ) -> List[AuditLog]:
         """
         Get audit logs with optional filters
         
+        The audit log is eventually consistent: entries queued by any
+        worker appear once its writer flushes (AUDIT_FLUSH_INTERVAL_SECONDS)
+        and, on a replica session, once the replica has caught up.
+        
         Args:
             db: Database session
             entity_type: Filter by entity type
             entity_id: Filter by entity ID
             user_id: Filter by user
+            since: Only logs created at or after this time (prunes old partitions)
             limit: Maximum number of logs
             
         Returns:
             List of audit logs
         """
-        query = db.query(AuditLog)
+        query = db.query(AuditLog).options(joinedload(AuditLog.user))
         
         if entity_type:
             query = query.filter(AuditLog.entity_type == entity_type)
@@ -352,6 +363,8 @@ class CollaborationService:
             query = query.filter(AuditLog.entity_id == entity_id)
         if user_id:
             query = query.filter(AuditLog.user_id == user_id)
+        if since:
+            query = query.filter(AuditLog.created_at >= since)
         
         return query.order_by(AuditLog.created_at.desc()).limit(limit).all()
 
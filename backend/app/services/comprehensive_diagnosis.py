@@ -4,6 +4,17 @@ from app.models.medical import MedicalImage
 from app.models.consultation import MedicalHistory
 from app.services.ai_service import AIService
 
+# Mapping symptômes -> conditions possibles (simplifié)
+SYMPTOM_CONDITIONS: Dict[str, List[str]] = {
+    "fièvre": ["infection", "inflammation"],
+    "toux": ["infection respiratoire", "allergie"],
+    "douleur thoracique": ["problème cardiaque", "problème pulmonaire"],
+    "essoufflement": ["problème cardiaque", "problème pulmonaire"],
+    "maux de tête": ["migraine", "tension", "hypertension"],
+    "fatigue": ["anémie", "infection", "stress"],
+    "nausée": ["problème digestif", "infection"],
+}
+
 
 class ComprehensiveDiagnosisService:
     """Service de diagnostic médical complet basé sur plusieurs sources de données"""
@@ -78,21 +89,10 @@ class ComprehensiveDiagnosisService:
     def _analyze_symptoms(symptoms: List[str]) -> Dict[str, Any]:
         """Analyse des symptômes déclarés"""
         
-        # Mapping symptômes -> conditions possibles (simplifié)
-        symptom_conditions = {
-            "fièvre": ["infection", "inflammation"],
-            "toux": ["infection respiratoire", "allergie"],
-            "douleur thoracique": ["problème cardiaque", "problème pulmonaire"],
-            "essoufflement": ["problème cardiaque", "problème pulmonaire"],
-            "maux de tête": ["migraine", "tension", "hypertension"],
-            "fatigue": ["anémie", "infection", "stress"],
-            "nausée": ["problème digestif", "infection"],
-        }
-        
         possible_conditions = set()
         for symptom in symptoms:
             symptom_lower = symptom.lower()
-            for key, conditions in symptom_conditions.items():
+            for key, conditions in SYMPTOM_CONDITIONS.items():
                 if key in symptom_lower:
                     possible_conditions.update(conditions)
         
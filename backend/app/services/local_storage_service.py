@@ -0,0 +1,93 @@
+"""
+Filesystem stand-in for the MinIO storage service
+
+Used when STORAGE_BACKEND=filesystem (development without MinIO, the
+benchmark harness). Objects are files under STORAGE_LOCAL_PATH/<bucket>/,
+keyed by their object name; the interface matches MinIOService.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from app.core.config import settings
+from app.core.metrics import observe_storage
+
+
+class LocalStorageService:
+    """Object storage on the local filesystem"""
+
+    def __init__(self, root: str):
+        self.bucket_name = settings.MINIO_BUCKET_NAME
+        self.root = Path(root).resolve() / self.bucket_name
+
+    def _path(self, object_name: str) -> Path:
+        path = (self.root / object_name).resolve()
+        if self.root not in path.parents:
+            raise Exception(f"Invalid object name: {object_name}")
+        return path
+
+    @observe_storage("upload")
+    def upload_file(self, file_data: BinaryIO, object_name: str, content_type: str, file_size: int) -> str:
+        """Write the object atomically (readers never see a partial file)"""
+        path = self._path(object_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(file_data, out)
+            os.replace(tmp, path)
+        except Exception as e:
+            os.unlink(tmp)
+            raise Exception(f"Failed to upload file: {e}")
+        return f"{self.bucket_name}/{object_name}"
+
+    @observe_storage("download")
+    def download_file(self, object_name: str) -> bytes:
+        try:
+            return self._path(object_name).read_bytes()
+        except OSError as e:
+            raise Exception(f"Failed to download file: {e}")
+
+    @observe_storage("open")
+    def iter_file(self, object_name: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream a file in chunks (raises at once if it is missing)"""
+        try:
+            handle = open(self._path(object_name), "rb")
+        except OSError as e:
+            raise Exception(f"Failed to download file: {e}")
+
+        def chunks():
+            with handle:
+                while True:
+                    chunk = handle.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        return chunks()
+
+    @observe_storage("delete")
+    def delete_file(self, object_name: str):
+        # S3 semantics: deleting a missing object is not an error
+        try:
+            self._path(object_name).unlink(missing_ok=True)
+        except OSError as e:
+            raise Exception(f"Failed to delete file: {e}")
+
+    @observe_storage("delete_prefix")
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every object under a prefix, returns the number removed"""
+        deleted = 0
+        if not self.root.exists():
+            return deleted
+        for path in self.root.rglob("*"):
+            if path.is_file() and path.relative_to(self.root).as_posix().startswith(prefix):
+                path.unlink()
+                deleted += 1
+        return deleted
+
+    @observe_storage("presign")
+    def get_file_url(self, object_name: str, expires: int = 3600) -> str:
+        return self._path(object_name).as_uri()
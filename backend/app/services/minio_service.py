@@ -1,30 +1,45 @@
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 from app.core.config import settings
+from app.core.metrics import observe_storage
 import io
-from typing import BinaryIO
+import threading
+from typing import BinaryIO, Iterator, Optional
 
 class MinIOService:
     """MinIO storage service for medical images"""
     
     def __init__(self):
-        self.client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
-        )
         self.bucket_name = settings.MINIO_BUCKET_NAME
-        self._ensure_bucket_exists()
+        self._client: Optional[Minio] = None
+        self._lock = threading.Lock()
     
-    def _ensure_bucket_exists(self):
+    @property
+    def client(self) -> Minio:
+        """Client created on first use, so importing the app never waits on MinIO"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    client = Minio(
+                        settings.MINIO_ENDPOINT,
+                        access_key=settings.MINIO_ACCESS_KEY,
+                        secret_key=settings.MINIO_SECRET_KEY,
+                        secure=settings.MINIO_SECURE
+                    )
+                    self._ensure_bucket_exists(client)
+                    self._client = client
+        return self._client
+    
+    def _ensure_bucket_exists(self, client: Minio):
         """Create bucket if it doesn't exist"""
         try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
+            if not client.bucket_exists(self.bucket_name):
+                client.make_bucket(self.bucket_name)
         except S3Error as e:
             print(f"Error creating bucket: {e}")
     
+    @observe_storage("upload")
     def upload_file(self, file_data: BinaryIO, object_name: str, content_type: str, file_size: int) -> str:
         """Upload file to MinIO"""
         try:
@@ -39,17 +54,38 @@ class MinIOService:
         except S3Error as e:
             raise Exception(f"Failed to upload file: {e}")
     
+    @observe_storage("download")
     def download_file(self, object_name: str) -> bytes:
         """Download file from MinIO"""
+        response = None
         try:
             response = self.client.get_object(self.bucket_name, object_name)
             return response.read()
         except S3Error as e:
             raise Exception(f"Failed to download file: {e}")
         finally:
-            response.close()
-            response.release_conn()
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    @observe_storage("open")
+    def iter_file(self, object_name: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream a file from MinIO in chunks (raises at once if it is missing)"""
+        try:
+            response = self.client.get_object(self.bucket_name, object_name)
+        except S3Error as e:
+            raise Exception(f"Failed to download file: {e}")
+        
+        def chunks():
+            try:
+                yield from response.stream(chunk_size)
+            finally:
+                response.close()
+                response.release_conn()
+        
+        return chunks()
     
+    @observe_storage("delete")
     def delete_file(self, object_name: str):
         """Delete file from MinIO"""
         try:
@@ -57,6 +93,25 @@ class MinIOService:
         except S3Error as e:
             raise Exception(f"Failed to delete file: {e}")
     
+    @observe_storage("delete_prefix")
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every object under a prefix, returns the number removed"""
+        try:
+            names = [
+                obj.object_name
+                for obj in self.client.list_objects(self.bucket_name, prefix=prefix, recursive=True)
+            ]
+            errors = list(self.client.remove_objects(
+                self.bucket_name,
+                [DeleteObject(name) for name in names]
+            ))
+            if errors:
+                raise Exception(f"{len(errors)} objects not deleted: {errors[0]}")
+            return len(names)
+        except S3Error as e:
+            raise Exception(f"Failed to delete prefix: {e}")
+    
+    @observe_storage("presign")
     def get_file_url(self, object_name: str, expires: int = 3600) -> str:
         """Get presigned URL for file access"""
         try:
@@ -70,4 +125,8 @@ class MinIOService:
             raise Exception(f"Failed to generate URL: {e}")
 
 # Singleton instance
-minio_service = MinIOService()
+if settings.STORAGE_BACKEND == "filesystem":
+    from app.services.local_storage_service import LocalStorageService
+    minio_service = LocalStorageService(settings.STORAGE_LOCAL_PATH)
+else:
+    minio_service = MinIOService()
@@ -2,14 +2,341 @@
 Notification service for creating and managing notifications
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models.notification import Notification
+from sqlalchemy import delete, exists, func, insert, select, update
+from collections import defaultdict
+from datetime import datetime, timedelta
+import time
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.metrics import NOTIFICATIONS_PRUNED
+from app.models.notification import Notification, NotificationCounter
 from app.models.user import User
+from app.services.notification_stream import notification_broker
 
 
 class NotificationService:
     """Service for managing notifications"""
     
+    # Title of a coalesced row, per type ({count} = events merged)
+    COALESCED_TITLES = {
+        "comment": "{count} nouveaux commentaires",
+        "share": "{count} consultations partagées",
+        "analysis_ready": "{count} analyses IA disponibles",
+    }
+    
+    # Unread counters
+    
+    @staticmethod
+    def _count_unread(db: Session, user_id: int) -> int:
+        """Count unread notifications with a real COUNT(*)"""
+        return db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).count()
+    
+    @staticmethod
+    def _adjust_unread(db: Session, user_id: int, delta: int):
+        """
+        Apply a delta to the user's unread counter in the caller's transaction
+        
+        The first time a user's counter is touched it is seeded from the
+        real count (which already includes the caller's flushed change).
+        """
+        if not delta:
+            return
+        updated = db.query(NotificationCounter).filter(
+            NotificationCounter.user_id == user_id
+        ).update(
+            {NotificationCounter.unread_count: NotificationCounter.unread_count + delta},
+            synchronize_session=False
+        )
+        if updated:
+            return
+        
+        db.flush()
+        NotificationService._set_unread(db, user_id, NotificationService._count_unread(db, user_id), delta)
+    
+    @staticmethod
+    def _adjust_unread_many(db: Session, user_ids: List[int], delta: int):
+        """Apply the same delta to several users' counters in one UPDATE"""
+        if not user_ids or not delta:
+            return
+        db.query(NotificationCounter).filter(
+            NotificationCounter.user_id.in_(user_ids)
+        ).update(
+            {NotificationCounter.unread_count: NotificationCounter.unread_count + delta},
+            synchronize_session=False
+        )
+        existing = {
+            user_id for (user_id,) in db.query(NotificationCounter.user_id).filter(
+                NotificationCounter.user_id.in_(user_ids)
+            )
+        }
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        if missing:
+            db.flush()
+            for user_id in missing:
+                NotificationService._set_unread(db, user_id, NotificationService._count_unread(db, user_id), delta)
+    
+    @staticmethod
+    def _set_unread(db: Session, user_id: int, count: int, delta_on_conflict: Optional[int] = None):
+        """Upsert the user's counter (to `count`, or add a delta if it already exists)"""
+        table = NotificationCounter.__table__
+        stmt = dialect_insert(db, table).values(user_id=user_id, unread_count=count)
+        if delta_on_conflict is None:
+            new_value = stmt.excluded.unread_count
+        else:
+            new_value = table.c.unread_count + delta_on_conflict
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"unread_count": new_value, "updated_at": func.now()}
+        ))
+    
+    @staticmethod
+    def reconcile_unread_counters(db: Session, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Correct drifted counters against the real unread counts
+        
+        Counters are locked (FOR UPDATE) a batch at a time, then recounted
+        in one UPDATE. A writer that changed a locked counter has committed
+        its notification by then, and the UPDATE's snapshot, taken after
+        the lock, sees it, so no concurrent increment is overwritten.
+        
+        Args:
+            db: Database session
+            batch_size: Counters locked and corrected per transaction
+            
+        Returns:
+            Number of counters checked and corrected
+        """
+        batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+        counters = NotificationCounter.__table__
+        
+        # Users with unread notifications but no counter yet
+        missing = select(
+            Notification.user_id, func.count(Notification.id), func.now()
+        ).where(
+            Notification.is_read == False,
+            ~exists().where(counters.c.user_id == Notification.user_id)
+        ).group_by(Notification.user_id)
+        created = db.execute(
+            dialect_insert(db, counters)
+            .from_select(["user_id", "unread_count", "updated_at"], missing)
+            .on_conflict_do_nothing(index_elements=[counters.c.user_id])
+        ).rowcount
+        db.commit()
+        
+        actual = select(func.count(Notification.id)).where(
+            Notification.user_id == counters.c.user_id,
+            Notification.is_read == False
+        ).scalar_subquery()
+        checked = 0
+        corrected = max(created, 0)
+        last_user_id = None
+        while True:
+            batch = select(counters.c.user_id).order_by(counters.c.user_id).limit(batch_size).with_for_update()
+            if last_user_id is not None:
+                batch = batch.where(counters.c.user_id > last_user_id)
+            user_ids = db.scalars(batch).all()
+            if not user_ids:
+                break
+            corrected += db.execute(
+                update(counters)
+                .where(counters.c.user_id.in_(user_ids), counters.c.unread_count != actual)
+                .values(unread_count=actual, updated_at=func.now())
+            ).rowcount
+            db.commit()
+            checked += len(user_ids)
+            last_user_id = user_ids[-1]
+        
+        return {"checked": checked, "corrected": corrected}
+    
+    # Retention
+    
+    @staticmethod
+    def _delete_batch(db: Session, ids: List[int], *criteria) -> int:
+        """Delete one batch of rows by id, re-checking the selection criteria"""
+        return db.execute(
+            delete(Notification).where(Notification.id.in_(ids), *criteria),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+    
+    @staticmethod
+    def prune_notifications(
+        db: Session,
+        read_retention_days: Optional[int] = None,
+        max_unread_per_user: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, float]:
+        """
+        Delete old read notifications and cap unread ones per user
+        
+        Works in batches of `batch_size` rows, each in its own short
+        transaction. Capping drops the user's oldest unread notifications
+        and updates their counter.
+        
+        Args:
+            db: Database session
+            read_retention_days: Age after which read notifications go
+            max_unread_per_user: Unread notifications kept per user (0 = no cap)
+            batch_size: Rows deleted per transaction
+            
+        Returns:
+            Rows pruned, batches and duration of this run
+        """
+        if read_retention_days is None:
+            read_retention_days = settings.NOTIFICATION_READ_RETENTION_DAYS
+        if max_unread_per_user is None:
+            max_unread_per_user = settings.NOTIFICATION_MAX_UNREAD_PER_USER
+        batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+        
+        started = time.monotonic()
+        result = {"read_deleted": 0, "unread_capped": 0, "batches": 0}
+        
+        # Read notifications past retention
+        cutoff = datetime.utcnow() - timedelta(days=read_retention_days)
+        old_read = (Notification.is_read == True, Notification.created_at < cutoff)
+        while True:
+            ids = db.scalars(select(Notification.id).where(*old_read).limit(batch_size)).all()
+            if not ids:
+                break
+            result["read_deleted"] += NotificationService._delete_batch(db, ids, *old_read)
+            result["batches"] += 1
+            db.commit()
+        
+        # Unread overflow, counted on the notifications themselves: a drifted
+        # or missing counter must not hide a user over the cap
+        if max_unread_per_user > 0:
+            over_cap = db.scalars(
+                select(Notification.user_id)
+                .where(Notification.is_read == False)
+                .group_by(Notification.user_id)
+                .having(func.count(Notification.id) > max_unread_per_user)
+            ).all()
+            for user_id in over_cap:
+                capped = 0
+                while True:
+                    ids = db.scalars(
+                        select(Notification.id).where(
+                            Notification.user_id == user_id,
+                            Notification.is_read == False
+                        ).order_by(Notification.created_at.desc(), Notification.id.desc())
+                        .offset(max_unread_per_user).limit(batch_size)
+                    ).all()
+                    if not ids:
+                        break
+                    deleted = NotificationService._delete_batch(db, ids, Notification.is_read == False)
+                    NotificationService._adjust_unread(db, user_id, -deleted)
+                    db.commit()
+                    capped += deleted
+                    result["batches"] += 1
+                if capped:
+                    result["unread_capped"] += capped
+                    notification_broker.publish_unread_delta(user_id, -capped)
+        
+        result["seconds"] = round(time.monotonic() - started, 3)
+        NOTIFICATIONS_PRUNED.labels("read_retention").inc(result["read_deleted"])
+        NOTIFICATIONS_PRUNED.labels("unread_cap").inc(result["unread_capped"])
+        
+        return result
+    
+    # Coalescing and digests
+    
+    @staticmethod
+    def _coalesces(notification_type: str, link: Optional[str]) -> bool:
+        """Whether events of this type merge into a recent unread row"""
+        return (
+            link is not None
+            and settings.NOTIFICATION_COALESCE_WINDOW_SECONDS > 0
+            and notification_type in settings.NOTIFICATION_COALESCE_TYPES
+        )
+    
+    @staticmethod
+    def _deferred(notification_type: str) -> bool:
+        """Whether pushes for this type wait for the next digest"""
+        return (
+            settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS > 0
+            and notification_type in settings.NOTIFICATION_COALESCE_TYPES
+        )
+    
+    @staticmethod
+    def _find_coalescible(
+        db: Session,
+        user_ids: List[int],
+        notification_type: str,
+        link: str
+    ) -> Dict[int, Notification]:
+        """
+        Unread rows with the same type and link touched within the window
+        
+        The window slides: every merge moves `updated_at` forward.
+        
+        Returns:
+            Most recent matching row per user
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+        rows = db.query(Notification).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.type == notification_type,
+            Notification.link == link,
+            Notification.is_read == False,
+            Notification.updated_at >= cutoff
+        ).order_by(Notification.updated_at.desc()).all()
+        
+        latest: Dict[int, Notification] = {}
+        for row in rows:
+            latest.setdefault(row.user_id, row)
+        return latest
+    
+    @staticmethod
+    def _merge(notification: Notification, title: str, message: str):
+        """Fold one more event into an existing unread row"""
+        notification.count = (notification.count or 1) + 1
+        template = NotificationService.COALESCED_TITLES.get(notification.type)
+        if template:
+            notification.title = template.format(count=notification.count)
+        else:
+            notification.title = f"{title} ({notification.count})"
+        notification.message = message
+        notification.updated_at = datetime.utcnow()
+    
+    @staticmethod
+    def publish_digests(db: Session, since: datetime) -> Dict[str, int]:
+        """
+        Push one digest per user with the coalescible notifications
+        created or updated since the previous digest
+        
+        Args:
+            db: Database session
+            since: Start of the digest period
+            
+        Returns:
+            Number of users and notifications pushed
+        """
+        rows = db.query(Notification).filter(
+            Notification.type.in_(settings.NOTIFICATION_COALESCE_TYPES),
+            Notification.is_read == False,
+            Notification.updated_at >= since
+        ).order_by(Notification.updated_at.desc()).all()
+        
+        by_user: Dict[int, List[Notification]] = defaultdict(list)
+        for row in rows:
+            by_user[row.user_id].append(row)
+        if not by_user:
+            return {"users": 0, "notifications": 0}
+        
+        counts = dict(db.query(NotificationCounter.user_id, NotificationCounter.unread_count).filter(
+            NotificationCounter.user_id.in_(list(by_user))
+        ).all())
+        for user_id, notifications in by_user.items():
+            unread = counts.get(user_id)
+            if unread is None:
+                unread = NotificationService._count_unread(db, user_id)
+            notification_broker.publish_digest(user_id, notifications, max(unread, 0))
+        
+        return {"users": len(by_user), "notifications": len(rows)}
+    
     @staticmethod
     def create_notification(
         db: Session,
@@ -22,6 +349,9 @@ class NotificationService:
         """
         Create a new notification
         
+        Coalescible types are merged into the user's matching unread row
+        when there is one in the window (the unread count is unchanged).
+        
         Args:
             db: Database session
             user_id: ID of user to notify
@@ -31,8 +361,20 @@ class NotificationService:
             link: Optional link to navigate to
             
         Returns:
-            Created notification
+            Created (or coalesced) notification
         """
+        # Best effort: two concurrent events may still create two rows
+        if NotificationService._coalesces(notification_type, link):
+            existing = NotificationService._find_coalescible(
+                db, [user_id], notification_type, link
+            ).get(user_id)
+            if existing is not None:
+                NotificationService._merge(existing, title, message)
+                db.commit()
+                db.refresh(existing)
+                NotificationService.publish_created([existing])
+                return existing
+        
         notification = Notification(
             user_id=user_id,
             type=notification_type,
@@ -42,11 +384,94 @@ class NotificationService:
         )
         
         db.add(notification)
+        db.flush()
+        NotificationService._adjust_unread(db, user_id, 1)
         db.commit()
         db.refresh(notification)
         
+        # Push to open streams once the row is committed
+        NotificationService.publish_created([notification])
+        
         return notification
     
+    @staticmethod
+    def create_notifications_bulk(
+        db: Session,
+        user_ids: Iterable[int],
+        notification_type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None
+    ) -> List[Notification]:
+        """
+        Create the same notification for several users in one INSERT
+        
+        Runs inside the caller's transaction and does not commit: call
+        `publish_created` with the result once the caller has committed.
+        The returned objects are detached snapshots. Recipients with a
+        coalescible unread row get that row updated instead.
+        
+        Args:
+            db: Database session
+            user_ids: Recipients
+            notification_type: Type of notification
+            title: Notification title
+            message: Notification message
+            link: Optional link to navigate to
+            
+        Returns:
+            Created and coalesced notifications
+        """
+        recipients = list(dict.fromkeys(user_ids))
+        if not recipients:
+            return []
+        
+        merged: List[Notification] = []
+        if NotificationService._coalesces(notification_type, link):
+            existing = NotificationService._find_coalescible(db, recipients, notification_type, link)
+            for notification in existing.values():
+                NotificationService._merge(notification, title, message)
+            merged = list(existing.values())
+            recipients = [user_id for user_id in recipients if user_id not in existing]
+            if merged:
+                # Same columns on every row: one executemany UPDATE
+                db.flush()
+        
+        notifications = []
+        if recipients:
+            notifications = db.scalars(
+                insert(Notification).returning(Notification),
+                [
+                    {
+                        "user_id": user_id,
+                        "type": notification_type,
+                        "title": title,
+                        "message": message,
+                        "link": link
+                    }
+                    for user_id in recipients
+                ]
+            ).all()
+            NotificationService._adjust_unread_many(db, recipients, 1)
+        
+        # Detach so the caller's commit does not expire them (publishing
+        # would otherwise reload each row)
+        for notification in notifications + merged:
+            db.expunge(notification)
+        
+        return notifications + merged
+    
+    @staticmethod
+    def publish_created(notifications: List[Notification]):
+        """Push committed notifications to open streams (or leave them to the digest)"""
+        for notification in notifications:
+            if NotificationService._deferred(notification.type):
+                continue
+            if (notification.count or 1) > 1:
+                notification_broker.publish_notification_update(notification)
+            else:
+                notification_broker.publish_notification(notification)
+    
     @staticmethod
     def get_user_notifications(
         db: Session,
@@ -78,6 +503,9 @@ class NotificationService:
         """
         Get count of unread notifications for a user
         
+        Reads the materialized counter (O(1)); users without one yet
+        fall back to a real count.
+        
         Args:
             db: Database session
             user_id: User ID
@@ -85,10 +513,12 @@ class NotificationService:
         Returns:
             Count of unread notifications
         """
-        return db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).count()
+        count = db.query(NotificationCounter.unread_count).filter(
+            NotificationCounter.user_id == user_id
+        ).scalar()
+        if count is None:
+            return NotificationService._count_unread(db, user_id)
+        return max(count, 0)
     
     @staticmethod
     def mark_as_read(db: Session, notification_id: int, user_id: int) -> bool:
@@ -111,9 +541,15 @@ class NotificationService:
         if not notification:
             return False
         
+        was_unread = not notification.is_read
         notification.is_read = True
+        if was_unread:
+            NotificationService._adjust_unread(db, user_id, -1)
         db.commit()
         
+        if was_unread:
+            notification_broker.publish_unread_delta(user_id, -1)
+        
         return True
     
     @staticmethod
@@ -133,8 +569,12 @@ class NotificationService:
             Notification.is_read == False
         ).update({"is_read": True})
         
+        # Everything is read now, whatever the counter said
+        NotificationService._set_unread(db, user_id, 0)
         db.commit()
         
+        notification_broker.publish_unread_delta(user_id, -count)
+        
         return count
     
     @staticmethod
@@ -158,9 +598,15 @@ class NotificationService:
         if not notification:
             return False
         
+        was_unread = not notification.is_read
         db.delete(notification)
+        if was_unread:
+            NotificationService._adjust_unread(db, user_id, -1)
         db.commit()
         
+        if was_unread:
+            notification_broker.publish_unread_delta(user_id, -1)
+        
         return True
     
     # Helper methods for specific notification types
@@ -199,6 +645,23 @@ class NotificationService:
             link=f"/consultations/{consultation_id}"
         )
     
+    @staticmethod
+    def notify_new_comment_bulk(
+        db: Session,
+        recipient_ids: Iterable[int],
+        commenter_name: str,
+        consultation_id: int
+    ) -> List[Notification]:
+        """Notify several users of a new comment (caller commits, then publishes)"""
+        return NotificationService.create_notifications_bulk(
+            db=db,
+            user_ids=recipient_ids,
+            notification_type="comment",
+            title="Nouveau commentaire",
+            message=f"{commenter_name} a commenté une consultation",
+            link=f"/consultations/{consultation_id}"
+        )
+    
     @staticmethod
     def notify_analysis_ready(
         db: Session,
@@ -0,0 +1,176 @@
+"""
+Broker for real-time notification push (Server-Sent Events)
+
+Each open stream subscribes a bounded asyncio.Queue for its user. Events
+are published on the event bus (Redis pub/sub across workers, in-memory in
+a single process); every worker listens once and fans out to its local
+streams. Publishing is thread-safe, so sync endpoints running in the
+threadpool can publish right after they commit.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.event_bus import get_event_bus
+
+# Sentinel pushed when a subscriber falls behind; the stream closes and the
+# client reconnects with Last-Event-ID, which replays from the database.
+RESYNC = object()
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class NotificationBroker:
+    """Fans out per-user notification events to local stream subscribers"""
+
+    CHANNEL_PREFIX = "notifications:"
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def _ensure_listening(self):
+        """Subscribe this process to the bus once, on the first local stream"""
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        get_event_bus().subscribe(self.CHANNEL_PREFIX + "*", self._on_bus_event)
+
+    def _on_bus_event(self, channel: str, event: Dict[str, Any]):
+        self.dispatch_local(int(channel[len(self.CHANNEL_PREFIX):]), event)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Register a queue for the calling event loop"""
+        self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: Any):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog and ask the client to reconnect and replay
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    def publish(self, user_id: int, event: Dict[str, Any]):
+        """
+        Publish an event to every stream of `user_id`, in any worker
+
+        Args:
+            user_id: Recipient
+            event: {"event": name, "data": payload, "id": optional event id}
+        """
+        get_event_bus().publish(f"{self.CHANNEL_PREFIX}{user_id}", event)
+
+    def dispatch_local(self, user_id: int, event: Dict[str, Any]):
+        """Deliver an event to the streams of `user_id` open in this process"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    def publish_notification(self, notification):
+        """Publish a newly created notification plus an unread-count delta"""
+        self.publish(notification.user_id, {
+            "event": "notification",
+            "id": event_id(notification),
+            "data": serialize_notification(notification)
+        })
+        self.publish_unread_delta(notification.user_id, 1)
+
+    def publish_notification_update(self, notification):
+        """Publish a notification that absorbed another event (no new unread)"""
+        self.publish(notification.user_id, {
+            "event": "notification_update",
+            "id": event_id(notification),
+            "data": serialize_notification(notification)
+        })
+
+    def publish_digest(self, user_id: int, notifications, unread_count: int):
+        """Publish a batch of notifications together with the absolute unread count"""
+        self.publish(user_id, {
+            "event": "digest",
+            "data": {
+                "notifications": [serialize_notification(n) for n in notifications],
+                "unread_count": unread_count
+            }
+        })
+
+    def publish_unread_delta(self, user_id: int, delta: int):
+        if delta:
+            self.publish(user_id, {"event": "unread_count", "data": {"delta": delta}})
+
+
+def event_id(notification) -> str:
+    """
+    SSE event id of a notification's current state: "<updated_at µs>-<id>"
+
+    Ids follow updated_at rather than the row id, so a client replaying from
+    Last-Event-ID also gets the rows that absorbed events while it was away.
+    """
+    updated_at = notification.updated_at or notification.created_at
+    return f"{(updated_at - _EPOCH) // timedelta(microseconds=1)}-{notification.id}"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[datetime]:
+    """updated_at encoded in an event id, None if `value` is not one"""
+    micros, separator, _ = (value or "").partition("-")
+    if not separator or not micros.isdigit():
+        return None
+    return _EPOCH + timedelta(microseconds=int(micros))
+
+
+def serialize_notification(notification) -> Dict[str, Any]:
+    return {
+        "id": notification.id,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "link": notification.link,
+        "is_read": notification.is_read,
+        "count": notification.count or 1,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        "updated_at": notification.updated_at.isoformat() if notification.updated_at else None
+    }
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an event in the text/event-stream wire format"""
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Singleton instance
+notification_broker = NotificationBroker()
@@ -0,0 +1,142 @@
+"""
+Patient search service (accent-insensitive, ranked, typeahead)
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, case, func
+from typing import List
+
+from app.core.text import normalize_text
+from app.models.medical import Patient
+
+
+class PatientSearchService:
+    """
+    Search patients through the normalized `search_text` column
+
+    On PostgreSQL the column carries a pg_trgm GIN index, so substring and
+    word-prefix LIKE filters are index-backed and results are ranked by
+    trigram similarity. Other dialects (SQLite in tests) use the same
+    filters without similarity ranking.
+    """
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        """Escape LIKE wildcards in user input"""
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @staticmethod
+    def _tokens(term: str) -> List[str]:
+        """Split a search term into escaped, normalized tokens"""
+        return [PatientSearchService._escape_like(t) for t in normalize_text(term).split()]
+
+    @staticmethod
+    def _word_prefix(token: str):
+        """Match `token` at the start of any word of the search document"""
+        return or_(
+            Patient.search_text.like(f"{token}%", escape="\\"),
+            Patient.search_text.like(f"% {token}%", escape="\\")
+        )
+
+    @staticmethod
+    def _is_postgres(db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def search(
+        db: Session,
+        term: str,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Patient]:
+        """
+        Full search: every token must appear somewhere in the patient's
+        name or external ID, ignoring case and accents
+
+        Args:
+            db: Database session
+            term: Raw search input
+            skip: Number of results to skip
+            limit: Maximum number of results
+
+        Returns:
+            Patients ordered by relevance (word-prefix hits first)
+        """
+        tokens = PatientSearchService._tokens(term)
+        if not tokens:
+            return []
+
+        query = db.query(Patient).filter(and_(*[
+            Patient.search_text.like(f"%{token}%", escape="\\") for token in tokens
+        ]))
+
+        prefix_rank = case(
+            (and_(*[PatientSearchService._word_prefix(t) for t in tokens]), 0),
+            else_=1
+        )
+        ordering = [prefix_rank]
+        if PatientSearchService._is_postgres(db):
+            ordering.append(func.similarity(Patient.search_text, normalize_text(term)).desc())
+        ordering.append(Patient.created_at.desc())
+
+        return query.order_by(*ordering).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def typeahead(
+        db: Session,
+        prefix: str,
+        limit: int = 10
+    ) -> List[Patient]:
+        """
+        Typeahead suggestions: every token must start a word
+
+        Args:
+            db: Database session
+            prefix: Partial input from the search box
+            limit: Maximum number of suggestions
+
+        Returns:
+            Matching patients, shortest documents first
+        """
+        tokens = PatientSearchService._tokens(prefix)
+        if not tokens:
+            return []
+
+        query = db.query(Patient).filter(and_(*[
+            PatientSearchService._word_prefix(t) for t in tokens
+        ]))
+
+        if PatientSearchService._is_postgres(db):
+            query = query.order_by(func.similarity(Patient.search_text, normalize_text(prefix)).desc())
+        else:
+            query = query.order_by(func.length(Patient.search_text), Patient.last_name)
+
+        return query.limit(limit).all()
+
+    @staticmethod
+    def reindex(db: Session, batch_size: int = 1000) -> int:
+        """
+        Rebuild `search_text` for patients created before the column existed
+
+        Args:
+            db: Database session
+            batch_size: Rows updated per commit
+
+        Returns:
+            Number of patients reindexed
+        """
+        total = 0
+        while True:
+            patients = db.query(Patient).filter(
+                Patient.search_text.is_(None)
+            ).limit(batch_size).all()
+            if not patients:
+                break
+            for patient in patients:
+                patient.search_text = patient.build_search_text()
+            db.commit()
+            total += len(patients)
+        return total
+
+
+# Singleton instance
+patient_search_service = PatientSearchService()
@@ -0,0 +1,138 @@
+"""
+Bounded process pool for PDF rendering
+
+ReportLab layout is pure-Python CPU work; rendering in the API process
+would hold the GIL and stall every other request on the worker. Renders
+run in a small process pool instead and receive plain data, never ORM
+objects: dicts built by pdf_service.*_report_data, or just the patient id
+for dossiers, which the worker streams from the database itself. When
+PDF_RENDER_MAX_PENDING renders are already running or queued, new ones
+are refused with 429.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+def _warm_up():
+    """Import ReportLab, build the styles and register every model once per worker"""
+    import app.models.analysis  # noqa: F401
+    import app.models.collaboration  # noqa: F401
+    import app.models.consultation  # noqa: F401
+    import app.models.medical  # noqa: F401
+    import app.models.notification  # noqa: F401
+    import app.models.report  # noqa: F401
+    import app.models.scheduler  # noqa: F401
+    import app.models.user  # noqa: F401
+    import app.services.pdf_service  # noqa: F401
+
+
+class PDFRenderPool:
+    """Runs render functions in worker processes with admission control"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs threads (event bus,
+                # audit writer) can copy held locks into the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up
+                )
+            return self._executor
+
+    def submit(self, func: Callable[..., Any], *args) -> Future:
+        """
+        Queue a render, or refuse it when the pool is saturated
+
+        Raises:
+            HTTPException: 429 with Retry-After when saturated
+        """
+        # Imported here, not at module level: render processes import this module
+        from app.core.metrics import PDF_RENDER_SECONDS, PDF_RENDERS_PENDING, PDF_RENDERS_REJECTED
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                PDF_RENDERS_REJECTED.inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Trop de rapports en cours de génération, veuillez réessayer",
+                    headers={"Retry-After": str(settings.PDF_RENDER_RETRY_AFTER_SECONDS)},
+                )
+            self.pending += 1
+        PDF_RENDERS_PENDING.inc()
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            PDF_RENDERS_PENDING.dec()
+            raise
+
+        def _done(f: Future):
+            elapsed = time.perf_counter() - started
+            failed = f.cancelled() or f.exception() is not None
+            with self._lock:
+                self.pending -= 1
+                if not failed:
+                    self.completed += 1
+                    self.total_seconds += elapsed
+                else:
+                    self.failed += 1
+            PDF_RENDERS_PENDING.dec()
+            PDF_RENDER_SECONDS.labels(func.__name__, "error" if failed else "ok").observe(elapsed)
+
+        future.add_done_callback(_done)
+        return future
+
+    async def render(self, func: Callable[..., Any], *args) -> Any:
+        """Render without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def render_blocking(self, func: Callable[..., Any], *args) -> Any:
+        """Render from a background thread"""
+        return self.submit(func, *args).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "queue_depth": max(self.pending - self.workers, 0),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_ms": round(1000 * self.total_seconds / self.completed, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+pdf_render_pool = PDFRenderPool(settings.PDF_RENDER_WORKERS, settings.PDF_RENDER_MAX_PENDING)
@@ -9,12 +9,34 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
 
-from app.models.consultation import Consultation
+from app.models.consultation import Consultation, MedicalHistory
 from app.models.medical import Patient, MedicalImage
-from app.models.user import User
+
+
+class _LazyFlowables(list):
+    """
+    Liste consommée par doc.build, réalimentée depuis un générateur
+    
+    build() retire les éléments en tête et consulte len() à chaque tour :
+    on garde ainsi seulement une petite fenêtre d'éléments en mémoire.
+    """
+    
+    def __init__(self, source: Iterable, lookahead: int = 64):
+        super().__init__()
+        self._source = iter(source)
+        self._lookahead = lookahead
+    
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
 
 
 class PDFReportService:
@@ -73,19 +95,16 @@ class PDFReportService:
         elements.append(line_table)
         elements.append(Spacer(1, 0.5*cm))
     
-    def _add_patient_info(self, elements: list, patient: Patient):
+    def _add_patient_info(self, elements: list, patient: dict):
         """Ajoute les informations du patient"""
         elements.append(Paragraph("Informations Patient", self.styles['CustomHeading']))
         
-        # Construct full name from first_name and last_name
-        full_name = f"{patient.first_name} {patient.last_name}"
-        
         data = [
-            ['Nom complet:', full_name],
-            ['Date de naissance:', patient.date_of_birth.strftime('%d/%m/%Y') if patient.date_of_birth else 'Non renseignée'],
-            ['Sexe:', patient.gender or 'Non renseigné'],
-            ['Téléphone:', patient.phone or 'Non renseigné'],
-            ['Email:', patient.email or 'Non renseigné'],
+            ['Nom complet:', patient['full_name']],
+            ['Date de naissance:', patient['date_of_birth'] or 'Non renseignée'],
+            ['Sexe:', patient['gender'] or 'Non renseigné'],
+            ['Téléphone:', patient['phone'] or 'Non renseigné'],
+            ['Email:', patient['email'] or 'Non renseigné'],
         ]
         
         table = Table(data, colWidths=[5*cm, 13*cm])
@@ -105,45 +124,45 @@ class PDFReportService:
         elements.append(table)
         elements.append(Spacer(1, 0.5*cm))
     
-    def _add_consultation_details(self, elements: list, consultation: Consultation):
+    def _add_consultation_details(self, elements: list, consultation: dict):
         """Ajoute les détails de la consultation"""
         elements.append(Paragraph("Détails de la Consultation", self.styles['CustomHeading']))
         
         # Date et motif
         elements.append(Paragraph(
-            f"<b>Date:</b> {consultation.consultation_date.strftime('%d/%m/%Y à %H:%M') if consultation.consultation_date else consultation.created_at.strftime('%d/%m/%Y à %H:%M')}",
+            f"<b>Date:</b> {consultation['date']}",
             self.styles['CustomBody']
         ))
         elements.append(Paragraph(
-            f"<b>Motif:</b> {consultation.chief_complaint or 'Non spécifié'}",
+            f"<b>Motif:</b> {consultation['chief_complaint'] or 'Non spécifié'}",
             self.styles['CustomBody']
         ))
         elements.append(Spacer(1, 0.3*cm))
         
         # Diagnostic
-        if consultation.diagnosis:
+        if consultation['diagnosis']:
             elements.append(Paragraph("<b>Diagnostic:</b>", self.styles['CustomBody']))
-            elements.append(Paragraph(consultation.diagnosis, self.styles['CustomBody']))
+            elements.append(Paragraph(consultation['diagnosis'], self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*cm))
         
         # Plan de traitement
-        if consultation.treatment_plan:
+        if consultation['treatment_plan']:
             elements.append(Paragraph("<b>Plan de Traitement:</b>", self.styles['CustomBody']))
-            elements.append(Paragraph(consultation.treatment_plan, self.styles['CustomBody']))
+            elements.append(Paragraph(consultation['treatment_plan'], self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*cm))
         
         # Notes
-        if consultation.notes:
+        if consultation['notes']:
             elements.append(Paragraph("<b>Notes:</b>", self.styles['CustomBody']))
-            elements.append(Paragraph(consultation.notes, self.styles['CustomBody']))
+            elements.append(Paragraph(consultation['notes'], self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*cm))
     
-    def _add_diagnosis(self, elements: list, consultation: Consultation):
+    def _add_diagnosis(self, elements: list, consultation: dict):
         """Ajoute le diagnostic IA si disponible"""
         # Skip if no AI diagnosis available
         return
     
-    def _add_footer(self, elements: list, doctor: User):
+    def _add_footer(self, elements: list, doctor_name: str):
         """Ajoute le pied de page avec signature"""
         elements.append(Spacer(1, 1*cm))
         
@@ -157,7 +176,7 @@ class PDFReportService:
         
         # Signature
         elements.append(Paragraph(
-            f"<b>Médecin:</b> Dr. {doctor.full_name or doctor.email}",
+            f"<b>Médecin:</b> Dr. {doctor_name}",
             self.styles['CustomBody']
         ))
         
@@ -167,22 +186,60 @@ class PDFReportService:
             self.styles['Normal']
         ))
     
-    def generate_consultation_report(
-        self,
-        db: Session,
-        consultation_id: int
-    ) -> BytesIO:
+    @staticmethod
+    def _new_document(buffer: BytesIO) -> SimpleDocTemplate:
+        return SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm
+        )
+    
+    # Données sérialisables (lues en base, rendues ailleurs)
+    
+    @staticmethod
+    def patient_data(patient: Patient) -> dict:
+        return {
+            'full_name': f"{patient.first_name} {patient.last_name}",
+            'date_of_birth': patient.date_of_birth.strftime('%d/%m/%Y') if patient.date_of_birth else None,
+            'gender': patient.gender,
+            'phone': patient.phone,
+            'email': patient.email,
+        }
+    
+    @staticmethod
+    def consultation_data(consultation: Consultation) -> dict:
+        when = consultation.consultation_date or consultation.created_at
+        return {
+            'date': when.strftime('%d/%m/%Y à %H:%M') if when else 'Non renseignée',
+            'day': when.strftime('%d/%m/%Y') if when else 'Non renseignée',
+            'chief_complaint': consultation.chief_complaint,
+            'diagnosis': consultation.diagnosis,
+            'treatment_plan': consultation.treatment_plan,
+            'notes': consultation.notes,
+        }
+    
+    @staticmethod
+    def history_data(history: MedicalHistory) -> dict:
+        return {
+            'condition': history.condition,
+            'status': history.status,
+            'notes': history.notes,
+        }
+    
+    def consultation_report_data(self, db: Session, consultation_id: int) -> dict:
         """
-        Génère un rapport PDF pour une consultation
+        Rassemble les données d'un rapport de consultation
         
         Args:
             db: Session de base de données
             consultation_id: ID de la consultation
             
         Returns:
-            BytesIO contenant le PDF
+            Dictionnaire sérialisable pour render_consultation_report
         """
-        # Récupérer la consultation
         consultation = db.query(Consultation).filter(
             Consultation.id == consultation_id
         ).first()
@@ -190,16 +247,101 @@ class PDFReportService:
         if not consultation:
             raise ValueError(f"Consultation {consultation_id} non trouvée")
         
-        # Créer le buffer PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
+        return self._consultation_report_dict(consultation)
+    
+    def consultation_reports_data(self, db: Session, consultation_ids: List[int]) -> Dict[int, dict]:
+        """
+        Rassemble les données de plusieurs rapports en une seule requête
+        
+        Patient et médecin sont chargés par jointure, sans requête par
+        consultation.
+        
+        Args:
+            db: Session de base de données
+            consultation_ids: IDs des consultations
+            
+        Returns:
+            Dictionnaire {ID de consultation: données pour render_consultation_report}
+        """
+        consultations = db.query(Consultation).options(
+            joinedload(Consultation.patient),
+            joinedload(Consultation.doctor)
+        ).filter(Consultation.id.in_(consultation_ids)).all()
+        
+        return {c.id: self._consultation_report_dict(c) for c in consultations}
+    
+    def _consultation_report_dict(self, consultation: Consultation) -> dict:
+        return {
+            'patient': self.patient_data(consultation.patient),
+            'consultation': self.consultation_data(consultation),
+            'doctor_name': consultation.doctor.full_name or consultation.doctor.email,
+        }
+    
+    def patient_report_header_data(self, db: Session, patient_id: int) -> dict:
+        """
+        Rassemble l'en-tête du dossier d'un patient (sans les consultations)
+        
+        Args:
+            db: Session de base de données
+            patient_id: ID du patient
+            
+        Returns:
+            Dictionnaire sérialisable pour render_patient_report
+        """
+        patient = db.query(Patient).filter(Patient.id == patient_id).first()
+        
+        if not patient:
+            raise ValueError(f"Patient {patient_id} non trouvé")
+        
+        return {
+            'patient': self.patient_data(patient),
+            'history': [self.history_data(h) for h in patient.medical_history_entries],
+            'consultation_count': db.query(func.count(Consultation.id)).filter(
+                Consultation.patient_id == patient_id
+            ).scalar(),
+        }
+    
+    def iter_patient_consultations(
+        self,
+        db: Session,
+        patient_id: int,
+        batch_size: int = 200
+    ) -> Iterator[dict]:
+        """
+        Parcourt les consultations d'un patient par lots (yield_per)
+        
+        Seules les colonnes du dossier sont lues ; la mémoire reste
+        bornée par la taille du lot.
+        """
+        rows = db.execute(
+            select(
+                Consultation.consultation_date,
+                Consultation.created_at,
+                Consultation.chief_complaint,
+                Consultation.diagnosis
+            ).where(Consultation.patient_id == patient_id)
+            .order_by(Consultation.created_at.desc())
+            .execution_options(yield_per=batch_size)
         )
+        for row in rows:
+            when = row.consultation_date or row.created_at
+            yield {
+                'day': when.strftime('%d/%m/%Y') if when else 'Non renseignée',
+                'chief_complaint': row.chief_complaint,
+                'diagnosis': row.diagnosis,
+            }
+    
+    # Rendu (sans accès base, exécutable dans un autre processus)
+    
+    def render_consultation_report(self, data: dict) -> bytes:
+        """
+        Génère le PDF d'une consultation à partir de consultation_report_data
+        
+        Returns:
+            Contenu du PDF
+        """
+        buffer = BytesIO()
+        doc = self._new_document(buffer)
         
         # Éléments du document
         elements = []
@@ -212,59 +354,25 @@ class PDFReportService:
         )
         
         # Informations patient
-        self._add_patient_info(elements, consultation.patient)
+        self._add_patient_info(elements, data['patient'])
         
         # Détails consultation
-        self._add_consultation_details(elements, consultation)
+        self._add_consultation_details(elements, data['consultation'])
         
         # Diagnostic IA
-        self._add_diagnosis(elements, consultation)
+        self._add_diagnosis(elements, data['consultation'])
         
         # Pied de page
-        self._add_footer(elements, consultation.doctor)
+        self._add_footer(elements, data['doctor_name'])
         
         # Générer le PDF
         doc.build(elements)
-        buffer.seek(0)
-        
-        return buffer
+        return buffer.getvalue()
     
-    def generate_patient_report(
-        self,
-        db: Session,
-        patient_id: int
-    ) -> BytesIO:
-        """
-        Génère un rapport PDF complet pour un patient (historique)
-        
-        Args:
-            db: Session de base de données
-            patient_id: ID du patient
-            
-        Returns:
-            BytesIO contenant le PDF
-        """
-        # Récupérer le patient
-        patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        
-        if not patient:
-            raise ValueError(f"Patient {patient_id} non trouvé")
-        
-        # Créer le buffer PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        # Éléments du document
-        elements = []
-        
+    def _patient_report_flowables(self, data: dict, consultations: Iterable[dict]) -> Iterator:
+        """Produit les éléments du dossier au fil des consultations"""
         # En-tête
+        elements = []
         self._add_header(
             elements,
             "DOSSIER MÉDICAL PATIENT",
@@ -272,74 +380,153 @@ class PDFReportService:
         )
         
         # Informations patient
-        self._add_patient_info(elements, patient)
+        self._add_patient_info(elements, data['patient'])
         
         # Antécédents médicaux
-        if patient.medical_histories:
+        if data['history']:
             elements.append(Paragraph("Antécédents Médicaux", self.styles['CustomHeading']))
-            for history in patient.medical_histories:
-                if history.conditions:
-                    elements.append(Paragraph("<b>Conditions:</b>", self.styles['CustomBody']))
-                    for condition in history.conditions:
-                        elements.append(Paragraph(f"• {condition}", self.styles['CustomBody']))
-                
-                if history.allergies:
-                    elements.append(Paragraph("<b>Allergies:</b>", self.styles['CustomBody']))
-                    for allergy in history.allergies:
-                        elements.append(Paragraph(f"• {allergy}", self.styles['CustomBody']))
-                
-                if history.medications:
-                    elements.append(Paragraph("<b>Médicaments:</b>", self.styles['CustomBody']))
-                    for med in history.medications:
-                        elements.append(Paragraph(f"• {med}", self.styles['CustomBody']))
+            for history in data['history']:
+                line = f"• {history['condition']}"
+                if history['status']:
+                    line += f" ({history['status']})"
+                if history['notes']:
+                    line += f" - {history['notes']}"
+                elements.append(Paragraph(line, self.styles['CustomBody']))
             
             elements.append(Spacer(1, 0.5*cm))
+        yield from elements
         
         # Consultations
-        consultations = db.query(Consultation).filter(
-            Consultation.patient_id == patient_id
-        ).order_by(Consultation.created_at.desc()).all()
+        total = data['consultation_count']
         
-        if consultations:
-            elements.append(Paragraph(
-                f"Historique des Consultations ({len(consultations)} consultations)",
+        if total:
+            yield Paragraph(
+                f"Historique des Consultations ({total} consultations)",
                 self.styles['CustomHeading']
-            ))
+            )
             
             for i, consultation in enumerate(consultations, 1):
-                elements.append(Paragraph(
-                    f"<b>Consultation #{i} - {consultation.consultation_date.strftime('%d/%m/%Y') if consultation.consultation_date else consultation.created_at.strftime('%d/%m/%Y')}</b>",
+                yield Paragraph(
+                    f"<b>Consultation #{i} - {consultation['day']}</b>",
                     self.styles['CustomBody']
-                ))
+                )
                 
-                if consultation.chief_complaint:
-                    elements.append(Paragraph(f"Motif: {consultation.chief_complaint}", self.styles['CustomBody']))
+                if consultation['chief_complaint']:
+                    yield Paragraph(f"Motif: {consultation['chief_complaint']}", self.styles['CustomBody'])
                 
-                if consultation.diagnosis:
-                    elements.append(Paragraph(
-                        f"Diagnostic: {consultation.diagnosis}",
+                if consultation['diagnosis']:
+                    yield Paragraph(
+                        f"Diagnostic: {consultation['diagnosis']}",
                         self.styles['CustomBody']
-                    ))
+                    )
                 
-                elements.append(Spacer(1, 0.3*cm))
+                yield Spacer(1, 0.3*cm)
                 
                 # Page break après chaque 2 consultations pour lisibilité
-                if i % 2 == 0 and i < len(consultations):
-                    elements.append(PageBreak())
+                if i % 2 == 0 and i < total:
+                    yield PageBreak()
         
         # Pied de page
-        elements.append(Spacer(1, 1*cm))
-        elements.append(Paragraph(
+        yield Spacer(1, 1*cm)
+        yield Paragraph(
             f"<i>Rapport généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}</i>",
             self.styles['Normal']
+        )
+    
+    def render_patient_report(self, data: dict, consultations: Iterable[dict], output: BinaryIO):
+        """
+        Génère le PDF du dossier patient dans `output`
+        
+        Les éléments sont produits au fur et à mesure de la mise en page,
+        page par page, au lieu d'une liste complète en mémoire.
+        
+        Args:
+            data: Résultat de patient_report_header_data
+            consultations: Consultations (voir iter_patient_consultations)
+            output: Fichier binaire de destination
+        """
+        doc = self._new_document(output)
+        doc.build(_LazyFlowables(self._patient_report_flowables(data, consultations)))
+    
+    def generate_consultation_report(
+        self,
+        db: Session,
+        consultation_id: int
+    ) -> BytesIO:
+        """
+        Génère un rapport PDF pour une consultation
+        
+        Args:
+            db: Session de base de données
+            consultation_id: ID de la consultation
+            
+        Returns:
+            BytesIO contenant le PDF
+        """
+        return BytesIO(self.render_consultation_report(
+            self.consultation_report_data(db, consultation_id)
         ))
+    
+    def generate_patient_report(
+        self,
+        db: Session,
+        patient_id: int
+    ) -> BytesIO:
+        """
+        Génère un rapport PDF complet pour un patient (historique)
         
-        # Générer le PDF
-        doc.build(elements)
+        Args:
+            db: Session de base de données
+            patient_id: ID du patient
+            
+        Returns:
+            BytesIO contenant le PDF
+        """
+        buffer = BytesIO()
+        self.render_patient_report(
+            self.patient_report_header_data(db, patient_id),
+            self.iter_patient_consultations(db, patient_id),
+            buffer
+        )
         buffer.seek(0)
-        
         return buffer
 
 
 # Instance singleton
 pdf_service = PDFReportService()
+
+
+# Points d'entrée picklables pour le pool de rendu
+
+def render_consultation_pdf(data: dict) -> bytes:
+    return pdf_service.render_consultation_report(data)
+
+
+def render_consultation_pdfs(data: List[dict]) -> List[bytes]:
+    """Rend un lot de rapports en une seule tâche (exports groupés)"""
+    return [pdf_service.render_consultation_report(d) for d in data]
+
+
+def render_patient_pdf_file(patient_id: int, path: str, batch_size: int = 200) -> int:
+    """
+    Écrit le dossier d'un patient dans `path` depuis un processus de rendu
+    
+    Le processus lit lui-même les consultations par lots, seul l'ID du
+    patient transite entre les processus.
+    
+    Returns:
+        Taille du fichier en octets
+    """
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        data = pdf_service.patient_report_header_data(db, patient_id)
+        with open(path, 'wb') as output:
+            pdf_service.render_patient_report(
+                data,
+                pdf_service.iter_patient_consultations(db, patient_id, batch_size),
+                output
+            )
+            return output.tell()
+    finally:
+        db.close()
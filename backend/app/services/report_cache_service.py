@@ -0,0 +1,295 @@
+"""
+Object-storage cache for generated PDF reports
+
+Reports are stored under a key derived from the data they show, so an
+edit naturally leads to a new key:
+
+    {REPORT_CACHE_PREFIX}/consultations/{id}/{fingerprint}.pdf
+    {REPORT_CACHE_PREFIX}/patients/{id}/{fingerprint}.pdf
+
+Committed changes to consultations, patients and medical history delete
+the affected prefixes in the background (and optionally pre-render the new
+consultation report), so stale files do not pile up. The key is read again
+after rendering and the PDF is only stored if it did not change: a render
+that raced with an edit may show the old state.
+"""
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterator, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.consultation import Consultation, MedicalHistory
+from app.models.medical import Patient
+from app.services.pdf_render_pool import pdf_render_pool
+
+
+def _stream_and_delete(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    try:
+        with open(path, "rb") as pdf:
+            while chunk := pdf.read(chunk_size):
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+def _fingerprint(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+
+class ReportCacheService:
+    """Service for cached report retrieval and invalidation"""
+
+    CONTENT_TYPE = "application/pdf"
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _background(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-cache")
+        return self._executor
+
+    # Keys
+
+    @staticmethod
+    def consultation_prefix(consultation_id: int) -> str:
+        return f"{settings.REPORT_CACHE_PREFIX}/consultations/{consultation_id}/"
+
+    @staticmethod
+    def patient_prefix(patient_id: int) -> str:
+        return f"{settings.REPORT_CACHE_PREFIX}/patients/{patient_id}/"
+
+    @staticmethod
+    def consultation_key(db: Session, consultation_id: int) -> Optional[str]:
+        """Cache key for the current state of a consultation, None if it does not exist"""
+        row = db.execute(
+            select(
+                Consultation.updated_at,
+                Consultation.created_at,
+                Patient.updated_at,
+                Patient.created_at
+            ).join(Patient, Patient.id == Consultation.patient_id)
+            .where(Consultation.id == consultation_id)
+        ).first()
+        if row is None:
+            return None
+        return ReportCacheService.consultation_prefix(consultation_id) + _fingerprint(*row) + ".pdf"
+
+    @staticmethod
+    def patient_key(db: Session, patient_id: int) -> Optional[str]:
+        """
+        Cache key for a patient dossier, None if the patient does not exist
+
+        Counts are part of the fingerprint so deletions change it too.
+        """
+        consultations = select(
+            func.count(Consultation.id),
+            func.max(func.coalesce(Consultation.updated_at, Consultation.created_at))
+        ).where(Consultation.patient_id == patient_id)
+        history = select(
+            func.count(MedicalHistory.id),
+            func.max(MedicalHistory.created_at)
+        ).where(MedicalHistory.patient_id == patient_id)
+
+        patient = db.execute(
+            select(Patient.updated_at, Patient.created_at).where(Patient.id == patient_id)
+        ).first()
+        if patient is None:
+            return None
+        parts = (*patient, *db.execute(consultations).one(), *db.execute(history).one())
+        return ReportCacheService.patient_prefix(patient_id) + _fingerprint(*parts) + ".pdf"
+
+    # Storage
+
+    @staticmethod
+    def _load(key: str) -> Optional[bytes]:
+        from app.services.minio_service import minio_service
+        try:
+            return minio_service.download_file(key)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _store(key: str, pdf: bytes):
+        from io import BytesIO
+        from app.services.minio_service import minio_service
+        try:
+            minio_service.upload_file(BytesIO(pdf), key, ReportCacheService.CONTENT_TYPE, len(pdf))
+        except Exception as e:
+            # A cache write failure must not fail the download
+            print(f"[REPORT CACHE] Could not store {key}: {e}")
+
+    @staticmethod
+    def _open_cached(key: str) -> Optional[Iterator[bytes]]:
+        from app.services.minio_service import minio_service
+        try:
+            return minio_service.iter_file(key)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _store_file(key: str, path: str, size: int):
+        from app.services.minio_service import minio_service
+        with open(path, "rb") as pdf:
+            try:
+                minio_service.upload_file(pdf, key, ReportCacheService.CONTENT_TYPE, size)
+            except Exception as e:
+                print(f"[REPORT CACHE] Could not store {key}: {e}")
+
+    # Reports
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        return self._load(key) if settings.REPORT_CACHE_ENABLED else None
+
+    def _save(self, key: str, pdf: bytes):
+        if settings.REPORT_CACHE_ENABLED:
+            self._store(key, pdf)
+
+    async def get_consultation_report(self, db: Session, consultation_id: int) -> bytes:
+        """
+        Consultation report PDF, from the cache when up to date
+
+        Queries and storage calls are blocking: they run in the threadpool,
+        never on the event loop.
+
+        Raises:
+            ValueError: If the consultation does not exist
+            HTTPException: 429 when the render pool is saturated
+        """
+        # ReportLab is imported on the first report, not at app import
+        from app.services.pdf_service import pdf_service, render_consultation_pdf
+
+        key = await run_in_threadpool(self.consultation_key, db, consultation_id)
+        if key is None:
+            raise ValueError(f"Consultation {consultation_id} non trouvée")
+        cached = await run_in_threadpool(self._lookup, key)
+        if cached is not None:
+            return cached
+
+        data = await run_in_threadpool(pdf_service.consultation_report_data, db, consultation_id)
+        pdf = await pdf_render_pool.render(render_consultation_pdf, data)
+        if await run_in_threadpool(self.consultation_key, db, consultation_id) == key:
+            await run_in_threadpool(self._save, key, pdf)
+        return pdf
+
+    async def open_patient_report(self, db: Session, patient_id: int) -> Iterator[bytes]:
+        """
+        Patient dossier PDF as a stream of chunks, from the cache when up to date
+
+        On a miss the dossier is rendered to a temporary file by the render
+        pool, stored, then streamed from disk; it is never held in memory.
+        Queries and storage calls run in the threadpool.
+
+        Raises:
+            ValueError: If the patient does not exist
+            HTTPException: 429 when the render pool is saturated
+        """
+        from app.services.pdf_service import render_patient_pdf_file
+
+        key = await run_in_threadpool(self.patient_key, db, patient_id)
+        if key is None:
+            raise ValueError(f"Patient {patient_id} non trouvé")
+        if settings.REPORT_CACHE_ENABLED:
+            cached = await run_in_threadpool(self._open_cached, key)
+            if cached is not None:
+                return cached
+
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            size = await pdf_render_pool.render(
+                render_patient_pdf_file, patient_id, path, settings.PDF_DOSSIER_BATCH_SIZE
+            )
+            if settings.REPORT_CACHE_ENABLED and await run_in_threadpool(self.patient_key, db, patient_id) == key:
+                await run_in_threadpool(self._store_file, key, path, size)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return _stream_and_delete(path)
+
+    # Invalidation
+
+    def invalidate(self, consultation_ids: Set[int], patient_ids: Set[int]):
+        """Drop cached reports for these consultations and patients"""
+        from app.services.minio_service import minio_service
+        prefixes = [self.consultation_prefix(i) for i in consultation_ids]
+        prefixes += [self.patient_prefix(i) for i in patient_ids]
+        for prefix in prefixes:
+            try:
+                minio_service.delete_prefix(prefix)
+            except Exception as e:
+                print(f"[REPORT CACHE] Could not invalidate {prefix}: {e}")
+
+    def prerender(self, consultation_ids: Set[int]):
+        """Render and store the current consultation reports"""
+        from app.core.database import SessionLocal
+        from app.services.pdf_service import pdf_service, render_consultation_pdf
+        db = SessionLocal()
+        try:
+            for consultation_id in consultation_ids:
+                key = self.consultation_key(db, consultation_id)
+                if key is None:
+                    continue
+                data = pdf_service.consultation_report_data(db, consultation_id)
+                try:
+                    pdf = pdf_render_pool.render_blocking(render_consultation_pdf, data)
+                except HTTPException:
+                    # Pool busy with user requests: they come first
+                    return
+                if self.consultation_key(db, consultation_id) == key:
+                    self._store(key, pdf)
+        finally:
+            db.close()
+
+    def _refresh(self, consultation_ids: Set[int], patient_ids: Set[int]):
+        self.invalidate(consultation_ids, patient_ids)
+        if settings.REPORT_PRERENDER:
+            self.prerender(consultation_ids)
+
+    def schedule_refresh(self, consultation_ids: Set[int], patient_ids: Set[int]):
+        """Invalidate (and optionally pre-render) off the request path"""
+        if settings.REPORT_CACHE_ENABLED and (consultation_ids or patient_ids):
+            self._background().submit(self._refresh, consultation_ids, patient_ids)
+
+
+# Singleton instance
+report_cache_service = ReportCacheService()
+
+
+_PENDING_KEY = "report_cache_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_report_changes(session: Session, flush_context):
+    """Remember which reports the flushed changes affect"""
+    pending: Tuple[Set[int], Set[int]] = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    consultation_ids, patient_ids = pending
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Consultation):
+            consultation_ids.add(obj.id)
+            patient_ids.add(obj.patient_id)
+        elif isinstance(obj, Patient):
+            patient_ids.add(obj.id)
+            consultation_ids.update(c.id for c in obj.__dict__.get("consultations", ()))
+        elif isinstance(obj, MedicalHistory):
+            patient_ids.add(obj.patient_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_reports(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        report_cache_service.schedule_refresh(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_report_changes(session: Session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,282 @@
+"""
+Bulk export of consultation reports as a ZIP in object storage
+
+A job is created with a filter (doctor, date range, patients) and runs in
+the background of the worker that accepted it. Consultations are read in
+batches of REPORT_EXPORT_BATCH_SIZE with patient and doctor joined, each
+batch is rendered as one task on the PDF render pool (several batches in
+flight), and the PDFs are appended to a ZIP on disk as they arrive. The
+finished archive is uploaded under {REPORT_EXPORT_PREFIX}/ and kept for
+REPORT_EXPORT_RETENTION_HOURS. Progress is stored on the job row, so any
+worker can report it.
+
+A job dies with its worker. The row records the host and PID that own it,
+and a worker starting on that host fails the jobs of processes that are
+gone, instead of leaving them pending or running until they are purged.
+"""
+import os
+import socket
+import tempfile
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.process import process_alive
+from app.models.consultation import Consultation
+from app.models.report import ReportExportJob
+from app.services.pdf_render_pool import pdf_render_pool
+
+
+class ReportExportService:
+    """Service for bulk report export jobs"""
+
+    CONTENT_TYPE = "application/zip"
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _background(self) -> ThreadPoolExecutor:
+        # One export at a time per process: the render pool is shared with
+        # interactive downloads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-export")
+        return self._executor
+
+    @staticmethod
+    def object_name(job_id: str) -> str:
+        return f"{settings.REPORT_EXPORT_PREFIX}/{job_id}.zip"
+
+    @staticmethod
+    def _report_date():
+        """Date printed on a report: the consultation date, else its creation"""
+        return func.coalesce(Consultation.consultation_date, Consultation.created_at)
+
+    @staticmethod
+    def _filtered(statement, filters: Dict[str, Any]):
+        if filters.get("doctor_id") is not None:
+            statement = statement.where(Consultation.doctor_id == filters["doctor_id"])
+        if filters.get("patient_ids"):
+            statement = statement.where(Consultation.patient_id.in_(filters["patient_ids"]))
+        if filters.get("date_from"):
+            start = datetime.combine(date.fromisoformat(filters["date_from"]), datetime.min.time())
+            statement = statement.where(ReportExportService._report_date() >= start)
+        if filters.get("date_to"):
+            end = datetime.combine(date.fromisoformat(filters["date_to"]), datetime.min.time()) + timedelta(days=1)
+            statement = statement.where(ReportExportService._report_date() < end)
+        return statement
+
+    # Jobs
+
+    def create_job(self, db: Session, user_id: int, filters: Dict[str, Any]) -> ReportExportJob:
+        """
+        Record an export job and start it in the background
+
+        Args:
+            db: Database session
+            user_id: Owner of the job
+            filters: {doctor_id, date_from, date_to (ISO dates), patient_ids}
+
+        Returns:
+            The pending job, with its total
+
+        Raises:
+            ValueError: If nothing matches or the selection is too large
+        """
+        total = db.execute(self._filtered(select(func.count(Consultation.id)), filters)).scalar()
+        if not total:
+            raise ValueError("Aucune consultation ne correspond aux critères")
+        if total > settings.REPORT_EXPORT_MAX_CONSULTATIONS:
+            raise ValueError(
+                f"{total} consultations sélectionnées, "
+                f"maximum {settings.REPORT_EXPORT_MAX_CONSULTATIONS} par export"
+            )
+
+        job = ReportExportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status="pending",
+            filters=filters,
+            total=total,
+            worker_host=socket.gethostname(),
+            worker_pid=os.getpid()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._background().submit(self.run_job, job.id)
+        return job
+
+    @staticmethod
+    def get_job(db: Session, job_id: str, user_id: int) -> Optional[ReportExportJob]:
+        return db.query(ReportExportJob).filter(
+            ReportExportJob.id == job_id,
+            ReportExportJob.user_id == user_id
+        ).first()
+
+    @staticmethod
+    def _update(db: Session, job_id: str, **values):
+        db.query(ReportExportJob).filter(ReportExportJob.id == job_id).update(values)
+        db.commit()
+
+    @staticmethod
+    def _submit(batch: List[dict]) -> Future:
+        """Queue a batch on the render pool, waiting while it is saturated"""
+        from app.services.pdf_service import render_consultation_pdfs
+        while True:
+            try:
+                return pdf_render_pool.submit(render_consultation_pdfs, batch)
+            except HTTPException:
+                # Interactive downloads come first
+                time.sleep(1)
+
+    def run_job(self, job_id: str):
+        """Render every selected report into a ZIP and upload it"""
+        from app.core.database import SessionLocal
+        from app.services.minio_service import minio_service
+        from app.services.pdf_service import pdf_service
+
+        db = SessionLocal()
+        fd, path = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        try:
+            job = db.get(ReportExportJob, job_id)
+            if job is None:
+                return
+            self._update(db, job_id, status="running")
+            rows = db.execute(
+                self._filtered(select(Consultation.id, Consultation.patient_id), job.filters)
+                .order_by(Consultation.patient_id, self._report_date())
+                .limit(settings.REPORT_EXPORT_MAX_CONSULTATIONS)
+            ).all()
+
+            batch_size = settings.REPORT_EXPORT_BATCH_SIZE
+            in_flight: Deque[Tuple[List[Tuple[int, int]], Future]] = deque()
+            done = 0
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+
+                def write_oldest():
+                    nonlocal done
+                    entries, future = in_flight.popleft()
+                    for (consultation_id, patient_id), pdf in zip(entries, future.result()):
+                        archive.writestr(
+                            f"patient_{patient_id}/Rapport_Consultation_{consultation_id}.pdf", pdf
+                        )
+                    done += len(entries)
+                    self._update(db, job_id, completed=done)
+
+                for start in range(0, len(rows), batch_size):
+                    chunk = rows[start:start + batch_size]
+                    data = pdf_service.consultation_reports_data(db, [r.id for r in chunk])
+                    # Consultations deleted since the job was queued are skipped
+                    entries = [(r.id, r.patient_id) for r in chunk if r.id in data]
+                    in_flight.append((entries, self._submit([data[i] for i, _ in entries])))
+                    db.rollback()  # Do not hold a snapshot open while rendering
+                    if len(in_flight) > pdf_render_pool.workers:
+                        write_oldest()
+                while in_flight:
+                    write_oldest()
+
+            size = os.path.getsize(path)
+            with open(path, "rb") as upload:
+                minio_service.upload_file(upload, self.object_name(job_id), self.CONTENT_TYPE, size)
+            self._update(
+                db, job_id,
+                status="completed",
+                object_name=self.object_name(job_id),
+                size=size,
+                total=done,
+                finished_at=datetime.utcnow()
+            )
+            print(f"[REPORT EXPORT] Job {job_id}: {done} reports, {size} bytes")
+        except Exception as e:
+            print(f"[REPORT EXPORT] Job {job_id} failed: {e}")
+            db.rollback()
+            self._update(db, job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            os.unlink(path)
+            db.close()
+
+    @staticmethod
+    def fail_orphaned_jobs(db: Session) -> Dict[str, int]:
+        """
+        Fail the unfinished jobs of dead workers on this host
+
+        Called when a worker starts: a job owned by its own PID belonged to
+        an earlier process that got the same PID. Jobs from before owners
+        were recorded are failed too. Jobs of other hosts are left to the
+        workers of those hosts.
+
+        Args:
+            db: Database session
+
+        Returns:
+            {"failed": number of jobs marked as failed}
+        """
+        host = socket.gethostname()
+        jobs = db.query(ReportExportJob).filter(
+            ReportExportJob.status.in_(("pending", "running")),
+            or_(ReportExportJob.worker_host == host, ReportExportJob.worker_host.is_(None))
+        ).all()
+        orphans = [
+            job.id for job in jobs
+            if job.worker_pid is None or job.worker_pid == os.getpid() or not process_alive(job.worker_pid)
+        ]
+        if orphans:
+            db.query(ReportExportJob).filter(
+                ReportExportJob.id.in_(orphans),
+                ReportExportJob.status.in_(("pending", "running"))
+            ).update({
+                "status": "failed",
+                "error": "Export interrompu : le serveur qui le traitait s'est arrêté",
+                "finished_at": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+            print(f"[REPORT EXPORT] Marked {len(orphans)} orphaned job(s) as failed")
+        return {"failed": len(orphans)}
+
+    @staticmethod
+    def open_download(job: ReportExportJob) -> Iterator[bytes]:
+        """Stream a completed export from object storage"""
+        from app.services.minio_service import minio_service
+        return minio_service.iter_file(job.object_name)
+
+    @staticmethod
+    def purge_expired(db: Session) -> Dict[str, int]:
+        """
+        Delete exports (archive and job) older than the retention period
+
+        Jobs stuck in pending/running that long belonged to a worker that
+        died on a host where no worker started since; they are removed too.
+        """
+        from app.services.minio_service import minio_service
+
+        cutoff = datetime.utcnow() - timedelta(hours=settings.REPORT_EXPORT_RETENTION_HOURS)
+        jobs = db.query(ReportExportJob).filter(ReportExportJob.created_at < cutoff).all()
+        for job in jobs:
+            if job.object_name:
+                try:
+                    minio_service.delete_file(job.object_name)
+                except Exception as e:
+                    print(f"[REPORT EXPORT] Could not delete {job.object_name}: {e}")
+                    continue
+            db.delete(job)
+        db.commit()
+        return {"deleted": len(jobs)}
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+report_export_service = ReportExportService()
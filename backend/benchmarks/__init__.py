@@ -0,0 +1,21 @@
+"""
+Load-testing harness for the Meda API
+
+Runs on a single Linux box without the production services: SQLite (or
+a local PostgreSQL) for the database, the filesystem storage backend for
+MinIO, in-process fallbacks for Redis. A run
+
+1. seeds a fresh database with realistic volumes (seed.py),
+2. starts the API with uvicorn against it,
+3. drives scripted user journeys with concurrent virtual users
+   (journeys.py),
+4. reports p50/p95/p99 latency and throughput per step and compares them
+   with a stored baseline (report.py).
+
+    python -m benchmarks.run --scale small --users 10 --duration 60
+    python -m benchmarks.run --scale small --save-baseline
+
+Exit status is 1 when a step regressed beyond the tolerance, so a deploy
+pipeline can gate on it. Baselines are machine-specific: record them on
+the box that runs the comparison. They are git-ignored, not versioned.
+"""
@@ -0,0 +1,71 @@
+"""
+Synthetic clinical data shared by the seeder, the journeys and the
+micro-benchmarks
+
+Every generator takes a random.Random so that a run is reproducible from
+its seed.
+"""
+import random
+from typing import Any, Dict, List
+
+FIRST_NAMES = [
+    "Adèle", "Amine", "Anaïs", "Baptiste", "Camille", "Chloé", "Céline", "Djibril",
+    "Élodie", "Émile", "François", "Hélène", "Inès", "Jérôme", "Léa", "Lucas",
+    "Maëlle", "Mathéo", "Noémie", "Océane", "Raphaël", "Sébastien", "Thérèse", "Zoé",
+]
+LAST_NAMES = [
+    "Bernard", "Boucher", "Chevalier", "Dubois", "Dupré", "Durand", "Fontaine", "François",
+    "Garnier", "Girard", "Lefèvre", "Leroy", "Martin", "Mercier", "Moreau", "Müller",
+    "N'Diaye", "Petit", "Rousseau", "Roux", "Sánchez", "Thomas", "Vincent", "Zéphir",
+]
+
+# Phrases as doctors type them: matched keywords, variants and noise
+SYMPTOMS = [
+    "Fièvre", "fievre depuis 3 jours", "Toux sèche", "toux productive", "Douleur thoracique",
+    "douleur poitrine à l'effort", "Douleur abdominale", "Essoufflement", "dyspnée d'effort",
+    "Maux de tête", "Fatigue", "fatigue intense", "Nausée", "nausées matinales", "Vertiges",
+    "Frissons", "Perte d'appétit", "Douleurs musculaires", "Palpitations", "Éruption cutanée",
+]
+COMPLAINT_FILLER = [
+    "le patient rapporte", "depuis environ une semaine", "aggravé la nuit", "sans amélioration",
+    "malgré le paracétamol", "avec des épisodes intermittents", "apparu brutalement",
+    "associé à une gêne générale", "signalé par la famille", "lors de la consultation précédente",
+]
+CONDITIONS = [
+    "Diabète type 2", "Hypertension", "Asthme", "Maladie cardiaque", "Hypothyroïdie",
+    "BPCO", "Insuffisance rénale", "Cancer du sein (rémission)", "Migraine", "Anémie",
+]
+CONDITION_STATUSES = ["active", "chronic", "resolved"]
+IMAGE_TYPES = ["xray", "ct", "mri", "retinal", "ultrasound"]
+BODY_PARTS = ["chest", "brain", "abdomen", "knee", "eye", None]
+
+
+def symptoms(rng: random.Random, count: int) -> List[str]:
+    return rng.sample(SYMPTOMS, min(count, len(SYMPTOMS)))
+
+
+def free_text_complaint(rng: random.Random, words: int) -> str:
+    """Long free-text complaint mixing symptom phrases and filler"""
+    parts = []
+    length = 0
+    while length < words:
+        part = rng.choice(SYMPTOMS) if rng.random() < 0.3 else rng.choice(COMPLAINT_FILLER)
+        parts.append(part)
+        length += len(part.split())
+    return ", ".join(parts)
+
+
+def vital_signs(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "temperature": round(rng.gauss(37.4, 0.9), 1),
+        "heart_rate": int(rng.gauss(82, 16)),
+        "oxygen_saturation": min(100, int(rng.gauss(96, 2.5))),
+        "blood_pressure": f"{int(rng.gauss(128, 15))}/{int(rng.gauss(80, 10))}",
+    }
+
+
+def history_entries(rng: random.Random, count: int) -> List[Dict[str, str]]:
+    return [
+        {"condition": rng.choice(CONDITIONS), "status": rng.choice(CONDITION_STATUSES)}
+        for _ in range(count)
+    ]
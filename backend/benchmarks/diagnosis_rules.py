@@ -0,0 +1,301 @@
+"""
+Micro-benchmarks of the comprehensive diagnosis rule evaluation
+
+Times the pure steps of ComprehensiveDiagnosisService (symptom analysis,
+risk factors, vital signs, diagnosis synthesis) and the whole
+diagnose_patient call on synthetic cases, and measures the memory each
+call allocates. Inputs come from a fixed seed, and the mock AI analysis
+runs with its latency disabled and a seeded generator, so two runs on the
+same code evaluate exactly the same rules.
+
+    python -m benchmarks.diagnosis_rules --cases 5000
+    python -m benchmarks.diagnosis_rules --workload free_text --free-text-words 200
+    python -m benchmarks.diagnosis_rules --save-baseline
+    python -m benchmarks.diagnosis_rules --history benchmarks/results/diagnosis_rules.jsonl
+
+Workloads: `typical` (one to six short symptoms as picked in the UI) and
+`free_text` (symptoms plus a long typed complaint). Timings are per call
+with the garbage collector paused; allocations are the peak traced by
+tracemalloc during a call, in a separate pass.
+
+Baselines (baselines/diagnosis-rules-<workload>.json) and the --history
+file are machine-specific and git-ignored: record them on the box that
+runs the comparison.
+
+Exit status: 0 ok, 1 regression against the baseline, 2 baseline not
+comparable.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks import data
+from benchmarks.report import git_commit, percentile
+from benchmarks.seed import register_models
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+COMPARABLE_KEYS = ("workload", "cases", "seed", "free_text_words")
+# Mean of the fastest pass: the least disturbed by the rest of the machine
+# (as timeit reports); percentiles are shown but too noisy to gate on
+COMPARED_STATS = ("best_us",)
+
+
+@dataclass
+class Case:
+    symptoms: List[str]
+    vital_signs: Dict[str, Any]
+    history: List[Any]  # MedicalHistory (transient)
+    images: List[Any]  # MedicalImage (transient)
+
+
+def generate_cases(rng: random.Random, count: int, workload: str, free_text_words: int) -> List[Case]:
+    """Synthetic patients; the same seed always yields the same cases"""
+    from app.models.consultation import MedicalHistory
+    from app.models.medical import ImageType, MedicalImage
+
+    register_models()
+    cases = []
+    for _ in range(count):
+        symptoms = data.symptoms(rng, rng.randint(1, 6))
+        if workload == "free_text":
+            symptoms.append(data.free_text_complaint(rng, free_text_words))
+        cases.append(Case(
+            symptoms=symptoms,
+            vital_signs=data.vital_signs(rng),
+            history=[
+                MedicalHistory(condition=entry["condition"], status=entry["status"])
+                for entry in data.history_entries(rng, rng.randint(0, 4))
+            ],
+            images=[
+                MedicalImage(image_type=ImageType(rng.choice(data.IMAGE_TYPES)), body_part=rng.choice(data.BODY_PARTS))
+                for _ in range(rng.choice([0, 0, 1, 2]))
+            ],
+        ))
+    return cases
+
+
+def _stats(nanoseconds: List[int], passes: int) -> Dict[str, float]:
+    per_pass = len(nanoseconds) // passes
+    best = min(
+        sum(nanoseconds[start:start + per_pass]) / per_pass
+        for start in range(0, per_pass * passes, per_pass)
+    ) / 1000
+    values = sorted(ns / 1000 for ns in nanoseconds)
+    mean = sum(values) / len(values)
+    return {
+        "calls": len(values),
+        "best_us": round(best, 3),
+        "mean_us": round(mean, 3),
+        "p50_us": round(percentile(values, 50), 3),
+        "p95_us": round(percentile(values, 95), 3),
+        "p99_us": round(percentile(values, 99), 3),
+        "calls_per_s": round(1e6 / mean) if mean else 0,
+    }
+
+
+def time_calls(func: Callable, arguments: List[Tuple], repeat: int) -> Dict[str, float]:
+    """Per-call latency over `repeat` passes (after one warm-up pass)"""
+    for args in arguments:
+        func(*args)
+    timings = []
+    clock = time.perf_counter_ns
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for args in arguments:
+                started = clock()
+                func(*args)
+                timings.append(clock() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return _stats(timings, repeat)
+
+
+def measure_allocations(func: Callable, arguments: List[Tuple]) -> Dict[str, float]:
+    """Peak bytes traced by tracemalloc while each call runs"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in arguments:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return {
+        "mean_bytes": round(sum(peaks) / len(peaks)),
+        "p99_bytes": percentile(peaks, 99),
+    }
+
+
+def _run_async(coroutine_function: Callable) -> Callable:
+    """Synchronous wrapper running each call to completion on one loop"""
+    loop = asyncio.new_event_loop()
+
+    def call(*args):
+        return loop.run_until_complete(coroutine_function(*args))
+
+    call.loop = loop
+    return call
+
+
+def benchmark(cases: List[Case], repeat: int) -> Dict[str, Dict[str, float]]:
+    from app.services.ai_service import AIService
+    from app.services.comprehensive_diagnosis import ComprehensiveDiagnosisService as Service
+
+    symptom_args = [(c.symptoms,) for c in cases]
+    risk_args = [(c.history,) for c in cases]
+    vital_args = [(c.vital_signs,) for c in cases]
+    # _generate_diagnosis is timed on the outputs of the other steps
+    image_findings = [
+        [
+            {
+                "image_type": image.image_type.value,
+                "body_part": image.body_part,
+                "findings": AIService._generate_findings(image.image_type.value, image.body_part),
+                "confidence": 0.9,
+            }
+            for image in c.images
+        ]
+        for c in cases
+    ]
+    diagnosis_args = [
+        (
+            Service._analyze_symptoms(c.symptoms),
+            findings,
+            Service._assess_risk_factors(c.history),
+            Service._assess_vital_signs(c.vital_signs),
+        )
+        for c, findings in zip(cases, image_findings)
+    ]
+    diagnose = _run_async(Service.diagnose_patient)
+    patient_args = [(c.symptoms, c.vital_signs, c.history, c.images) for c in cases]
+
+    targets = {
+        "_analyze_symptoms": (Service._analyze_symptoms, symptom_args),
+        "_assess_risk_factors": (Service._assess_risk_factors, risk_args),
+        "_assess_vital_signs": (Service._assess_vital_signs, vital_args),
+        "_generate_diagnosis": (Service._generate_diagnosis, diagnosis_args),
+        "diagnose_patient": (diagnose, patient_args),
+    }
+    results = {}
+    try:
+        for name, (func, arguments) in targets.items():
+            results[name] = {
+                **time_calls(func, arguments, repeat),
+                **measure_allocations(func, arguments),
+            }
+    finally:
+        diagnose.loop.close()
+    return results
+
+
+def format_table(results: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'function':<24}{'calls':>9}{'best':>10}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'calls/s':>11}{'alloc B':>10}"
+    lines = [header + "  (us)", "-" * (len(header) + 6)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<24}{r['calls']:>9}{r['best_us']:>10.2f}{r['mean_us']:>10.2f}{r['p50_us']:>10.2f}{r['p95_us']:>10.2f}"
+            f"{r['p99_us']:>10.2f}{r['calls_per_s']:>11}{r['mean_bytes']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Functions slower or allocating more than the baseline allows"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in COMPARED_STATS:
+            if current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {base[key]:.2f} -> {current[key]:.2f} us")
+        if current["mean_bytes"] > base["mean_bytes"] * (1 + tolerance):
+            regressions.append(f"{name} allocations: {base['mean_bytes']} -> {current['mean_bytes']} B/call")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the diagnosis rules")
+    parser.add_argument("--workload", choices=["typical", "free_text"], default="typical")
+    parser.add_argument("--cases", type=int, default=2000, help="Synthetic patients")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes over the cases")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--free-text-words", type=int, default=150, help="Length of free-text complaints")
+    parser.add_argument("--baseline", help="Baseline file (default: baselines/diagnosis-rules-<workload>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--history", help="Append this run as one JSON line to this file")
+    args = parser.parse_args()
+
+    from app.services.ai_service import AIService
+
+    AIService.latency = (0.0, 0.0)
+    AIService.rng = random.Random(args.seed)
+    cases = generate_cases(random.Random(args.seed), args.cases, args.workload, args.free_text_words)
+    results = benchmark(cases, args.repeat)
+
+    meta = {
+        "workload": args.workload,
+        "cases": args.cases,
+        "seed": args.seed,
+        "free_text_words": args.free_text_words if args.workload == "free_text" else None,
+        "repeat": args.repeat,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    record = {"meta": meta, "results": results}
+    print(format_table(results))
+    print()
+
+    if args.history:
+        Path(args.history).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, "a") as out:
+            out.write(json.dumps(record) + "\n")
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINE_DIR / f"diagnosis-rules-{args.workload}.json"
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(record, indent=2) + "\n")
+        print(f"[BENCH] Baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"[BENCH] No baseline at {baseline_path} (record one with --save-baseline)")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    differences = [
+        f"{key}: {baseline['meta'].get(key)!r} in baseline, {meta.get(key)!r} now"
+        for key in COMPARABLE_KEYS
+        if meta.get(key) != baseline["meta"].get(key)
+    ]
+    if differences:
+        print("[BENCH] Baseline not comparable:\n  " + "\n  ".join(differences))
+        return 2
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print("[BENCH] REGRESSIONS:\n  " + "\n  ".join(regressions))
+        return 1
+    print(f"[BENCH] No regression against {baseline_path.name} (commit {baseline['meta'].get('commit')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Scripted user journeys
+
+Each virtual user logs in as one seeded doctor and repeats weighted
+journeys until the run ends, without think time (closed loop: the load is
+the number of users). Every HTTP call is recorded under a step name with
+its latency and outcome; calls made during the warm-up are not kept.
+
+Journeys:
+- browse: patient list, search, a patient and their consultations,
+  notifications
+- imaging: upload an image, start its analysis, read the analysis back
+- consult: comprehensive diagnosis, consultation PDF
+- collaborate: comment on a shared (or own) consultation, list comments
+- login: a fresh login (Argon2 verification)
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+from benchmarks import data
+
+API = "/api/v1"
+
+
+@dataclass
+class Sample:
+    step: str
+    seconds: float
+    status: int  # 0 when the request did not complete
+    ok: bool
+
+
+class Recorder:
+    """Collects samples once the warm-up is over"""
+
+    def __init__(self):
+        self.samples: List[Sample] = []
+        self.recording = False
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    def start(self):
+        self.recording = True
+        self.started_at = time.perf_counter()
+
+    def stop(self):
+        self.recording = False
+        self.stopped_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or time.perf_counter()) - self.started_at
+
+    def record(self, step: str, seconds: float, status: int, ok: bool):
+        if self.recording:
+            self.samples.append(Sample(step, seconds, status, ok))
+
+
+class VirtualUser:
+    """One doctor running journeys against the API"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        doctor: Dict[str, Any],
+        password: str,
+        rng: random.Random,
+        recorder: Recorder,
+        image: bytes
+    ):
+        self.client = client
+        self.doctor = doctor
+        self.password = password
+        self.rng = rng
+        self.recorder = recorder
+        self.image = image
+        self.token: Optional[str] = None
+
+    async def call(
+        self,
+        step: str,
+        method: str,
+        url: str,
+        expected: Iterable[int] = (200,),
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            # Streaming endpoints: the latency includes the whole body
+            await response.aread()
+        except httpx.HTTPError:
+            self.recorder.record(step, time.perf_counter() - started, 0, False)
+            return None
+        elapsed = time.perf_counter() - started
+        ok = response.status_code in expected
+        self.recorder.record(step, elapsed, response.status_code, ok)
+        if response.status_code == 401 and step != "login":
+            self.token = None
+        return response if ok else None
+
+    def _pick(self, kind: str) -> Optional[int]:
+        ids = self.doctor.get(kind) or []
+        return self.rng.choice(ids) if ids else None
+
+    # Journeys
+
+    async def login(self):
+        self.token = None
+        response = await self.call(
+            "login", "POST", f"{API}/auth/login",
+            json={"email": self.doctor["email"], "password": self.password}
+        )
+        if response is not None:
+            self.token = response.json()["access_token"]
+
+    async def browse(self):
+        await self.call("list_patients", "GET", f"{API}/patients/", params={"limit": 50})
+        await self.call(
+            "search_patients", "GET", f"{API}/patients/",
+            params={"search": self.rng.choice(data.LAST_NAMES), "limit": 20}
+        )
+        patient_id = self._pick("patients")
+        if patient_id is not None:
+            await self.call("get_patient", "GET", f"{API}/patients/{patient_id}")
+            await self.call("patient_consultations", "GET", f"{API}/consultations/patient/{patient_id}")
+        await self.call("unread_count", "GET", f"{API}/notifications/unread-count")
+        await self.call("list_notifications", "GET", f"{API}/notifications/", params={"limit": 20})
+
+    async def imaging(self):
+        patient_id = self._pick("patients")
+        response = await self.call(
+            "upload_image", "POST", f"{API}/images/upload",
+            expected=(201,),
+            files={"file": ("scan.png", self.image, "image/png")},
+            data={
+                "image_type": self.rng.choice(data.IMAGE_TYPES),
+                "body_part": "chest",
+                **({"patient_id": str(patient_id)} if patient_id is not None else {}),
+            }
+        )
+        if response is None:
+            return
+        response = await self.call("start_analysis", "POST", f"{API}/analysis/start/{response.json()['id']}")
+        if response is not None:
+            await self.call("get_analysis", "GET", f"{API}/analysis/{response.json()['id']}")
+
+    async def consult(self):
+        patient_id = self._pick("patients")
+        if patient_id is not None:
+            await self.call(
+                "diagnosis", "POST", f"{API}/diagnosis/comprehensive/{patient_id}",
+                json={
+                    "patient_id": patient_id,
+                    "symptoms": data.symptoms(self.rng, self.rng.randint(1, 6)),
+                    "vital_signs": data.vital_signs(self.rng),
+                }
+            )
+        consultation_id = self._pick("consultations")
+        if consultation_id is not None:
+            await self.call("consultation_pdf", "GET", f"{API}/reports/consultation/{consultation_id}/pdf")
+
+    async def collaborate(self):
+        consultation_id = self._pick("shared_consultations") or self._pick("consultations")
+        if consultation_id is None:
+            return
+        await self.call(
+            "add_comment", "POST", f"{API}/collaboration/consultations/{consultation_id}/comments",
+            json={"content": data.free_text_complaint(self.rng, 12)}
+        )
+        await self.call("list_comments", "GET", f"{API}/collaboration/consultations/{consultation_id}/comments")
+
+    def journeys(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        return {
+            "browse": self.browse,
+            "imaging": self.imaging,
+            "consult": self.consult,
+            "collaborate": self.collaborate,
+            "login": self.login,
+        }
+
+    async def run(self, weights: Dict[str, float], deadline: float):
+        journeys = self.journeys()
+        names = [name for name in weights if weights[name] > 0]
+        await self.login()
+        while time.perf_counter() < deadline:
+            if self.token is None:
+                await self.login()
+                if self.token is None:
+                    await asyncio.sleep(0.5)
+                    continue
+            name = self.rng.choices(names, [weights[n] for n in names])[0]
+            await journeys[name]()
+
+
+DEFAULT_WEIGHTS = {"browse": 5, "imaging": 2, "consult": 2, "collaborate": 2, "login": 0.5}
+
+
+async def run_load(
+    base_url: str,
+    manifest: Dict[str, Any],
+    users: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+    image: bytes,
+    weights: Optional[Dict[str, float]] = None,
+    timeout: float = 60.0
+) -> Recorder:
+    """
+    Run `users` virtual users for warmup + duration seconds
+
+    Users are assigned to the seeded doctors round-robin; each has its own
+    random stream derived from `seed`.
+    """
+    recorder = Recorder()
+    doctors = manifest["doctors"]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        virtual_users = [
+            VirtualUser(client, doctors[i % len(doctors)], manifest["password"],
+                        random.Random(seed * 1000 + i), recorder, image)
+            for i in range(users)
+        ]
+        deadline = time.perf_counter() + warmup + duration
+        tasks = [asyncio.create_task(u.run(weights or DEFAULT_WEIGHTS, deadline)) for u in virtual_users]
+        await asyncio.sleep(warmup)
+        recorder.start()
+        await asyncio.gather(*tasks)
+        recorder.stop()
+    return recorder
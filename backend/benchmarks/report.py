@@ -0,0 +1,135 @@
+"""
+Latency/throughput summary and baseline comparison
+"""
+import json
+import math
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.journeys import Sample
+
+# Parameters that must match for a baseline to be comparable
+COMPARABLE_KEYS = ("scale", "seed", "users", "workers", "database", "weights")
+
+# Samples a step needs before its percentile is compared (tail estimates
+# from a handful of calls are noise)
+MIN_SAMPLES = {"p50_ms": 10, "p95_ms": 40, "p99_ms": 200}
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, recorded with every result"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (q in 0-100)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _stats(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(s.seconds * 1000 for s in samples)
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Per-step and overall statistics over the measured window"""
+    by_step: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_step[sample.step].append(sample)
+    statuses: Dict[str, Dict[str, int]] = {}
+    for step, step_samples in by_step.items():
+        counts: Dict[str, int] = defaultdict(int)
+        for sample in step_samples:
+            if not sample.ok:
+                counts[str(sample.status)] += 1
+        if counts:
+            statuses[step] = dict(counts)
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "total": _stats(samples, elapsed),
+        "steps": {step: _stats(by_step[step], elapsed) for step in sorted(by_step)},
+        "failed_statuses": statuses,
+    }
+
+
+def format_table(summary: Dict[str, Any]) -> str:
+    header = f"{'step':<24}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"
+    lines = [header, "-" * len(header)]
+    rows = list(summary["steps"].items()) + [("TOTAL", summary["total"])]
+    for step, s in rows:
+        lines.append(
+            f"{step:<24}{s['count']:>8}{s['errors']:>6}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}"
+        )
+    if summary["failed_statuses"]:
+        lines.append("")
+        lines.append("Failed calls by status (0 = no response): " + json.dumps(summary["failed_statuses"]))
+    return "\n".join(lines)
+
+
+def comparable(meta: Dict[str, Any], baseline_meta: Dict[str, Any]) -> List[str]:
+    """Parameters that differ between a run and a baseline"""
+    return [
+        f"{key}: {baseline_meta.get(key)!r} in baseline, {meta.get(key)!r} now"
+        for key in COMPARABLE_KEYS
+        if meta.get(key) != baseline_meta.get(key)
+    ]
+
+
+def compare(
+    summary: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.15,
+    min_delta_ms: float = 5.0
+) -> List[str]:
+    """
+    Regressions of a run against a baseline summary
+
+    A latency percentile regresses when it is more than `tolerance` above
+    the baseline and by at least `min_delta_ms` (fast steps are noisy in
+    relative terms); it is only compared when both runs made MIN_SAMPLES
+    calls. Throughput regresses when it drops by more than `tolerance`,
+    error rate when it grows by more than one point.
+    """
+    regressions = []
+    for step, current in list(summary["steps"].items()) + [("TOTAL", summary["total"])]:
+        base = baseline["total"] if step == "TOTAL" else baseline["steps"].get(step)
+        if base is None:
+            continue
+        for key, needed in MIN_SAMPLES.items():
+            if min(current["count"], base["count"]) < needed:
+                continue
+            limit = base[key] * (1 + tolerance)
+            if current[key] > limit and current[key] - base[key] >= min_delta_ms:
+                regressions.append(f"{step} {key[:3]}: {base[key]:.1f} -> {current[key]:.1f} ms")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(
+                f"{step} error rate: {base['error_rate']:.1%} -> {current['error_rate']:.1%}"
+            )
+    if summary["total"]["rps"] < baseline["total"]["rps"] * (1 - tolerance):
+        regressions.append(
+            f"TOTAL throughput: {baseline['total']['rps']:.1f} -> {summary['total']['rps']:.1f} req/s"
+        )
+    return regressions
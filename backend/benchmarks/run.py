@@ -0,0 +1,208 @@
+"""
+Run a load test end to end and compare it with the stored baseline
+
+    python -m benchmarks.run --scale small --users 10 --duration 60
+    python -m benchmarks.run --scale small --users 10 --save-baseline
+    python -m benchmarks.run --url http://staging:8000 --manifest staging-manifest.json
+
+Without --url the run is self-contained: a scratch directory holds a
+SQLite database (or --database-url, which must point to an empty
+database), the filesystem storage backend and the server log. Redis is
+disabled (in-process fallbacks) and rate limiting is turned off.
+
+Exit status: 0 ok, 1 regression against the baseline, 2 baseline not
+comparable (different parameters).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+
+from benchmarks import report
+from benchmarks.journeys import DEFAULT_WEIGHTS, run_load
+from benchmarks.seed import SCALES, sample_image
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_environment(workdir: Path, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "REDIS_URL": "",
+        "EVENT_BUS_BACKEND": "memory",
+        "STORAGE_BACKEND": "filesystem",
+        "STORAGE_LOCAL_PATH": str(workdir / "storage"),
+        "RATE_LIMIT_ENABLED": "false",
+        "DEBUG": "false",
+        "PYTHONPATH": str(BACKEND_DIR),
+    })
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return env
+
+
+def prepare(workdir: Path, env: Dict[str, str], scale: str, seed: int) -> Path:
+    """Migrate and seed the database, returns the manifest path"""
+    manifest = workdir / "manifest.json"
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True)
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.seed", "--scale", scale, "--seed", str(seed), "--manifest", str(manifest)],
+        cwd=BACKEND_DIR, env=env, check=True
+    )
+    print(f"[BENCH] Seeded '{scale}' in {time.perf_counter() - started:.1f} s")
+    return manifest
+
+
+def start_server(workdir: Path, env: Dict[str, str], port: int, workers: int) -> subprocess.Popen:
+    log = open(workdir / "server.log", "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}, see {workdir / 'server.log'}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy, see {workdir / 'server.log'}")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the API and compare with a baseline")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=10, help="Unmeasured seconds before")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (keep 1 with SQLite)")
+    parser.add_argument("--weights", type=json.loads, default=DEFAULT_WEIGHTS,
+                        help=f"Journey weights as JSON (default {json.dumps(DEFAULT_WEIGHTS)})")
+    parser.add_argument("--database-url", help="Empty database to use instead of a scratch SQLite file")
+    parser.add_argument("--workdir", help="Scratch directory (default: temporary, removed unless --keep)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--url", help="Drive an already running server (requires --manifest)")
+    parser.add_argument("--manifest", help="Seed manifest of the target server")
+    parser.add_argument("--baseline", help="Baseline file (default: baselines/<scale>-<users>u.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore latency changes below this")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    if args.url and not args.manifest:
+        parser.error("--url requires --manifest (python -m benchmarks.seed on the target database)")
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="meda-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    database_url = args.database_url or f"sqlite:///{workdir / 'bench.db'}"
+    server = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            manifest_path = Path(args.manifest)
+        else:
+            env = server_environment(workdir, database_url)
+            manifest_path = prepare(workdir, env, args.scale, args.seed)
+            port = _free_port()
+            server = start_server(workdir, env, port, args.workers)
+            base_url = f"http://127.0.0.1:{port}"
+
+        manifest = json.loads(manifest_path.read_text())
+        print(f"[BENCH] {args.users} users, {args.warmup:.0f} s warm-up + {args.duration:.0f} s against {base_url}")
+        recorder = asyncio.run(run_load(
+            base_url, manifest, args.users, args.duration, args.warmup, args.seed, sample_image(), args.weights
+        ))
+    finally:
+        if server is not None:
+            stop_server(server)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        elif server is not None:
+            print(f"[BENCH] Scratch directory: {workdir}")
+
+    summary = report.summarize(recorder.samples, recorder.elapsed)
+    meta: Dict[str, Any] = {
+        "scale": args.scale,
+        "seed": args.seed,
+        "users": args.users,
+        "workers": args.workers,
+        "database": "external" if args.url else database_url.split(":", 1)[0],
+        "weights": args.weights,
+        "duration": args.duration,
+        "commit": report.git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    results = {"meta": meta, **summary}
+    print()
+    print(report.format_table(summary))
+    print()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINE_DIR / f"{args.scale}-{args.users}u.json"
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"[BENCH] Baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"[BENCH] No baseline at {baseline_path} (record one with --save-baseline)")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    differences = report.comparable(meta, baseline["meta"])
+    if differences:
+        print("[BENCH] Baseline not comparable:\n  " + "\n  ".join(differences))
+        return 2
+    regressions = report.compare(summary, baseline, args.tolerance, args.min_delta_ms)
+    base_meta = baseline["meta"]
+    print(f"[BENCH] Against baseline {baseline_path.name} (commit {base_meta.get('commit')}, {base_meta.get('recorded_at')})")
+    if regressions:
+        print("[BENCH] REGRESSIONS:\n  " + "\n  ".join(regressions))
+        return 1
+    print("[BENCH] No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
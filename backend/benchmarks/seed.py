@@ -0,0 +1,299 @@
+"""
+Seed a database with benchmark data
+
+Creates doctors sharing one password, their patients with medical
+history and consultations, images (rows and stored files), consultation
+shares with comments, and notifications. Volumes come from a named scale;
+content is drawn from benchmarks.data with a fixed seed, so two runs with
+the same arguments produce the same database.
+
+Writes a manifest (JSON) listing each doctor's credentials and a sample
+of the ids they own, which the journeys pick from:
+
+    DATABASE_URL=sqlite:///./bench.db STORAGE_BACKEND=filesystem \\
+        python -m benchmarks.seed --scale small --manifest bench-manifest.json
+
+The schema must exist (`alembic upgrade head`).
+"""
+import argparse
+import io
+import json
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from benchmarks import data
+
+DEFAULT_PASSWORD = "Bench-Password-2024!"
+MANIFEST_SAMPLE = 200  # Ids kept per doctor and kind in the manifest
+CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class Scale:
+    doctors: int
+    patients: int
+    consultations_per_patient: int
+    history_per_patient: int
+    images: int
+    shares_per_doctor: int
+    notifications_per_doctor: int
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(2, 40, 2, 1, 10, 5, 20),
+    "small": Scale(5, 500, 3, 2, 200, 20, 100),
+    "medium": Scale(20, 5000, 4, 2, 2000, 50, 500),
+    "large": Scale(50, 50000, 5, 3, 10000, 100, 2000),
+}
+
+
+def register_models():
+    """Import every model so relationships between mappers resolve"""
+    import app.models.analysis  # noqa: F401
+    import app.models.collaboration  # noqa: F401
+    import app.models.consultation  # noqa: F401
+    import app.models.medical  # noqa: F401
+    import app.models.notification  # noqa: F401
+    import app.models.report  # noqa: F401
+    import app.models.scheduler  # noqa: F401
+    import app.models.user  # noqa: F401
+
+
+def _insert(db: Session, model, rows: List[Dict[str, Any]]):
+    for start in range(0, len(rows), CHUNK):
+        db.execute(insert(model), rows[start:start + CHUNK])
+
+
+def _sample(rng: random.Random, ids: List[int]) -> List[int]:
+    return sorted(rng.sample(ids, min(MANIFEST_SAMPLE, len(ids))))
+
+
+def sample_image() -> bytes:
+    """Small grayscale PNG, the payload of seeded and uploaded images"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.effect_noise((256, 256), 64).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def seed(db: Session, scale: Scale, rng_seed: int = 42, password: str = DEFAULT_PASSWORD) -> Dict[str, Any]:
+    """
+    Fill an empty database
+
+    Args:
+        db: Database session
+        scale: Volumes to create
+        rng_seed: Seed of every random choice
+        password: Password of all seeded users
+
+    Returns:
+        The manifest: password and, per doctor, email and sampled ids
+    """
+    from app.core.security import get_password_hash
+    from app.core.text import normalize_text
+    from app.models.collaboration import Comment, ConsultationShare, SharePermission
+    from app.models.consultation import Consultation, MedicalHistory
+    from app.models.medical import AnalysisStatus, ImageType, MedicalImage, Patient
+    from app.models.notification import Notification
+    from app.models.user import User, UserRole
+    from app.services.minio_service import minio_service
+    from app.services.notification_service import notification_service
+
+    register_models()
+    rng = random.Random(rng_seed)
+    now = datetime.utcnow()
+
+    # Users (hashing once: Argon2 is deliberately slow)
+    hashed = get_password_hash(password)
+    _insert(db, User, [
+        {
+            "email": f"doctor{i}@bench.meda.example",
+            "hashed_password": hashed,
+            "full_name": f"Dr {rng.choice(data.FIRST_NAMES)} {rng.choice(data.LAST_NAMES)}",
+            "role": UserRole.DOCTOR,
+            "is_active": True,
+            "is_verified": True,
+        }
+        for i in range(scale.doctors)
+    ])
+    doctors = db.execute(
+        select(User.id, User.email).where(User.email.like("%@bench.meda.example")).order_by(User.id)
+    ).all()
+    doctor_ids = [d.id for d in doctors]
+
+    # Patients, round-robin over doctors
+    patient_rows = []
+    for n in range(scale.patients):
+        first, last = rng.choice(data.FIRST_NAMES), rng.choice(data.LAST_NAMES)
+        external_id = f"BENCH-{n:07d}"
+        patient_rows.append({
+            "patient_id": external_id,
+            "first_name": first,
+            "last_name": last,
+            "date_of_birth": datetime(1940, 1, 1) + timedelta(days=rng.randrange(30000)),
+            "gender": rng.choice(["M", "F"]),
+            "allergies": rng.choice([None, "Pénicilline", "Arachide", "Latex"]),
+            "phone": f"06{rng.randrange(10 ** 8):08d}",
+            "email": f"{normalize_text(first)}.{normalize_text(last)}{n}@example.org".replace(" ", ""),
+            "created_by": doctor_ids[n % len(doctor_ids)],
+            "search_text": normalize_text(f"{first} {last} {external_id}"),
+        })
+    _insert(db, Patient, patient_rows)
+    patients = db.execute(
+        select(Patient.id, Patient.created_by).where(Patient.patient_id.like("BENCH-%")).order_by(Patient.id)
+    ).all()
+
+    _insert(db, MedicalHistory, [
+        {
+            "patient_id": p.id,
+            "condition": entry["condition"],
+            "status": entry["status"],
+            "diagnosed_date": date(2000, 1, 1) + timedelta(days=rng.randrange(9000)),
+        }
+        for p in patients
+        for entry in data.history_entries(rng, scale.history_per_patient)
+    ])
+
+    # Consultations by the patient's doctor over the last two years
+    consultation_rows = []
+    for p in patients:
+        for _ in range(scale.consultations_per_patient):
+            consultation_rows.append({
+                "patient_id": p.id,
+                "doctor_id": p.created_by,
+                "consultation_date": now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+                "chief_complaint": data.free_text_complaint(rng, 12),
+                "symptoms": data.symptoms(rng, rng.randint(1, 5)),
+                "vital_signs": data.vital_signs(rng),
+                "diagnosis": rng.choice(["Bronchite aiguë", "Syndrome grippal", "Lombalgie", "Gastro-entérite"]),
+                "treatment_plan": "Traitement symptomatique, réévaluation à 7 jours",
+                "notes": data.free_text_complaint(rng, 30),
+            })
+    _insert(db, Consultation, consultation_rows)
+    consultations = db.execute(
+        select(Consultation.id, Consultation.doctor_id).order_by(Consultation.id)
+    ).all()
+
+    # Images: one stored payload per row so downloads and PDFs find them
+    payload = sample_image()
+    image_rows = []
+    for _ in range(scale.images):
+        p = rng.choice(patients)
+        name = f"{uuid.UUID(int=rng.getrandbits(128))}.png"
+        object_name = f"medical_images/{p.created_by}/{name}"
+        path = minio_service.upload_file(io.BytesIO(payload), object_name, "image/png", len(payload))
+        image_rows.append({
+            "filename": name,
+            "original_filename": "scan.png",
+            "file_path": path,
+            "file_size": len(payload),
+            "mime_type": "image/png",
+            "image_type": ImageType(rng.choice(data.IMAGE_TYPES)),
+            "body_part": rng.choice(data.BODY_PARTS),
+            "user_id": p.created_by,
+            "patient_id": p.id,
+            "analysis_status": AnalysisStatus.PENDING,
+        })
+    _insert(db, MedicalImage, image_rows)
+    images = db.execute(select(MedicalImage.id, MedicalImage.user_id).order_by(MedicalImage.id)).all()
+
+    # Each doctor shares consultations with the next one, both comment
+    by_doctor: Dict[int, List[int]] = {d: [] for d in doctor_ids}
+    for c in consultations:
+        by_doctor[c.doctor_id].append(c.id)
+    shared_with: Dict[int, List[int]] = {d: [] for d in doctor_ids}
+    share_rows, comment_rows = [], []
+    if len(doctor_ids) > 1:
+        for index, owner in enumerate(doctor_ids):
+            colleague = doctor_ids[(index + 1) % len(doctor_ids)]
+            owned = by_doctor[owner]
+            for consultation_id in rng.sample(owned, min(scale.shares_per_doctor, len(owned))):
+                share_rows.append({
+                    "consultation_id": consultation_id,
+                    "shared_by_user_id": owner,
+                    "shared_with_user_id": colleague,
+                    "permission": SharePermission.WRITE,
+                })
+                shared_with[colleague].append(consultation_id)
+                for author in (owner, colleague):
+                    comment_rows.append({
+                        "consultation_id": consultation_id,
+                        "user_id": author,
+                        "content": data.free_text_complaint(rng, 15),
+                    })
+    _insert(db, ConsultationShare, share_rows)
+    _insert(db, Comment, comment_rows)
+
+    notification_rows = []
+    for doctor_id in doctor_ids:
+        for n in range(scale.notifications_per_doctor):
+            kind = rng.choice(["share", "comment", "analysis_ready"])
+            created = now - timedelta(minutes=rng.randrange(60 * 24 * 30))
+            notification_rows.append({
+                "user_id": doctor_id,
+                "type": kind,
+                "title": f"Notification {kind}",
+                "message": data.free_text_complaint(rng, 8),
+                "link": f"/consultations/{rng.choice(by_doctor[doctor_id] or [0])}",
+                "is_read": rng.random() < 0.7,
+                "created_at": created,
+                "updated_at": created,
+            })
+    _insert(db, Notification, notification_rows)
+    db.commit()
+    notification_service.reconcile_unread_counters(db)
+
+    images_by_doctor: Dict[int, List[int]] = {d: [] for d in doctor_ids}
+    for image in images:
+        if image.user_id in images_by_doctor:
+            images_by_doctor[image.user_id].append(image.id)
+    patients_by_doctor: Dict[int, List[int]] = {d: [] for d in doctor_ids}
+    for p in patients:
+        patients_by_doctor[p.created_by].append(p.id)
+
+    return {
+        "seed": rng_seed,
+        "scale": asdict(scale),
+        "password": password,
+        "doctors": [
+            {
+                "id": d.id,
+                "email": d.email,
+                "patients": _sample(rng, patients_by_doctor[d.id]),
+                "consultations": _sample(rng, by_doctor[d.id]),
+                "shared_consultations": _sample(rng, shared_with[d.id]),
+                "images": _sample(rng, images_by_doctor[d.id]),
+            }
+            for d in doctors
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a database with benchmark data")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", default="bench-manifest.json", help="Where to write the manifest")
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        manifest = seed(db, SCALES[args.scale], args.seed)
+    finally:
+        db.close()
+    with open(args.manifest, "w") as out:
+        json.dump(manifest, out, indent=2)
+    print(f"[SEED] {args.scale}: {len(manifest['doctors'])} doctors, manifest in {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
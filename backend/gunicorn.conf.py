@@ -0,0 +1,21 @@
+"""
+Gunicorn hooks (loaded from the working directory)
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to
+files in that directory. It is emptied here, when the master loads its
+configuration (before --preload imports the app), and the live gauges of
+a worker are dropped when it exits.
+"""
+import os
+import shutil
+
+_metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if _metrics_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,37 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, without Redis
+"""
+import os
+import tempfile
+
+# Must be set before the app (and its engine) is imported
+_data_dir = tempfile.mkdtemp(prefix="medical-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_data_dir}/test.db"
+os.environ["REDIS_URL"] = ""
+os.environ["STORAGE_BACKEND"] = "filesystem"
+os.environ["STORAGE_LOCAL_PATH"] = os.path.join(_data_dir, "storage")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine
+from app.main import app
+
+
+@pytest.fixture
+def db():
+    """Session on an empty schema"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    """Client outside the lifespan (no scheduler or audit recovery)"""
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,83 @@
+"""
+Collaboration endpoints issue the same number of queries whatever the
+number of shares, comments or audit entries (no per-row user lookup)
+"""
+import itertools
+
+import pytest
+
+from app.api.v1.auth import get_current_user
+from app.core.query_counter import assert_max_queries, count_queries
+from app.models.collaboration import AuditLog, Comment, ConsultationShare
+from app.models.consultation import Consultation
+from app.models.medical import Patient
+from app.models.user import User, UserRole
+
+_ids = itertools.count(1)
+
+
+def _user(db, role=UserRole.DOCTOR) -> User:
+    n = next(_ids)
+    user = User(email=f"user{n}@example.com", hashed_password="x", full_name=f"Dr {n}", role=role)
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _consultation(db, doctor: User) -> Consultation:
+    patient = Patient(first_name="Jean", last_name="Martin", created_by=doctor.id)
+    db.add(patient)
+    db.flush()
+    consultation = Consultation(patient_id=patient.id, doctor_id=doctor.id, chief_complaint="Fièvre")
+    db.add(consultation)
+    db.flush()
+    return consultation
+
+
+def _add_collaborators(db, owner: User, consultation: Consultation, count: int):
+    """Users who share with, comment on and log actions against `owner`'s consultation"""
+    for _ in range(count):
+        colleague = _user(db)
+        db.add(ConsultationShare(
+            consultation_id=consultation.id,
+            shared_by_user_id=owner.id,
+            shared_with_user_id=colleague.id
+        ))
+        db.add(ConsultationShare(
+            consultation_id=_consultation(db, colleague).id,
+            shared_by_user_id=colleague.id,
+            shared_with_user_id=owner.id
+        ))
+        db.add(Comment(consultation_id=consultation.id, user_id=colleague.id, content="Vu"))
+        db.add(AuditLog(
+            entity_type="consultation",
+            entity_id=consultation.id,
+            user_id=colleague.id,
+            action="update"
+        ))
+    db.commit()
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/collaboration/consultations/{id}/shares",
+    "/api/v1/collaboration/consultations/{id}/comments",
+    "/api/v1/collaboration/shared-with-me",
+    "/api/v1/collaboration/audit-logs",
+])
+def test_query_count_does_not_grow_with_rows(db, client, path):
+    owner = _user(db, role=UserRole.ADMIN)
+    consultation = _consultation(db, owner)
+    _add_collaborators(db, owner, consultation, 2)
+    client.app.dependency_overrides[get_current_user] = lambda: owner
+    url = path.format(id=consultation.id)
+
+    with count_queries() as baseline:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()) >= 2
+
+    _add_collaborators(db, owner, consultation, 10)
+    with assert_max_queries(baseline.count):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()) >= 12
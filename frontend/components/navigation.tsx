@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import { useRouter, usePathname } from 'next/navigation';
 import { motion, AnimatePresence } from 'framer-motion';
 import { tokenManager } from '@/lib/tokenManager';
+import { api } from '@/lib/api';
 import NotificationBell from '@/components/notifications/NotificationBell';
 
 export function Navigation() {
@@ -23,6 +24,10 @@ export function Navigation() {
     }, []);
 
     const handleLogout = () => {
+        const token = localStorage.getItem('access_token');
+        if (token) {
+            api.logout(token, localStorage.getItem('refresh_token'));
+        }
         localStorage.removeItem('access_token');
         localStorage.removeItem('refresh_token');
         setShowDropdown(false);
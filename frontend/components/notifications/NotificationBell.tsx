@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { notificationsApi, type Notification } from '@/lib/api-notifications';
 
@@ -9,14 +9,133 @@ export default function NotificationBell() {
     const [notifications, setNotifications] = useState<Notification[]>([]);
     const [isOpen, setIsOpen] = useState(false);
     const [loading, setLoading] = useState(false);
+    // While the stream is open the server pushes count changes, including our own reads
+    const streamConnected = useRef(false);
 
     useEffect(() => {
-        fetchUnreadCount();
-        // Poll for new notifications every 30 seconds
-        const interval = setInterval(fetchUnreadCount, 30000);
-        return () => clearInterval(interval);
+        let source: EventSource | null = null;
+        let pollTimer: ReturnType<typeof setInterval> | null = null;
+        let reopenTimer: ReturnType<typeof setTimeout> | null = null;
+        let lastEventId = '';
+        let failures = 0;
+        let stopped = false;
+
+        // Poll every 30 seconds while there is no stream
+        const startPolling = () => {
+            fetchUnreadCount();
+            if (pollTimer === null) {
+                pollTimer = setInterval(fetchUnreadCount, 30000);
+            }
+        };
+        const stopPolling = () => {
+            if (pollTimer !== null) {
+                clearInterval(pollTimer);
+                pollTimer = null;
+            }
+        };
+        const rememberId = (event: Event) => {
+            const id = (event as MessageEvent).lastEventId;
+            if (id) {
+                lastEventId = id;
+            }
+        };
+        const scheduleReopen = () => {
+            failures += 1;
+            startPolling();
+            // 2 s, 4 s, 8 s... up to 5 minutes
+            reopenTimer = setTimeout(connect, Math.min(1000 * 2 ** failures, 300000));
+        };
+
+        const connect = async () => {
+            reopenTimer = null;
+            const token = localStorage.getItem('access_token');
+            if (!token) {
+                startPolling();
+                return;
+            }
+            let ticket: string;
+            try {
+                ticket = await notificationsApi.getStreamTicket(token);
+            } catch (error) {
+                console.error('Failed to open notification stream:', error);
+                if (!stopped) {
+                    scheduleReopen();
+                }
+                return;
+            }
+            if (stopped) {
+                return;
+            }
+
+            source = notificationsApi.openStream(ticket, lastEventId);
+            source.onopen = () => {
+                streamConnected.current = true;
+                failures = 0;
+                stopPolling();
+            };
+            source.onerror = () => {
+                streamConnected.current = false;
+                // While CONNECTING the browser retries by itself and resumes from
+                // the last event id; CLOSED means it gave up (expired ticket...)
+                if (source && source.readyState === EventSource.CLOSED) {
+                    source.close();
+                    source = null;
+                    scheduleReopen();
+                }
+            };
+            source.addEventListener('unread_count', (event) => {
+                const data = JSON.parse((event as MessageEvent).data);
+                if (typeof data.count === 'number') {
+                    setUnreadCount(data.count);
+                } else if (typeof data.delta === 'number') {
+                    setUnreadCount(count => Math.max(0, count + data.delta));
+                }
+            });
+            source.addEventListener('notification', (event) => {
+                rememberId(event);
+                const notification: Notification = JSON.parse((event as MessageEvent).data);
+                setNotifications(current =>
+                    current.some(n => n.id === notification.id) ? current : [notification, ...current]
+                );
+            });
+            // A new event was coalesced into an existing unread notification
+            source.addEventListener('notification_update', (event) => {
+                rememberId(event);
+                upsertNotifications([JSON.parse((event as MessageEvent).data)]);
+            });
+            source.addEventListener('digest', (event) => {
+                const data = JSON.parse((event as MessageEvent).data);
+                upsertNotifications(data.notifications);
+                setUnreadCount(data.unread_count);
+            });
+            // Too much was missed while disconnected to be replayed: reload the list
+            source.addEventListener('resync', () => {
+                fetchNotifications();
+            });
+        };
+
+        if (typeof EventSource === 'undefined') {
+            startPolling();
+        } else {
+            connect();
+        }
+        return () => {
+            stopped = true;
+            source?.close();
+            stopPolling();
+            if (reopenTimer !== null) {
+                clearTimeout(reopenTimer);
+            }
+        };
     }, []);
 
+    const upsertNotifications = (updates: Notification[]) => {
+        setNotifications(current => {
+            const ids = new Set(updates.map(n => n.id));
+            return [...updates, ...current.filter(n => !ids.has(n.id))];
+        });
+    };
+
     const fetchUnreadCount = async () => {
         try {
             const token = localStorage.getItem('access_token');
@@ -59,7 +178,9 @@ export default function NotificationBell() {
                 setNotifications(notifications.map(n =>
                     n.id === notificationId ? { ...n, is_read: true } : n
                 ));
-                setUnreadCount(Math.max(0, unreadCount - 1));
+                if (!streamConnected.current) {
+                    setUnreadCount(Math.max(0, unreadCount - 1));
+                }
             }
         } catch (error) {
             console.error('Failed to mark as read:', error);
@@ -72,7 +193,9 @@ export default function NotificationBell() {
             if (token) {
                 await notificationsApi.markAllAsRead(token);
                 setNotifications(notifications.map(n => ({ ...n, is_read: true })));
-                setUnreadCount(0);
+                if (!streamConnected.current) {
+                    setUnreadCount(0);
+                }
             }
         } catch (error) {
             console.error('Failed to mark all as read:', error);
@@ -86,7 +209,7 @@ export default function NotificationBell() {
                 await notificationsApi.deleteNotification(token, notificationId);
                 const notification = notifications.find(n => n.id === notificationId);
                 setNotifications(notifications.filter(n => n.id !== notificationId));
-                if (notification && !notification.is_read) {
+                if (notification && !notification.is_read && !streamConnected.current) {
                     setUnreadCount(Math.max(0, unreadCount - 1));
                 }
             }
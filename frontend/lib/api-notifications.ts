@@ -11,7 +11,9 @@ export interface Notification {
     message: string;
     link: string | null;
     is_read: boolean;
+    count: number;
     created_at: string;
+    updated_at: string | null;
 }
 
 export const notificationsApi = {
@@ -51,6 +53,39 @@ export const notificationsApi = {
         return data.count;
     },
 
+    /**
+     * Get a short-lived ticket that opens the notification stream
+     */
+    async getStreamTicket(token: string): Promise<string> {
+        const response = await fetch(`${API_BASE_URL}/notifications/stream-ticket`, {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`,
+            },
+        });
+
+        if (!response.ok) {
+            throw new Error('Failed to get stream ticket');
+        }
+
+        const data = await response.json();
+        return data.ticket;
+    },
+
+    /**
+     * Open the real-time notification stream (Server-Sent Events).
+     * EventSource cannot send headers, so a stream ticket goes in the query
+     * string (never the access token, query strings end up in access logs).
+     * A new stream resumes after `lastEventId` when given.
+     */
+    openStream(ticket: string, lastEventId?: string): EventSource {
+        const params = new URLSearchParams({ ticket });
+        if (lastEventId) {
+            params.set('last_event_id', lastEventId);
+        }
+        return new EventSource(`${API_BASE_URL}/notifications/stream?${params}`);
+    },
+
     /**
      * Mark notification as read
      */
@@ -26,6 +26,18 @@ export const api = {
         return response.json();
     },
 
+    async logout(token: string, refreshToken: string | null) {
+        // Best effort: the tokens are dropped locally either way
+        await fetch('http://localhost:8000/api/v1/auth/logout', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`,
+            },
+            body: JSON.stringify({ refresh_token: refreshToken }),
+        }).catch(() => undefined);
+    },
+
     async getCurrentUser(token: string) {
         const response = await fetch('http://localhost:8000/api/v1/auth/me', {
             headers: { 'Authorization': `Bearer ${token}` },
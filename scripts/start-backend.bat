@@ -6,13 +6,16 @@ echo.
 
 cd /d "%~dp0backend"
 
-echo [1/3] Activation environnement virtuel...
+echo [1/4] Activation environnement virtuel...
 call venv\Scripts\activate.bat
 
-echo [2/3] Installation des dependances...
+echo [2/4] Installation des dependances...
 pip install -q -r requirements.txt
 
-echo [3/3] Demarrage du serveur...
+echo [3/4] Migration de la base de donnees...
+alembic upgrade head
+
+echo [4/4] Demarrage du serveur...
 echo.
 echo Backend API: http://localhost:8000
 echo Documentation: http://localhost:8000/docs
@@ -7,7 +7,7 @@ Write-Host ""
 $BackendPath = Join-Path $PSScriptRoot "backend"
 Set-Location -Path $BackendPath
 
-Write-Host "[1/3] Vérification environnement virtuel..." -ForegroundColor Yellow
+Write-Host "[1/4] Vérification environnement virtuel..." -ForegroundColor Yellow
 $VenvPython = Join-Path $BackendPath "venv\Scripts\python.exe"
 $VenvPip = Join-Path $BackendPath "venv\Scripts\pip.exe"
 
@@ -17,10 +17,13 @@ if (-not (Test-Path $VenvPython)) {
     exit 1
 }
 
-Write-Host "[2/3] Installation des dépendances..." -ForegroundColor Yellow
+Write-Host "[2/4] Installation des dépendances..." -ForegroundColor Yellow
 & $VenvPip install -q -r requirements.txt
 
-Write-Host "[3/3] Démarrage du serveur..." -ForegroundColor Yellow
+Write-Host "[3/4] Migration de la base de données..." -ForegroundColor Yellow
+& $VenvPython -m alembic upgrade head
+
+Write-Host "[4/4] Démarrage du serveur..." -ForegroundColor Yellow
 Write-Host ""
 Write-Host "Backend API: " -NoNewline
 Write-Host "http://localhost:8000" -ForegroundColor Green